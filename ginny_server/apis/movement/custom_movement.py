@@ -1,7 +1,7 @@
 from typing import Any
 
 from core_api import ChatGPT, Llama, Grok
-from utils import PersonDetails, Neo4j, message_format, ApiObject
+from utils import PersonDetails, PersistenceQueue, message_format, ApiObject
 
 from .custom_prompt import movement_prompt
 from ..api_base import ApiBase
@@ -30,4 +30,4 @@ class _CustomMovement(ApiBase):
         llm_dict = message_format("assistant", "The movement has been performed")
         person_details.set_latest_llm_message(llm_dict)
         person_details.set_attribute("state", "speak")
-        Neo4j.add_message_to_person(person_details)
+        PersistenceQueue.enqueue(person_details)
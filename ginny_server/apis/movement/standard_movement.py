@@ -1,5 +1,5 @@
 from core_api import ChatGPT
-from utils import PersonDetails, Neo4j, message_format, ApiObject
+from utils import PersonDetails, PersistenceQueue, message_format, ApiObject
 
 from ..api_base import ApiBase
 from .standard_prompt import movement_prompt
@@ -26,4 +26,4 @@ class _StandardMovement(ApiBase):
         llm_dict = message_format("assistant", "The movement has been performed")
         person_details.set_latest_llm_message(llm_dict)
         person_details.set_attribute("state", "speak")
-        Neo4j.add_message_to_person(person_details)
+        PersistenceQueue.enqueue(person_details)
@@ -1,5 +1,5 @@
 import subprocess
-from utils import PersonDetails, Neo4j, message_format, ApiObject
+from utils import PersonDetails, PersistenceQueue, message_format, ApiObject
 
 from core_api import ChatGPT, Llama, Grok
 from ..api_base import ApiBase
@@ -41,4 +41,4 @@ class _PepperAuto(ApiBase):
         llm_dict = message_format("assistant", "The execution is done")
         person_details.set_latest_llm_message(llm_dict)
         person_details.set_attribute("state", "speak")
-        Neo4j.add_message_to_person(person_details)
+        PersistenceQueue.enqueue(person_details)
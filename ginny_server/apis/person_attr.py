@@ -1,7 +1,7 @@
 from utils import ApiObject
 from .api_base import ApiBase
 
-from utils import PersonDetails, Neo4j, message_format
+from utils import PersonDetails, PersistenceQueue, message_format
 from core_api import PersonDetectionCropper, ChatGPT, Grok, RelationshipChecker, AttributeFinder
 
 class _PersonAttribute(ApiBase):
@@ -32,7 +32,7 @@ class _PersonAttribute(ApiBase):
             llm_dict = message_format("assistant", llm_response)
             person_details.set_latest_llm_message(llm_dict)
             person_details.set_attribute("state", "speak")
-            Neo4j.add_message_to_person(person_details)
+            PersistenceQueue.enqueue(person_details)
             RelationshipChecker.adding_text2relationship_checker(person_details)
 
         except Exception as e:
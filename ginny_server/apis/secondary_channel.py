@@ -1,4 +1,4 @@
-from utils import PersonDetails, Neo4j, message_format, ApiObject
+from utils import PersonDetails, PersistenceQueue, message_format, ApiObject
 from core_api import ChatGPT
 
 from .api_base import ApiBase
@@ -53,4 +53,4 @@ class _SecondaryChannel(ApiBase):
         yield ApiObject(llm_response, mode='secondary') 
 
         person_details.set_attribute("state", "speak")
-        Neo4j.add_message_to_person(person_details)
+        PersistenceQueue.enqueue(person_details)
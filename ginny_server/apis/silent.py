@@ -1,7 +1,7 @@
 import random
 
 from core_api import RelationshipChecker
-from utils import Neo4j, ApiObject, message_format
+from utils import PersistenceQueue, ApiObject, message_format
 
 from .api_base import ApiBase
 
@@ -41,5 +41,5 @@ class _Silent(ApiBase):
         person_details.set_latest_llm_message(llm_dict)
         person_details.set_relevant_messages(messages + [llm_dict])
 
-        Neo4j.add_message_to_person(person_details)
+        PersistenceQueue.enqueue(person_details)
         RelationshipChecker.adding_text2relationship_checker(person_details)
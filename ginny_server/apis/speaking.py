@@ -1,7 +1,7 @@
 from typing import Any
 
-from core_api import ChatGPT, Grok, RelationshipChecker, AttributeFinder
-from utils import PersonDetails, Neo4j, message_format, ApiObject
+from core_api import LLMGateway, RelationshipChecker, AttributeFinder
+from utils import PersonDetails, Neo4j, PersistenceQueue, message_format, ApiObject
 from .api_base import ApiBase
 
 class _Speaking(ApiBase):
@@ -61,12 +61,17 @@ class _Speaking(ApiBase):
     def __call__(self, person_details: PersonDetails) -> Any:
         face_id = person_details.get_attribute("face_id")
         latest_msg = person_details.get_latest_user_message()
-        messages = Neo4j.get_person_messages(latest_msg, face_id)
+        # The turn pipeline fetches this while the router runs
+        context = person_details.get_prefetched(
+            "context",
+            lambda: Neo4j.get_turn_context(latest_msg, face_id)
+        )
+        messages = context["messages"]
 
         # Developing system prompt 
         person_attributes = person_details.get_attribute("attributes")
         person_name = person_details.get_attribute("name")
-        person_relationships = Neo4j.describe_relationships_by_face_id(face_id)
+        person_relationships = context["relationships"]
         system_dict = self._developing_system_prompt(
             person_name, 
             person_attributes, 
@@ -75,24 +80,17 @@ class _Speaking(ApiBase):
 
         total_prompt = system_dict + messages 
         
-        # response = Llama.send_to_model(total_prompt, stream=True)
-        try:
-            response = Grok.send_text(total_prompt, stream=True, grok_model="grok-2-1212")
-        except Exception as e:
-            print("grok failed ", e)
-            response = ChatGPT.send_text(total_prompt, stream=True, model='gpt-4-turbo') 
-        # response = Claude.process_text(messages, system_dict, stream=True)
+        # Grok first, ChatGPT is raced against it when the first token is late
+        response = LLMGateway.stream(total_prompt, route="speaking")
 
         llm_response = ""
-        for chunk in response:
-            if chunk.choices[0].delta.content is not None:
-                content = chunk.choices[0].delta.content
-                llm_response += content
-                yield ApiObject(content)
+        for content in response:
+            llm_response += content
+            yield ApiObject(content)
         
         llm_dict = message_format("assistant", llm_response)
         person_details.set_latest_llm_message(llm_dict)
         person_details.set_relevant_messages(messages + [llm_dict])
 
-        Neo4j.add_message_to_person(person_details)
+        PersistenceQueue.enqueue(person_details)
         RelationshipChecker.adding_text2relationship_checker(person_details)
@@ -5,6 +5,9 @@ from .claude import _ClaudeImageProcessor
 from .yolo import _PersonDetectorCropper, _YOLODetector
 from .chatgpt import _OpenAIHandler
 from .grok import _GrokHandler
+from .llm_gateway import _LLMGateway
+from .embedding_service import _EmbeddingService
+from .knowledge_extractor import _KnowledgeExtractor
 from .relationship_checker import _RelationshipChecker
 from .attribute_finder import _AttributeFinder
 from .clip_classification import _ClipClassification
@@ -18,6 +21,9 @@ YOLODetector = _YOLODetector()
 Claude = _ClaudeImageProcessor()
 ChatGPT = _OpenAIHandler()
 Grok = _GrokHandler()
+LLMGateway = _LLMGateway()
+EmbeddingService = _EmbeddingService()
+KnowledgeExtractor = _KnowledgeExtractor()
 RelationshipChecker = _RelationshipChecker()
 AttributeFinder = _AttributeFinder()
 ClipClassification = _ClipClassification()
@@ -30,6 +36,9 @@ __all__ = ["FaceRecognition",
            "Claude", 
            "ChatGPT", 
            "Grok",
+           "LLMGateway",
+           "EmbeddingService",
+           "KnowledgeExtractor",
            "RelationshipChecker",
            "AttributeFinder",
            "ClipClassification"
@@ -1,52 +1,11 @@
-import json
-from logging import exception
-from threading import Thread
-from queue import Queue
-
-from utils import PersonDetails, Neo4j, message_format, person_details
-from .prompt import get_attr_prompt, check_friend_name_prompt
+from utils import PersonDetails, Neo4j
+from utils.neo4j_db.relationships import move_query
 
 class _AttributeFinder():
-    def __init__(self) -> None:
-        self.possible_attr_queue: Queue[PersonDetails] = Queue()
-        
-        attribute_thread = Thread(
-            target=self.attr_checker_parallel,
-            daemon=True
-        )
-
-        attribute_thread.start()
-
-    def adding_text2attr_finder(self, person_details: PersonDetails):
-        self.possible_attr_queue.put(person_details)
-
-    def check_friend_name(self, messages):
-        check_friend_prompt = check_friend_name_prompt()
-        check_friend_system_message = message_format("system", check_friend_prompt)
-        total_messages = [check_friend_system_message] + messages
-        from core_api import ChatGPT
-
-        try:
-            response = ChatGPT.send_text_get_json(total_messages, stream=False)
-        except Exception as e:
-            print("Chatgpt failed at friend attributes part")
-            raise e
-
-        friend_name_content = response.choices[0].message.content
-        friend_name_dict = json.loads(friend_name_content)
-        return friend_name_dict
-
-    def third_person_update(self, person_details: PersonDetails, output_attribute):
+    def third_person_update(self, person_details: PersonDetails, friend_name, output_attribute):
         from core_api import RelationshipChecker
 
-        all_relevant_messages = person_details.get_relevant_messages()
-        try:
-            friend_name_dict = self.check_friend_name(all_relevant_messages)
-        except Exception as e:
-            raise e
-
-        friend_name = friend_name_dict.get("name")
-        if not bool(friend_name):
+        if not bool(friend_name) or not bool(output_attribute):
             return
 
         closest_name = RelationshipChecker.compare_name2db_names(friend_name)
@@ -92,6 +51,42 @@ class _AttributeFinder():
         else:
             return False
 
+    @staticmethod
+    def _move_relationships(tx, face_id, p2_eid):
+        """ 
+            Reattaches every relationship of p2 to p1 and deletes p2, in one 
+            transaction. Relationship types cannot be parameters, so there is 
+            one UNWIND per type and direction instead of one write per relationship,
+            their query texts are built once per type
+        """
+        rels = tx.run(
+            """
+            MATCH (p2)-[r]-(n)
+            WHERE elementId(p2) = $p2_eid
+            RETURN elementId(n) AS nid, type(r) AS rtype, properties(r) AS props,
+                   startNode(r) = p2 AS outgoing
+            """,
+            p2_eid=p2_eid
+        ).data()
+
+        grouped = {}
+        for rel in rels:
+            key = (rel["rtype"], rel["outgoing"])
+            grouped.setdefault(key, []).append({"nid": rel["nid"], "props": rel["props"]})
+
+        for (rtype, outgoing), rows in grouped.items():
+            Neo4j.unwind(tx, move_query(rtype, outgoing), rows, face_id=face_id)
+
+        tx.run(
+            """
+            MATCH (p2)
+            WHERE elementId(p2) = $p2_eid
+            DETACH DELETE p2
+            """,
+            p2_eid=p2_eid
+        ).consume()
+        return len(rels)
+
     def merging_nodes(self,
                       p1_person_details: PersonDetails,
                       p2_person_name: str) -> None:
@@ -121,75 +116,11 @@ class _AttributeFinder():
         # 2. merge + dedupe attributes
         merged_attrs = list(dict.fromkeys(attrs1 + attrs2))
 
-        # 3. update p1’s attributes & name
-        # Neo4j.write_query(
-        #     """
-        #     MATCH (p1:Person {face_id:$face_id})
-        #     SET p1.attributes = $merged_attrs,
-        #         p1.name       = $new_name
-        #     """,
-        #     face_id=face_id,
-        #     merged_attrs=merged_attrs,
-        #     new_name=p2_person_name
-        # )
-        #
-        # 4a. reattach incoming rels from p2 to p1
-        incoming = Neo4j.read_query(
-            """
-            MATCH (p2)<-[r]-(n)
-            WHERE elementId(p2) = $p2_eid
-            RETURN elementId(n) AS nid, type(r) AS rtype, properties(r) AS props
-            """,
-            p2_eid=p2_eid
-        )
-        for rel in incoming:
-            nid, rtype, props = rel["nid"], rel["rtype"], rel["props"]
-            Neo4j.write_query(
-                """
-                MATCH (p1:Person {face_id:$face_id}), (n)
-                WHERE elementId(n) = $nid
-                CREATE (n)-[newR:`%s`]->(p1)
-                SET newR = $props
-                """ % rtype,
-                face_id=face_id,
-                nid=nid,
-                props=props
-            )
+        # 3. move p2's relationships over to p1 and delete p2
+        moved = Neo4j.write_transaction(self._move_relationships, face_id, p2_eid)
 
-        # 4b. reattach outgoing rels from p2 to p1
-        outgoing = Neo4j.read_query(
-            """
-            MATCH (p2)-[r]->(n)
-            WHERE elementId(p2) = $p2_eid
-            RETURN elementId(n) AS nid, type(r) AS rtype, properties(r) AS props
-            """,
-            p2_eid=p2_eid
-        )
-        for rel in outgoing:
-            nid, rtype, props = rel["nid"], rel["rtype"], rel["props"]
-            Neo4j.write_query(
-                """
-                MATCH (p1:Person {face_id:$face_id}), (n)
-                WHERE elementId(n) = $nid
-                CREATE (p1)-[newR:`%s`]->(n)
-                SET newR = $props
-                """ % rtype,
-                face_id=face_id,
-                nid=nid,
-                props=props
-            )
-
-        # 5. delete p2 by elementId
-        Neo4j.write_query(
-            """
-            MATCH (p2)
-            WHERE elementId(p2) = $p2_eid
-            DETACH DELETE p2
-            """,
-            p2_eid=p2_eid
-        )
-
-        print(f"The face id {face_id} name is {p2_person_name} attributes {merged_attrs}")
+        print(f"The face id {face_id} name is {p2_person_name} attributes {merged_attrs}, "
+              f"moved {moved} relationships")
         Neo4j.update_name_or_attribute(
             face_id=face_id,
             name=p2_person_name,
@@ -197,54 +128,51 @@ class _AttributeFinder():
         )
 
     def attr_checker(self, person_details: PersonDetails):
+        from core_api import KnowledgeExtractor
+
+        extraction = KnowledgeExtractor(person_details)
+        if extraction is not None:
+            self.apply_extraction(person_details, extraction)
+
+    def apply_extraction(self, person_details: PersonDetails, extraction: dict):
+        """
+            Writes the name and attributes of a KnowledgeExtractor output, the
+            relationships are written by the RelationshipChecker
+        """
         from core_api import RelationshipChecker
-        from core_api import ChatGPT
-        text_message = person_details.get_latest_user_message()
 
         person_attributes = person_details.get_attribute("attributes")
         if person_attributes == None:
             person_attributes = []
 
-
-        system_text = get_attr_prompt(person_attributes)
-        system_message = message_format("system", system_text)
-        total_messages = [system_message, text_message]
-
-        try:
-            response = ChatGPT.send_text_get_json(total_messages, stream=False)
-        except Exception as e:
-            print("Chatgpt failed to get attributes")
-            raise e
-
-        output = response.choices[0].message.content
-        output_json = json.loads(output)
-
-        output_attribute = output_json.get("attribute")
-        input_name = output_json.get("name")
-        check_friend = output_json.get("check_friend")
+        output_attribute = extraction["attribute"]
+        input_name = extraction["name"]
+        check_friend = extraction["check_friend"]
 
         attribute_bool = bool(output_attribute)
         name_bool = bool(input_name)
         face_id = person_details.get_attribute("face_id")
 
         # Adding the attribute to the existing attributes list
-        person_attributes.append(output_attribute)
+        if attribute_bool:
+            person_attributes.append(output_attribute)
 
         print("These are the attributes going in ", person_attributes, attribute_bool, name_bool)
 
-        # For checking if the attributes are being described for a third person 
-        # who is friend, th expectation is of using pronounds like She or He
+        # Attributes described for a third person, who the pronouns refer 
+        # to is already resolved by the extraction
         if check_friend:
-            try:
-                self.third_person_update(person_details, output_attribute)
-            except Exception as e:
-                raise e
+            self.third_person_update(
+                person_details,
+                extraction["third_person_name"],
+                extraction["third_person_attribute"]
+            )
 
         if attribute_bool or name_bool:
             # If the person has been talked aboout before by someone else 
             # then use this
             try:
-                have_I_heard_about_you = self.have_I_heard_about_you(input_name)
+                have_I_heard_about_you = name_bool and self.have_I_heard_about_you(input_name)
             except ValueError:
                 have_I_heard_about_you = False
             except Exception as e:
@@ -254,17 +182,8 @@ class _AttributeFinder():
             if name_bool and have_I_heard_about_you:
                 closest_name = RelationshipChecker.compare_name2db_names(input_name)
                 self.merging_nodes(person_details, closest_name)
-            if not check_friend and not have_I_heard_about_you:
+            if not have_I_heard_about_you:
                 Neo4j.update_name_or_attribute(face_id=face_id, 
                                             name=input_name, 
                                             attributes=person_attributes
                                         )
-
-    def attr_checker_parallel(self):
-        while True:
-            person_details = self.possible_attr_queue.get()
-            try:
-                self.attr_checker(person_details)
-            except Exception as e:
-                print(e)
-                continue
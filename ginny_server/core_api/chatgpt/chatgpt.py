@@ -6,6 +6,7 @@ import numpy as np
 from openai.types import model
 
 from utils import Neo4j
+from ..llm_gateway import pooled_http_client, SDK_DEFAULT_TIMEOUT
 
 class _OpenAIHandler:
     def __init__(self, model_name="gpt-4"):
@@ -14,7 +15,7 @@ class _OpenAIHandler:
 
         :param model_name: The model name to use, e.g., "gpt-4"
         """
-        self.client = openai.OpenAI()
+        self.client = openai.OpenAI(http_client=pooled_http_client(), timeout=SDK_DEFAULT_TIMEOUT)
 
     def _encode_image(self, image):
         """
@@ -35,12 +36,9 @@ class _OpenAIHandler:
         return encoded_image
 
     def get_openai_embedding(self, text):
-        """Generates OpenAI embedding for a given text."""
-        response = self.client.embeddings.create(
-            input=text,
-            model="text-embedding-3-small"
-        )
-        return response.data[0].embedding
+        """Generates OpenAI embedding for a given text, through the cached and batched EmbeddingService."""
+        from core_api import EmbeddingService
+        return EmbeddingService.embed(text)
 
 
     def process_image_and_text(self, image, person_details, max_tokens=1000, system_prompt=None, model_name='gpt-4o'):
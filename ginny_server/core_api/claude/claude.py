@@ -6,6 +6,8 @@ import numpy as np
 import cv2
 from PIL import Image
 
+from ..llm_gateway import pooled_http_client, SDK_DEFAULT_TIMEOUT
+
 
 class _ClaudeImageProcessor:
     def __init__(self, model_name="claude-3-sonnet-20240229"):
@@ -15,7 +17,9 @@ class _ClaudeImageProcessor:
         :param model_name: Claude model to use (default is Sonnet)
         """
         self.client = anthropic.Anthropic(
-            api_key=os.environ.get("ANTHROPIC_API_KEY")
+            api_key=os.environ.get("ANTHROPIC_API_KEY"),
+            http_client=pooled_http_client(),
+            timeout=SDK_DEFAULT_TIMEOUT
         )
         self.model_name = model_name
     
@@ -1,9 +1,10 @@
 from PIL import Image
-from queue import Queue
 from threading import Thread
 from collections import Counter, deque
 from transformers import pipeline, Pipeline
 
+from utils import Frames
+
 class _ClipClassification():
     """
     Clip classification from huggingface
@@ -12,7 +13,7 @@ class _ClipClassification():
     def __init__(self, checkpoint="openai/clip-vit-large-patch14") -> None:
         pass
         # self.detector: Pipeline = pipeline(model=checkpoint, task="zero-shot-image-classification")
-        self.img_queue = Queue(maxsize=15)
+        self.frame_reader = Frames.reader("clip", max_lag=15)
         # self.face_class_queue = deque(maxlen=15)
         #
         # face_class_thread = Thread(
@@ -21,9 +22,6 @@ class _ClipClassification():
         # )
         # face_class_thread.start()
 
-    def add2clip_img_queue(self, image):
-        self.img_queue.put(image)
-
     def _convert_cv2pil(self, recent_images):
         pil_imgs = []
         for cv_img in recent_images:
@@ -52,7 +50,7 @@ class _ClipClassification():
     def _face_class_on_queue(self):
         candidate_labels = ["front_face", "slight_side_face", "side_face", "no_face"]
         while True:
-            img = self.img_queue.get()
+            img = self.frame_reader.get()
             pil_img = Image.fromarray(img)
             try:
                 predictions = self.detector(pil_img, candidate_labels=candidate_labels)
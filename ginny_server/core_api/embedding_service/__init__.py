@@ -0,0 +1,2 @@
+from .embedding_service import _EmbeddingService
+from .embedding_cache import EmbeddingCache, text_key
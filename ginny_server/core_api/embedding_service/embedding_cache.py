@@ -0,0 +1,93 @@
+import sqlite3
+import hashlib
+from pathlib import Path
+from threading import Lock
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+def text_key(model: str, text: str) -> str:
+    """Content address of one text, the model is part of it so vectors never mix."""
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache keyed by the hash of (model, text).
+
+    Vectors live in a single sqlite table as float32 blobs, a small in-memory
+    LRU sits in front of it for the texts that come back every turn.
+    """
+
+    def __init__(self, db_path: Path, memory_entries: int = 4096):
+        """
+        Args:
+            db_path (Path): sqlite file, created with its directory if missing.
+            memory_entries (int): Vectors kept in the in-memory LRU.
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.memory_entries = memory_entries
+
+        self._lock = Lock()
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, dim INTEGER NOT NULL, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, key: str, vector: List[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock:
+            missing = []
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                else:
+                    missing.append(key)
+
+            for start in range(0, len(missing), 500):
+                chunk = missing[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32).tolist()
+                    found[key] = vector
+                    self._remember(key, vector)
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key: str) -> Optional[List[float]]:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, model: str, vectors: Dict[str, List[float]]):
+        rows = [(key, model, len(vector), np.asarray(vector, dtype=np.float32).tobytes())
+                for key, vector in vectors.items()]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, dim, vector) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+            for key, vector in vectors.items():
+                self._remember(key, vector)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
@@ -0,0 +1,197 @@
+import os
+import time
+import traceback
+from concurrent.futures import Future
+from queue import Queue, Empty
+from threading import Thread
+from typing import Dict, List, Optional, Set, Union
+
+import httpx
+import openai
+
+from ..llm_gateway import pooled_http_client
+from .embedding_cache import EmbeddingCache, text_key
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+# Sizes of the OpenAI embedding models, used to check the local fallback
+MODEL_DIMS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+class _EmbeddingService:
+    """
+    Single entry point for text embeddings.
+
+    - Every text is looked up in a persistent cache keyed by the hash of the
+      model and the text first, so "Hello" or a repeated phrase is embedded once.
+    - Misses from concurrent callers are collected for up to `max_wait_ms`
+      (or `max_batch` texts), de-duplicated and sent as one API call.
+    - A batch the API rejects as a bad request is retried text by text, so
+      one bad text (an empty string) only fails its own caller.
+    - If the API is down and a local sentence-transformers model of the same
+      vector size is configured, texts requested with `allow_local=True` are
+      embedded locally. A local vector is not in the OpenAI embedding space,
+      it can only rank a search, it is never cached and must never be
+      stored, so embeddings that are persisted do not pass `allow_local`.
+    """
+
+    def __init__(self,
+                 model: str = "text-embedding-3-small",
+                 cache_path: Optional[str] = None,
+                 max_batch: int = 64,
+                 max_wait_ms: float = 10,
+                 local_model: Optional[str] = None):
+        """
+        Args:
+            model (str): OpenAI embedding model.
+            cache_path (Optional[str]): sqlite cache, env EMBEDDING_CACHE or
+                /workspace/database/embeddings/cache.sqlite by default.
+            max_batch (int): Texts sent in one API call at most.
+            max_wait_ms (float): How long a miss waits for others to batch with.
+            local_model (Optional[str]): sentence-transformers model used for
+                query embeddings when the API fails, env LOCAL_EMBEDDING_MODEL
+                by default, none if unset.
+        """
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.client = openai.OpenAI(http_client=pooled_http_client(),
+                                    timeout=httpx.Timeout(30.0, connect=5.0))
+        self.cache = EmbeddingCache(
+            cache_path or os.getenv("EMBEDDING_CACHE", "/workspace/database/embeddings/cache.sqlite")
+        )
+
+        self.local = None
+        self._load_local(local_model or os.getenv("LOCAL_EMBEDDING_MODEL"))
+
+        self.api_calls = 0
+        self.api_texts = 0
+        self.local_texts = 0
+        self._requests = Queue()
+        Thread(target=self._dispatch, name="embedding-batcher", daemon=True).start()
+
+    def _load_local(self, local_model: Optional[str]):
+        if not local_model:
+            return
+        if SentenceTransformer is None:
+            print("sentence_transformers is not installed, no local embedding fallback")
+            return
+        model = SentenceTransformer(local_model, device="cpu")
+        dim = model.get_sentence_embedding_dimension()
+        expected = MODEL_DIMS.get(self.model)
+        if expected is not None and dim != expected:
+            # The vector index would reject query vectors of another size
+            print(f"Local embedding model {local_model} has {dim} dims, {self.model} has "
+                  f"{expected}, not using it as a fallback")
+            return
+        self.local = model
+        print(f"Using {local_model} as the local fallback for query embeddings")
+
+    ############################################################################
+    #                              Batching                                    #
+    ############################################################################
+    def _dispatch(self):
+        while True:
+            pending = [self._requests.get()]
+            deadline = time.time() + self.max_wait
+            while len(pending) < self.max_batch:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    pending.append(self._requests.get(timeout=remaining))
+                except Empty:
+                    break
+
+            # A text may go local only when every caller waiting on it allows it
+            local_ok: Dict[str, bool] = {}
+            for text, allow_local, _ in pending:
+                local_ok[text] = local_ok.get(text, True) and allow_local
+            try:
+                results = self._embed_uncached(list(local_ok),
+                                               {text for text, ok in local_ok.items() if ok})
+            except Exception as e:
+                traceback.print_exc()
+                results = {text: e for text in local_ok}
+            for text, _, future in pending:
+                result = results[text]
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def _embed_uncached(self, texts: List[str], local_ok: Set[str]) -> Dict[str, Union[List[float], Exception]]:
+        """ Vector per text, or the exception that text failed with """
+        try:
+            return self._embed_api(texts)
+        except openai.BadRequestError as e:
+            if len(texts) == 1:
+                print(f"Embedding API rejected {texts[0]!r}: {e}")
+                return {texts[0]: e}
+            print(f"Embedding API rejected a batch of {len(texts)}, retrying text by text")
+            results = {}
+            for text in texts:
+                results.update(self._embed_uncached([text], local_ok))
+            return results
+        except Exception as e:
+            results = {text: e for text in texts}
+            fallback = [text for text in texts if text in local_ok]
+            if self.local is None or not fallback:
+                traceback.print_exc()
+                return results
+            print(f"Embedding API failed, embedding {len(fallback)} query texts locally: {e}")
+            self.local_texts += len(fallback)
+            local_vectors = self.local.encode(fallback, normalize_embeddings=True)
+            results.update({text: vector.tolist() for text, vector in zip(fallback, local_vectors)})
+            return results
+
+    def _embed_api(self, texts: List[str]) -> Dict[str, List[float]]:
+        response = self.client.embeddings.create(input=texts, model=self.model)
+        self.api_calls += 1
+        self.api_texts += len(texts)
+        vectors = {texts[item.index]: item.embedding for item in response.data}
+        self.cache.put_many(self.model, {text_key(self.model, text): vector
+                                         for text, vector in vectors.items()})
+        return vectors
+
+    ############################################################################
+    #                              Public                                      #
+    ############################################################################
+    def embed_many(self, texts: List[str], allow_local: bool = False) -> List[List[float]]:
+        """
+        Embed texts, served from the cache where possible, in the order given.
+
+        Args:
+            allow_local (bool): Accept vectors of the local fallback model when
+                the API is down. Only for query embeddings, never for stored ones.
+        """
+        keys = [text_key(self.model, text) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        futures = {}
+        for text, key in zip(texts, keys):
+            if key not in cached and text not in futures:
+                future = Future()
+                futures[text] = future
+                self._requests.put((text, allow_local, future))
+
+        return [cached[key] if key in cached else futures[text].result()
+                for text, key in zip(texts, keys)]
+
+    def embed(self, text: str, allow_local: bool = False) -> List[float]:
+        return self.embed_many([text], allow_local)[0]
+
+    def stats(self) -> dict:
+        return {
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+            "api_calls": self.api_calls,
+            "api_texts": self.api_texts,
+            "local_texts": self.local_texts,
+        }
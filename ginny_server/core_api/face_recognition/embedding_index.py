@@ -0,0 +1,255 @@
+import numpy as np
+from threading import Lock
+from typing import List, Optional, Tuple
+
+class EmbeddingIndex:
+    """
+    In-memory cosine similarity index over face embeddings.
+
+    - Rows are L2 normalised float32 stored in a preallocated buffer that doubles
+      when full, enrolling a face is an amortised O(1) copy.
+    - A read-only base matrix (the memory mapped face store) can be attached
+      without copying, new rows go to the buffer behind it.
+    - An exact search is a matrix-vector product over the base and the buffer.
+    - Once the index holds `approximate_after` rows an IVF layer (spherical
+      k-means coarse quantiser) is trained and searches only score the rows of
+      the `n_probe` closest clusters.
+    """
+
+    def __init__(self,
+                 dim: Optional[int] = None,
+                 initial_capacity: int = 1024,
+                 approximate_after: int = 20000,
+                 n_probe: int = 8,
+                 kmeans_iters: int = 10):
+        """
+        Args:
+            dim (Optional[int]): Embedding size, inferred from the first row if None.
+            initial_capacity (int): Rows preallocated before the first growth.
+            approximate_after (int): Row count at which the IVF layer kicks in,
+                0 disables approximate search.
+            n_probe (int): Number of clusters scored per approximate search.
+            kmeans_iters (int): Iterations used when training the clusters.
+        """
+        self.dim = dim
+        self.initial_capacity = initial_capacity
+        self.approximate_after = approximate_after
+        self.n_probe = n_probe
+        self.kmeans_iters = kmeans_iters
+
+        self._lock = Lock()
+        self._ids: List[str] = []
+        self._count = 0
+        self._base = None
+        self._base_count = 0
+        self._buffer = None if dim is None else np.empty((initial_capacity, dim), dtype=np.float32)
+
+        # IVF state, only populated once approximate search is enabled
+        self._centroids = None
+        self._lists: List[np.ndarray] = []
+        self._list_sizes = None
+        self._trained_on = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def ids(self) -> List[str]:
+        return self._ids
+
+    @property
+    def is_approximate(self) -> bool:
+        return self._centroids is not None
+
+    def attach_base(self, face_ids: List[str], matrix: np.ndarray):
+        """
+        Use an already normalised matrix as the first rows of the index without
+        copying it, e.g. a read-only memory map shared across processes.
+
+        Args:
+            face_ids (List[str]): One ID per row of `matrix`.
+            matrix (np.ndarray): Array of shape (n, dim) with unit norm rows.
+        """
+        if len(face_ids) != matrix.shape[0]:
+            raise ValueError("Got {} ids for {} embeddings".format(len(face_ids), matrix.shape[0]))
+        with self._lock:
+            if self._count:
+                raise ValueError("A base can only be attached to an empty index")
+            if len(face_ids) == 0:
+                return
+            if self.dim is None:
+                self.dim = matrix.shape[1]
+            self._base = matrix
+            self._base_count = matrix.shape[0]
+            self._count = self._base_count
+            self._ids.extend(face_ids)
+            self._maybe_train()
+
+    def _tail_count(self) -> int:
+        return self._count - self._base_count
+
+    def _all_scores(self, query: np.ndarray) -> np.ndarray:
+        tail = self._buffer[:self._tail_count()] @ query if self._buffer is not None \
+            else np.empty(0, dtype=np.float32)
+        if self._base is None:
+            return tail
+        return np.concatenate([self._base @ query, tail])
+
+    def _gather(self, rows: np.ndarray) -> np.ndarray:
+        """Fetch rows by their global position across the base and the buffer."""
+        if self._base is None:
+            return self._buffer[rows]
+        in_base = rows < self._base_count
+        out = np.empty((rows.shape[0], self.dim), dtype=np.float32)
+        out[in_base] = self._base[rows[in_base]]
+        if not in_base.all():
+            out[~in_base] = self._buffer[rows[~in_base] - self._base_count]
+        return out
+
+    @staticmethod
+    def _normalize(embeddings: np.ndarray) -> np.ndarray:
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.ndim == 1:
+            embeddings = embeddings.reshape(1, -1)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+
+    def _reserve(self, extra: int):
+        if self._buffer is None:
+            capacity = max(self.initial_capacity, extra)
+            self._buffer = np.empty((capacity, self.dim), dtype=np.float32)
+            return
+
+        needed = self._tail_count() + extra
+        capacity = self._buffer.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        grown = np.empty((capacity, self.dim), dtype=np.float32)
+        grown[:self._tail_count()] = self._buffer[:self._tail_count()]
+        self._buffer = grown
+
+    def add(self, face_id: str, embedding: np.ndarray):
+        """Add a single face to the index."""
+        self.add_many([face_id], embedding)
+
+    def add_many(self, face_ids: List[str], embeddings: np.ndarray):
+        """
+        Add several faces at once.
+
+        Args:
+            face_ids (List[str]): One ID per row of `embeddings`.
+            embeddings (np.ndarray): Array of shape (n, dim) or (dim,) for one face.
+        """
+        if len(face_ids) == 0:
+            return
+        rows = self._normalize(embeddings)
+        if rows.shape[0] != len(face_ids):
+            raise ValueError("Got {} ids for {} embeddings".format(len(face_ids), rows.shape[0]))
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = rows.shape[1]
+            elif rows.shape[1] != self.dim:
+                raise ValueError("Embedding size {} does not match index size {}".format(
+                    rows.shape[1], self.dim))
+
+            self._reserve(rows.shape[0])
+            start = self._count
+            tail_start = self._tail_count()
+            self._buffer[tail_start:tail_start + rows.shape[0]] = rows
+            self._count += rows.shape[0]
+            self._ids.extend(face_ids)
+
+            if self._centroids is not None:
+                self._assign_to_lists(np.arange(start, self._count), rows)
+            self._maybe_train()
+
+    def search(self, embedding: np.ndarray, k: int = 1) -> List[Tuple[str, float]]:
+        """
+        Find the k most similar faces.
+
+        Args:
+            embedding (np.ndarray): Query embedding of shape (dim,) or (1, dim).
+            k (int): Number of results.
+
+        Returns:
+            List[Tuple[str, float]]: (face_id, cosine similarity) pairs, best first.
+        """
+        if self._count == 0:
+            return []
+        query = self._normalize(embedding)[0]
+
+        with self._lock:
+            if self._centroids is None:
+                candidates = None
+                scores = self._all_scores(query)
+            else:
+                candidates = self._probe(query)
+                scores = self._gather(candidates) @ query
+            ids = self._ids
+
+        k = min(k, scores.shape[0])
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        rows = top if candidates is None else candidates[top]
+        return [(ids[row], float(scores[i])) for row, i in zip(rows, top)]
+
+    ############################################################################
+    #                       Approximate (IVF) search                           #
+    ############################################################################
+    def _maybe_train(self):
+        if not self.approximate_after or self._count < self.approximate_after:
+            return
+        # Retrain when the index has doubled since the clusters were built
+        if self._centroids is not None and self._count < 2 * self._trained_on:
+            return
+        self._train_ivf()
+
+    def _train_ivf(self):
+        n_lists = max(int(np.sqrt(self._count)), 1)
+        rng = np.random.default_rng(0)
+
+        sample_size = min(self._count, n_lists * 64)
+        sample = self._gather(np.sort(rng.choice(self._count, size=sample_size, replace=False)))
+        centroids = sample[rng.choice(sample_size, size=n_lists, replace=False)].copy()
+
+        for _ in range(self.kmeans_iters):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            empty = np.bincount(assignment, minlength=n_lists) == 0
+            sums[empty] = centroids[empty]
+            centroids = self._normalize(sums)
+
+        self._centroids = centroids
+        self._lists = [np.empty(0, dtype=np.int64) for _ in range(n_lists)]
+        self._list_sizes = np.zeros(n_lists, dtype=np.int64)
+        self._trained_on = self._count
+
+        # Assign in chunks so a memory mapped base is never copied whole
+        for start in range(0, self._count, 65536):
+            rows = np.arange(start, min(start + 65536, self._count))
+            self._assign_to_lists(rows, self._gather(rows))
+
+    def _assign_to_lists(self, rows: np.ndarray, vectors: np.ndarray):
+        assignment = np.argmax(vectors @ self._centroids.T, axis=1)
+        for list_id in np.unique(assignment):
+            new_rows = rows[assignment == list_id]
+            size = self._list_sizes[list_id]
+            members = self._lists[list_id]
+            if size + new_rows.shape[0] > members.shape[0]:
+                grown = np.empty(max(2 * members.shape[0], size + new_rows.shape[0], 16), dtype=np.int64)
+                grown[:size] = members[:size]
+                members = grown
+                self._lists[list_id] = members
+            members[size:size + new_rows.shape[0]] = new_rows
+            self._list_sizes[list_id] = size + new_rows.shape[0]
+
+    def _probe(self, query: np.ndarray) -> np.ndarray:
+        n_probe = min(self.n_probe, self._centroids.shape[0])
+        closest = np.argpartition(-(self._centroids @ query), n_probe - 1)[:n_probe]
+        return np.concatenate([self._lists[i][:self._list_sizes[i]] for i in closest])
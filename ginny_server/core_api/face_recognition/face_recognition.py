@@ -1,17 +1,23 @@
 import cv2
-import glob
 import math
+import time
 import torch
 import logging
 import argparse
 import numpy as np
 from pathlib import Path
-from queue import Queue
+from queue import Empty
 from threading import Thread
 from collections import deque
 from typing import List, Tuple, Optional
 from insightface.app import FaceAnalysis
-from sklearn.metrics.pairwise import cosine_similarity
+from insightface.app.common import Face
+from insightface.utils import face_align
+
+from utils import Frames
+from .embedding_index import EmbeddingIndex
+from .face_store import FaceStore
+from .frame_gate import FrameGate
 
 class _FaceRecognition:
     """
@@ -28,7 +34,11 @@ class _FaceRecognition:
     def __init__(self, 
                  db_dir: str = "/workspace/database/face_db",
                  model_name: str = "buffalo_l",
-                 recognition_threshold: float = 0.55):
+                 recognition_threshold: float = 0.55,
+                 max_batch_size: int = 8,
+                 max_batch_latency_ms: float = 30.0,
+                 gate_diff_threshold: float = 3.0,
+                 gate_max_skips: int = 15):
         """
         Initialize the FaceRecognition class.
 
@@ -36,23 +46,39 @@ class _FaceRecognition:
             db_dir (str): Directory path for face database.
             model_name (str): InsightFace model name.
             recognition_threshold (float): Threshold for considering a face as known.
+            max_batch_size (int): Most frames the recognition thread embeds together.
+            max_batch_latency_ms (float): Longest a frame waits for its batch to fill.
+            gate_diff_threshold (float): Mean grey level change under which a frame
+                is treated as a repeat of the last recognized one, 0 disables skipping.
+            gate_max_skips (int): Repeated frames skipped in a row before one is
+                recognized again.
         """
         self.db_dir = Path(db_dir)
         self.recognition_threshold = recognition_threshold
         self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.max_batch_latency = max_batch_latency_ms / 1000
 
         # Ensure database directory exists
         self._ensure_db_directory()
 
         # Initialize face analysis model
         self.app = self._initialize_face_analysis()
+        self.rec_model = self.app.models["recognition"]
 
-        # Load database embeddings
-        self.known_ids, self.known_embeddings = self._load_database()
+        # Map the packed face store and index it without copying
+        self.store = FaceStore(self.db_dir)
+        self.index = EmbeddingIndex(dim=self.store.dim)
+        known_ids, known_embeddings = self._load_database()
+        self.index.attach_base(known_ids, known_embeddings)
         self.model_points = self._get_3d_model_points()
         self.dist_coeffs = np.zeros((4, 1), dtype=np.float32)
 
-        self.face_img_queue = Queue(maxsize=15)
+        self.frame_gate = FrameGate(gate_diff_threshold, gate_max_skips)
+        self._last_result = (None, None, None)
+
+        # Only the 15 newest frames are worth recognizing, older ones get dropped
+        self.frame_reader = Frames.reader("face", max_lag=15)
         self.face_id_queue = deque(maxlen=15)
         self.save_img_queue = deque(maxlen=15)
         self.face_embedding_queue = deque(maxlen=15)
@@ -64,8 +90,9 @@ class _FaceRecognition:
 
         face_recognition_thread.start()
 
-    def add2face_img_queue(self, image):
-        self.face_img_queue.put(image)
+    def face_queue_credits(self) -> int:
+        """Number of frames the recognizer can still take before it drops the oldest."""
+        return self.frame_reader.credits()
 
     def _ensure_db_directory(self):
         """Ensure that the database directory exists."""
@@ -159,25 +186,18 @@ class _FaceRecognition:
 
     def _load_database(self) -> Tuple[List[str], np.ndarray]:
         """
-        Load the known face embeddings and IDs from the database directory.
+        Map the known face embeddings and IDs from the packed face store, faces
+        still saved in the old one `.npy` per face layout are imported first.
 
         Returns:
-            Tuple[List[str], np.ndarray]: A list of face IDs and a numpy array of their embeddings.
+            Tuple[List[str], np.ndarray]: A list of face IDs and a memory mapped
+            array of their normalised embeddings.
         """
-        embedding_files = glob.glob(str(self.db_dir / "*.npy"))
-        known_ids = []
-        known_embeddings = []
-
-        for ef in embedding_files:
-            face_id = Path(ef).stem  # filename without extension
-            emb = np.load(ef)
-            known_ids.append(face_id)
-            known_embeddings.append(emb)
-
-        if known_embeddings:
-            known_embeddings = np.vstack(known_embeddings)
-        else:
-            known_embeddings = np.array([])
+        known_ids, known_embeddings = self.store.load()
+        imported = self.store.import_legacy_npy()
+        if imported:
+            logging.info(f"Imported {imported} faces from .npy files into the face store")
+            known_ids, known_embeddings = self.store.load()
 
         return known_ids, known_embeddings
 
@@ -185,44 +205,69 @@ class _FaceRecognition:
         x1, y1, x2, y2 = [int(i) for i in face.bbox]
         return abs((x2 - x1) * (y2 - y1))
 
-    def _get_embedding(self, img: np.ndarray) -> np.ndarray:
+    def _select_face(self, img: np.ndarray) -> Face:
         """
-        Given an image array, detect the face, and generate a face embedding.
-        if its a valid face embedding
+        Detect the faces in the image and return the first one that is large 
+        enough and not a side face.
 
         Args:
             img (np.ndarray): The image array.
 
         Returns:
-            np.ndarray: The face embedding vector of shape (1, embedding_dim).
+            Face: The detected face with its bbox and keypoints.
         """
-        faces = self.app.get(img)
-        if len(faces) == 0:
+        bboxes, kpss = self.app.det_model.detect(img, max_num=0, metric='default')
+        if bboxes.shape[0] == 0:
             raise ValueError("No face detected in the given image.")
 
         cam_matrix = self._get_camera_matrix(img.shape)
 
         reason = ""
-        for face in faces:
-            embedding = face.embedding
+        for bbox, kps in zip(bboxes, kpss):
+            face = Face(bbox=bbox[0:4], kps=kps, det_score=bbox[4])
             area = self._get_face_area(face)
-            is_side_face = self._is_side_face(face, cam_matrix)
-            
+
             # Check if Area is valid
             if area < 4500:
                 reason = "Area too small, {}".format(area)
                 continue
 
-            if is_side_face:
+            if self._is_side_face(face, cam_matrix):
                 reason = "Side face was detected"
                 continue
 
-            embedding = embedding.reshape(1, -1)  # shape: (1, embedding_dim)
-            return embedding
+            return face
 
         print("Face not recognised because ", reason)
         raise ValueError("The face detected were invalid")
 
+    def _embed_faces(self, imgs: List[np.ndarray], faces: List[Face]) -> np.ndarray:
+        """
+        Run ArcFace over the aligned crops of all the faces in a single session run.
+
+        Returns:
+            np.ndarray: Embeddings of shape (len(faces), embedding_dim).
+        """
+        crops = [
+            face_align.norm_crop(img, landmark=face.kps, image_size=self.rec_model.input_size[0])
+            for img, face in zip(imgs, faces)
+        ]
+        return self.rec_model.get_feat(crops)
+
+    def _get_embedding(self, img: np.ndarray) -> np.ndarray:
+        """
+        Given an image array, detect the face, and generate a face embedding.
+        if its a valid face embedding
+
+        Args:
+            img (np.ndarray): The image array.
+
+        Returns:
+            np.ndarray: The face embedding vector of shape (1, embedding_dim).
+        """
+        face = self._select_face(img)
+        return self._embed_faces([img], [face])
+
     def _match_face(self, embedding: np.ndarray) -> Optional[str]:
         """
         Match the given embedding against known embeddings.
@@ -233,19 +278,16 @@ class _FaceRecognition:
         Returns:
             Optional[str]: The matched face ID if found, otherwise None.
         """
-        if self.known_embeddings.size == 0:
+        matches = self.index.search(embedding, k=1)
+        if not matches:
             return None
-
-        # Compute cosine similarity
-        sim = cosine_similarity(embedding, self.known_embeddings)
-        best_match_idx = np.argmax(sim)
-        best_score = sim[0, best_match_idx]
+        best_id, best_score = matches[0]
 
         # Threshold check (closer to 1 is more similar)
         # We interpret "recognition_threshold" as the maximum distance from 1 
         # allowed. i.e. if best_score >= (1 - threshold) => recognized
         if best_score >= (1 - self.recognition_threshold):
-            return self.known_ids[best_match_idx]
+            return best_id
         else:
             return None
 
@@ -259,15 +301,11 @@ class _FaceRecognition:
         # Generate a new unique ID
         new_id = self._generate_new_face_id()
 
-        # Save embedding to disk
-        np.save(self.db_dir / f"{new_id}.npy", embedding)
+        # Append the embedding to the face store
+        self.store.append(new_id, embedding)
 
         # Update known faces in memory
-        self.known_ids.append(new_id)
-        if self.known_embeddings.size == 0:
-            self.known_embeddings = embedding
-        else:
-            self.known_embeddings = np.vstack([self.known_embeddings, embedding])
+        self.index.add(new_id, embedding)
         
         # Optionally save the face image
         if save_img:
@@ -284,7 +322,7 @@ class _FaceRecognition:
             str: A new face ID, for example 'face_1', 'face_2', etc.
         """
         current_ids = [int(x.replace("face_", "")) 
-                       for x in self.known_ids if x.startswith("face_")]
+                       for x in self.index.ids if x.startswith("face_")]
         next_id_num = (max(current_ids) + 1) if current_ids else 1
         return f"face_{next_id_num}"
 
@@ -312,21 +350,74 @@ class _FaceRecognition:
         """
         return self._save_new_face(embedding, img, save_img=True)
 
-    def _face_recognition_on_queue(self):
-        while True:
-            img = self.face_img_queue.get()
+    def _collect_batch(self) -> List[np.ndarray]:
+        """
+        Block for the first frame, then keep collecting until the batch is full
+        or the first frame has waited max_batch_latency.
+        """
+        batch = [self.frame_reader.get()]
+        deadline = time.monotonic() + self.max_batch_latency
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.frame_reader.get(timeout=remaining))
+            except Empty:
+                break
+        return batch
+
+    def recognize_batch_no_enroll(self, imgs: List[np.ndarray]) -> List[Tuple[Optional[str], Optional[np.ndarray]]]:
+        """
+        Batched version of recognize_face_no_enroll, detection runs per frame
+        and the embeddings of every valid face are computed together.
 
+        Returns:
+            List of (face_id, embedding) per frame, (None, None) when the frame
+            had no valid face.
+        """
+        valid_imgs, valid_faces, valid_slots = [], [], []
+        for slot, img in enumerate(imgs):
             try:
-                recognized_id, emb = self.recognize_face_no_enroll(img)
-            except ValueError as e:
-                self.face_id_queue.append(None)
-                self.face_embedding_queue.append(None)
-                self.save_img_queue.append(None)
+                face = self._select_face(img)
+            except ValueError:
                 continue
+            valid_imgs.append(img)
+            valid_faces.append(face)
+            valid_slots.append(slot)
+
+        results = [(None, None)] * len(imgs)
+        if not valid_faces:
+            return results
 
-            self.face_id_queue.append(recognized_id)
-            self.face_embedding_queue.append(emb)
-            self.save_img_queue.append(img)
+        embeddings = self._embed_faces(valid_imgs, valid_faces)
+        for slot, embedding in zip(valid_slots, embeddings):
+            embedding = embedding.reshape(1, -1)
+            results[slot] = (self._match_face(embedding), embedding)
+        return results
+
+    def _face_recognition_on_queue(self):
+        while True:
+            batch = self._collect_batch()
+
+            # Frames that barely changed since the last recognized one reuse its vote
+            keep = [self.frame_gate.should_process(img) for img in batch]
+            to_process = [img for img, k in zip(batch, keep) if k]
+            try:
+                results = self.recognize_batch_no_enroll(to_process)
+            except Exception as e:
+                print("Error in the face recognition batch ", e)
+                results = [(None, None)] * len(to_process)
+
+            results = iter(zip(to_process, results))
+            for k in keep:
+                if k:
+                    img, (recognized_id, emb) = next(results)
+                    self._last_result = (recognized_id, emb, img if emb is not None else None)
+                recognized_id, emb, saved_img = self._last_result
+                self.face_id_queue.append(recognized_id)
+                self.face_embedding_queue.append(emb)
+                self.save_img_queue.append(saved_img)
 
     ############################################################################
     #            Modified method that does the voting over 10 frames           #
@@ -0,0 +1,243 @@
+import os
+import json
+import glob
+import numpy as np
+from pathlib import Path
+from threading import Lock
+from typing import List, Tuple
+
+class FaceStore:
+    """
+    Append-only packed store for face embeddings.
+
+    A generation of the store is two files next to a `meta.json` header:
+    - `embeddings.<gen>.f32`: L2 normalised float32 rows, memory mapped on load,
+      row i starts at byte i * dim * 4.
+    - `ids.<gen>.log`: one `<row>\\t<face_id>` line per committed row, removals
+      are recorded as `-1\\t<face_id>` tombstones.
+
+    An append writes and fsyncs the row first and the id line second, the id
+    line is the commit point, rows without one are cut off on the next load.
+    Compaction writes a new generation and switches `meta.json` atomically.
+    """
+
+    def __init__(self, db_dir: Path, dim: int = 512, compact_ratio: float = 0.25):
+        """
+        Args:
+            db_dir (Path): Directory holding the store files.
+            dim (int): Embedding size used when the store is created.
+            compact_ratio (float): Fraction of dead rows that triggers compaction.
+        """
+        self.db_dir = Path(db_dir)
+        self.compact_ratio = compact_ratio
+        self.meta_path = self.db_dir / "meta.json"
+        self._lock = Lock()
+
+        if self.meta_path.exists():
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+            self.dim = meta["dim"]
+            self.generation = meta["generation"]
+        else:
+            self.dim = dim
+            self.generation = 0
+            self._write_meta()
+
+        self.row_bytes = self.dim * np.dtype(np.float32).itemsize
+        self.row_ids: List[str] = []
+        self.live = {}
+
+    @property
+    def embeddings_path(self) -> Path:
+        return self.db_dir / f"embeddings.{self.generation}.f32"
+
+    @property
+    def ids_path(self) -> Path:
+        return self.db_dir / f"ids.{self.generation}.log"
+
+    def __len__(self) -> int:
+        return len(self.live)
+
+    def _write_meta(self):
+        tmp_path = self.meta_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"dim": self.dim, "generation": self.generation, "dtype": "float32"}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.meta_path)
+
+    def _read_id_log(self) -> List[Tuple[int, str]]:
+        """Parse the committed id lines, cutting off a torn last line."""
+        if not self.ids_path.exists():
+            return []
+        with open(self.ids_path, "rb") as f:
+            data = f.read()
+        committed = data[:data.rfind(b"\n") + 1]
+        if len(committed) != len(data):
+            with open(self.ids_path, "r+b") as f:
+                f.truncate(len(committed))
+
+        entries = []
+        for line in committed.decode("utf-8").splitlines():
+            row, face_id = line.split("\t", 1)
+            entries.append((int(row), face_id))
+        return entries
+
+    def load(self) -> Tuple[List[str], np.ndarray]:
+        """
+        Map the store into memory.
+
+        Returns:
+            Tuple[List[str], np.ndarray]: IDs of the live faces and a read-only
+            memory mapped matrix of their normalised embeddings.
+        """
+        with self._lock:
+            entries = self._read_id_log()
+            n_rows = sum(1 for row, _ in entries if row >= 0)
+
+            # Rows written without their id line never got committed
+            size = self.embeddings_path.stat().st_size if self.embeddings_path.exists() else 0
+            if size != n_rows * self.row_bytes:
+                with open(self.embeddings_path, "ab") as f:
+                    f.truncate(n_rows * self.row_bytes)
+
+            self.row_ids = [None] * n_rows
+            self.live = {}
+            for row, face_id in entries:
+                if row >= 0:
+                    self.row_ids[row] = face_id
+                    self.live[face_id] = row
+                else:
+                    self.live.pop(face_id, None)
+
+            if self._dead_rows() > self.compact_ratio * max(n_rows, 1):
+                self._compact()
+            self._remove_stale_generations()
+
+            return self._mapped()
+
+    def _mapped(self) -> Tuple[List[str], np.ndarray]:
+        n_rows = len(self.row_ids)
+        if n_rows == 0:
+            return [], np.empty((0, self.dim), dtype=np.float32)
+
+        matrix = np.memmap(self.embeddings_path, dtype=np.float32, mode="r", shape=(n_rows, self.dim))
+        rows = sorted(self.live.values())
+        if len(rows) == n_rows:
+            return [self.row_ids[row] for row in rows], matrix
+        # Only reached between compactions, the live rows have to be gathered
+        return [self.row_ids[row] for row in rows], np.asarray(matrix[rows])
+
+    def _remove_stale_generations(self):
+        """Delete files left behind by a compaction that crashed half way."""
+        current = {self.embeddings_path.name, self.ids_path.name}
+        for pattern in ("embeddings.*.f32", "ids.*.log"):
+            for path in self.db_dir.glob(pattern):
+                if path.name not in current:
+                    path.unlink()
+
+    def _dead_rows(self) -> int:
+        return len(self.row_ids) - len(self.live)
+
+    def append(self, face_id: str, embedding: np.ndarray):
+        """Durably append one face, the row is normalised before it is written."""
+        self.append_many([face_id], embedding)
+
+    def append_many(self, face_ids: List[str], embeddings: np.ndarray):
+        if len(face_ids) == 0:
+            return
+        rows = np.asarray(embeddings, dtype=np.float32).reshape(len(face_ids), self.dim)
+        rows = rows / np.maximum(np.linalg.norm(rows, axis=1, keepdims=True), 1e-12)
+
+        with self._lock:
+            start = len(self.row_ids)
+            # A failed append is cut off again, later rows have to land at `start`
+            sizes = {path: path.stat().st_size if path.exists() else 0
+                     for path in (self.embeddings_path, self.ids_path)}
+            try:
+                with open(self.embeddings_path, "ab") as f:
+                    f.write(rows.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                lines = "".join(f"{start + i}\t{face_id}\n" for i, face_id in enumerate(face_ids))
+                with open(self.ids_path, "a", encoding="utf-8") as f:
+                    f.write(lines)
+                    f.flush()
+                    os.fsync(f.fileno())
+            except Exception:
+                for path, size in sizes.items():
+                    with open(path, "ab") as f:
+                        f.truncate(size)
+                raise
+
+            for i, face_id in enumerate(face_ids):
+                self.row_ids.append(face_id)
+                self.live[face_id] = start + i
+
+    def remove(self, face_id: str):
+        """Record a tombstone for the face, its row is dropped on compaction."""
+        with self._lock:
+            if face_id not in self.live:
+                return
+            with open(self.ids_path, "a", encoding="utf-8") as f:
+                f.write(f"-1\t{face_id}\n")
+                f.flush()
+                os.fsync(f.fileno())
+            del self.live[face_id]
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        """Rewrite the live rows into a new generation and switch over to it."""
+        old_embeddings, old_ids = self.embeddings_path, self.ids_path
+        rows = sorted(self.live.values())
+        face_ids = [self.row_ids[row] for row in rows]
+
+        if rows:
+            matrix = np.memmap(old_embeddings, dtype=np.float32, mode="r",
+                               shape=(len(self.row_ids), self.dim))
+            live_rows = np.asarray(matrix[rows])
+        else:
+            live_rows = np.empty((0, self.dim), dtype=np.float32)
+
+        self.generation += 1
+        with open(self.embeddings_path, "wb") as f:
+            f.write(live_rows.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self.ids_path, "w", encoding="utf-8") as f:
+            f.write("".join(f"{i}\t{face_id}\n" for i, face_id in enumerate(face_ids)))
+            f.flush()
+            os.fsync(f.fileno())
+        self._write_meta()
+
+        for path in (old_embeddings, old_ids):
+            if path.exists():
+                path.unlink()
+
+        self.row_ids = face_ids
+        self.live = {face_id: i for i, face_id in enumerate(face_ids)}
+
+    def import_legacy_npy(self) -> int:
+        """
+        One off migration of the old one `.npy` file per face layout.
+
+        Returns:
+            int: Number of faces imported.
+        """
+        embedding_files = sorted(glob.glob(str(self.db_dir / "*.npy")))
+        face_ids = []
+        embeddings = []
+        for ef in embedding_files:
+            face_id = Path(ef).stem
+            if face_id in self.live:
+                continue
+            face_ids.append(face_id)
+            embeddings.append(np.load(ef).reshape(-1))
+
+        if face_ids:
+            self.append_many(face_ids, np.vstack(embeddings))
+        return len(face_ids)
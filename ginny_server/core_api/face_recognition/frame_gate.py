@@ -0,0 +1,71 @@
+import cv2
+import numpy as np
+from typing import Optional, Tuple
+
+class FrameGate:
+    """
+    Cheap change detector run before face detection.
+
+    Every frame is shrunk to a small grayscale thumbnail and compared with the
+    thumbnail of the last frame that went through recognition. When the mean
+    absolute difference stays under `diff_threshold` the frame is skipped and
+    the previous result is reused, at most `max_consecutive_skips` times in a
+    row so a slow drift in the scene still gets picked up.
+    """
+
+    def __init__(self,
+                 diff_threshold: float = 3.0,
+                 max_consecutive_skips: int = 15,
+                 thumb_size: Tuple[int, int] = (32, 24)):
+        """
+        Args:
+            diff_threshold (float): Mean absolute grey level difference (0-255)
+                below which two frames count as the same scene, 0 disables the gate.
+            max_consecutive_skips (int): Frames skipped in a row before one is
+                forced through recognition.
+            thumb_size (Tuple[int, int]): (width, height) of the compared thumbnails.
+        """
+        self.diff_threshold = diff_threshold
+        self.max_consecutive_skips = max_consecutive_skips
+        self.thumb_size = thumb_size
+
+        self._reference: Optional[np.ndarray] = None
+        self._consecutive_skips = 0
+        self.processed = 0
+        self.skipped = 0
+
+    def _thumbnail(self, img: np.ndarray) -> np.ndarray:
+        if img.ndim == 3:
+            img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(img, self.thumb_size, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+    def should_process(self, img: np.ndarray) -> bool:
+        """
+        Decide whether the frame needs a full recognition pass, the frame becomes
+        the new reference when it does.
+        """
+        thumb = self._thumbnail(img)
+        if self._reference is not None \
+                and self._consecutive_skips < self.max_consecutive_skips \
+                and np.mean(np.abs(thumb - self._reference)) < self.diff_threshold:
+            self._consecutive_skips += 1
+            self.skipped += 1
+            return False
+
+        self._reference = thumb
+        self._consecutive_skips = 0
+        self.processed += 1
+        return True
+
+    def reset(self):
+        """Forget the reference frame, the next frame is always processed."""
+        self._reference = None
+        self._consecutive_skips = 0
+
+    def stats(self) -> dict:
+        total = self.processed + self.skipped
+        return {
+            "processed": self.processed,
+            "skipped": self.skipped,
+            "skip_ratio": self.skipped / total if total else 0.0,
+        }
@@ -5,6 +5,7 @@ import cv2
 import numpy as np
 
 from utils import Neo4j
+from ..llm_gateway import pooled_http_client, SDK_DEFAULT_TIMEOUT
 
 class _GrokHandler:
     def __init__(self, model_name="gpt-4"):
@@ -16,6 +17,8 @@ class _GrokHandler:
         self.client = openai.OpenAI(
             api_key=os.getenv("GROK_API_KEY"),
             base_url="https://api.x.ai/v1",
+            http_client=pooled_http_client(),
+            timeout=SDK_DEFAULT_TIMEOUT
         )
 
     def _encode_image(self, image):
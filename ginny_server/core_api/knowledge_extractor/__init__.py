@@ -0,0 +1,3 @@
+from .knowledge_extractor import _KnowledgeExtractor
+from .schema import validate_extraction, ExtractionSchemaError
+from .prefilter import has_personal_content
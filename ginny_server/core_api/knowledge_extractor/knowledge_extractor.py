@@ -0,0 +1,66 @@
+import json
+from typing import Optional
+
+from utils import PersonDetails, message_format
+from .prompt import get_extraction_prompt
+from .prefilter import has_personal_content
+from .schema import validate_extraction, ExtractionSchemaError
+
+class _KnowledgeExtractor:
+    """
+    One structured LLM call per turn for everything the robot learns from it:
+    relationships, the speaker's name, their new attributes and attributes of
+    a third person they talk about. Turns without personal content never
+    reach the LLM.
+    """
+
+    def __init__(self, context_messages: int = 6, model: str = "gpt-4o") -> None:
+        """
+        :param context_messages: earlier messages given to resolve pronouns
+        :param model: model used for the extraction call
+        """
+        self.context_messages = context_messages
+        self.model = model
+        self.calls = 0
+        self.skipped = 0
+        self.invalid = 0
+
+    def _conversation(self, person_details: PersonDetails, latest_msg: dict) -> str:
+        messages = [msg for msg in person_details.get_relevant_messages()
+                    if msg.get("role") != "system" and msg is not latest_msg]
+        lines = [f"{msg['role']}: {msg['content']}" for msg in messages[-self.context_messages:]]
+        return "\n         ".join(lines) if lines else "(no earlier messages)"
+
+    def __call__(self, person_details: PersonDetails) -> Optional[dict]:
+        """
+            :return: the validated extraction, None when the turn was skipped
+                by the pre-filter or the output did not fit the schema
+        """
+        from core_api import ChatGPT
+
+        latest_msg = person_details.get_latest_user_message()
+        if not has_personal_content(latest_msg.get("content", "")):
+            self.skipped += 1
+            return None
+
+        person_attributes = person_details.get_attribute("attributes") or []
+        system_text = get_extraction_prompt(person_attributes, self._conversation(person_details, latest_msg))
+        total_messages = [message_format("system", system_text), latest_msg]
+
+        self.calls += 1
+        response = ChatGPT.send_text_get_json(total_messages, stream=False, model=self.model)
+        if isinstance(response, str):
+            raise Exception(f"Chatgpt failed to extract knowledge: {response}")
+
+        try:
+            extraction = validate_extraction(json.loads(response.choices[0].message.content))
+        except (json.JSONDecodeError, ExtractionSchemaError) as e:
+            self.invalid += 1
+            print(f"Discarding the knowledge extraction: {e}")
+            return None
+
+        print("Knowledge extracted ", extraction)
+        return extraction
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "skipped": self.skipped, "invalid": self.invalid}
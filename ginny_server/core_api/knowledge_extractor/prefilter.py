@@ -0,0 +1,58 @@
+import re
+
+# Words that make an utterance worth an extraction call, it has to be about
+# the speaker, someone else or a name
+_PERSONAL_WORDS = {
+    "i", "i'm", "im", "i've", "ive", "i'd", "i'll", "me", "my", "mine", "myself",
+    "we", "we're", "our", "ours", "us",
+    "he", "he's", "she", "she's", "his", "her", "hers", "him", "they", "their", "them",
+    "name", "named", "called", "call",
+    "friend", "friends", "boyfriend", "girlfriend", "wife", "husband", "partner",
+    "mother", "mom", "mum", "father", "dad", "brother", "sister", "son", "daughter",
+    "uncle", "aunt", "cousin", "grandma", "grandpa", "grandmother", "grandfather",
+    "supervisor", "boss", "colleague", "teacher", "student", "mentor", "neighbour", "neighbor",
+}
+
+# "tell me", "show me", "can you ... for me" are requests, not facts about the speaker
+_REQUEST = re.compile(r"\b(tell|show|give|help|teach|let)\s+(me|us)\b|\bfor\s+(me|us)\b")
+
+_WORD = re.compile(r"[a-z']+")
+
+# Sentence openers that are not names: questions, greetings and robot commands
+_OPENERS = {
+    "what", "who", "where", "when", "why", "how", "which", "whose",
+    "is", "are", "was", "were", "am", "can", "could", "would", "will", "shall", "should",
+    "do", "does", "did", "have", "has", "may", "might",
+    "hey", "hi", "hello", "ok", "okay", "yes", "yeah", "no", "nope", "thanks", "thank",
+    "please", "sorry", "bye", "goodbye", "good", "nice", "cool", "great", "wow", "so", "and",
+    "but", "well", "oh", "um", "uh", "hmm", "that", "this", "these", "those", "it", "there",
+    "the", "a", "an", "you", "your", "ginny", "robot",
+    "tell", "show", "give", "help", "teach", "let", "dance", "move", "raise", "lift", "turn",
+    "walk", "sing", "look", "go", "stop", "come", "wave", "jump", "describe", "say", "repeat",
+    "try", "make", "put", "bring", "take", "again",
+}
+
+def has_personal_content(text: str) -> bool:
+    """
+    Cheap check run before the extraction call, False for greetings, commands
+    and questions that say nothing about anyone. It errs on the side of True,
+    a missed fact costs more than a wasted call.
+    """
+    if not text or not text.strip():
+        return False
+
+    lowered = _REQUEST.sub(" ", text.lower())
+    words = set(_WORD.findall(lowered))
+    if words & _PERSONAL_WORDS:
+        return True
+
+    # Names coming out of the ASR are capitalised, the robot's own name does
+    # not count and neither does a capitalised question word or command
+    for sentence in re.split(r"[.!?]\s*", text):
+        for i, word in enumerate(sentence.split()):
+            word = word.strip(",;:'\"")
+            if not word[:1].isupper() or word.lower() in ("ginny", "i"):
+                continue
+            if i > 0 or word.lower() not in _OPENERS:
+                return True
+    return False
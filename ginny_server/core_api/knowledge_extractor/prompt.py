@@ -0,0 +1,143 @@
+from utils.neo4j_db.relationships import RELATIONSHIP_TYPES
+
+def get_extraction_prompt(attributes, conversation):
+    relationship_types = ", ".join(sorted(RELATIONSHIP_TYPES))
+    extraction_prompt = f"""
+    You are part of the GINNY robot's knowledge extraction module. From the latest user
+    input you extract, in one go, the relationships between people, the user's own name,
+    new attributes of the user and attributes of a third person the user talks about.
+
+    Only extract what the latest user input says. The conversation below is only there to
+    work out who pronouns like "he", "she", "her", "him" refer to.
+
+    Conversation so far
+    ```
+         {conversation}
+    ```
+
+    Known attributes of the user
+    ```
+         {attributes}
+    ```
+
+    Think in the following steps
+
+    1) Relationships: does the input talk about a relationship between two people, like
+    brother/sister, parental relationship, friendship, teacher/mentee, etc. A relationship
+    only counts when the other person is mentioned by name. Relationships themselves cannot
+    be names, someone cannot be named "girlfriend", "sister", "mother", "father", and
+    pronouns like "she", "her", "him" are not names either. Every relationship is written
+    as {{"source": <name>, "type": <type>, "target": <name>}} and reads "source is the
+    type of target". The current user is written as "user", everyone else by their name
+    in lower case. The type is one of
+         {relationship_types}
+    pick the closest one, use KNOWS if none of them fits.
+
+    2) Name: if the user says what their own name is, "my name is <name>", "I am <name>",
+    put it in "name". Names of other people never go there.
+
+    3) Attribute: a new attribute of the user themselves, preferences (likes/dislikes),
+    occupation, interests. Use Sherlock Holmes-style intuition to deduce meaningful
+    attributes. If it is already in the known attributes, or there is none, use an empty
+    string.
+
+    4) Third person: if the user describes someone else (by name or by pronoun), put that
+    person's name in "third_person_name", resolving pronouns from the conversation, and the
+    attribute in "third_person_attribute". If the name cannot be worked out use an empty
+    string. "check_friend" is true whenever the input refers to another person.
+
+    The output is only JSON in the following format
+
+    ```
+        {{
+            "reasoning": <reasoning output>,
+            "relationships": <list of relationships, or []>,
+            "name": <the user's own name or empty string>,
+            "attribute": <new attribute of the user or empty string>,
+            "check_friend": <true if the input refers to another person, otherwise false>,
+            "third_person_name": <name of the person referred to or empty string>,
+            "third_person_attribute": <their attribute or empty string>
+        }}
+    ```
+
+    Here are some examples, fields that are empty are left out for brevity but you always
+    output all of them
+
+    ```
+        input: "Hamid is my supervisor"
+        output: {{
+            "reasoning": "Hamid is the supervisor of the current user",
+            "relationships": [{{"source": "hamid", "type": "SUPERVISOR", "target": "user"}}],
+            "check_friend": true
+        }}
+
+        input: "Tho is student of Hamid"
+        output: {{
+            "reasoning": "There is a relationship between Tho and Hamid",
+            "relationships": [{{"source": "tho", "type": "STUDENT", "target": "hamid"}}],
+            "check_friend": true
+        }}
+
+        input: "My father's name is Aman"
+        output: {{
+            "reasoning": "Aman is the father of the user, not the user's own name",
+            "relationships": [{{"source": "aman", "type": "FATHER", "target": "user"}}],
+            "check_friend": true
+        }}
+
+        input: "I used to play with my sister"
+        output: {{
+            "reasoning": "A relationship is mentioned but without a name, so it is not used",
+            "relationships": []
+        }}
+
+        input: "Hey, I am Zhixi, I love to play guitar"
+        output: {{
+            "reasoning": "The user gives their own name and a new attribute",
+            "relationships": [],
+            "name": "zhixi",
+            "attribute": "Loves to play guitar"
+        }}
+
+        input: "My name is not Jim, my name is James"
+        output: {{
+            "reasoning": "Only the name the user says is theirs is relevant",
+            "relationships": [],
+            "name": "james"
+        }}
+
+        input: "I work as a Software Engineer"
+        output: {{
+            "reasoning": "<if not in the known attributes> A new occupation of the user",
+            "relationships": [],
+            "attribute": "This person is a Software Engineer"
+        }}
+
+        input: "She loves to skate" (the conversation was about the user's friend Maya)
+        output: {{
+            "reasoning": "An attribute of a third person, from the conversation she is Maya",
+            "relationships": [],
+            "check_friend": true,
+            "third_person_name": "maya",
+            "third_person_attribute": "loves skating"
+        }}
+
+        input: "Jimmy also loves to play football and read books"
+        output: {{
+            "reasoning": "An attribute of someone else named Jimmy, not the user's own name",
+            "relationships": [],
+            "check_friend": true,
+            "third_person_name": "jimmy",
+            "third_person_attribute": "loves playing football and reading books"
+        }}
+
+        input: "Can you show me how to do a jumping jack?"
+        output: {{
+            "reasoning": "A request for a movement, nothing to extract",
+            "relationships": []
+        }}
+    ```
+
+    Make sure the output is only JSON, and donot deviate from the format
+    """
+    return extraction_prompt
@@ -0,0 +1,79 @@
+from typing import Any, Dict, List
+
+from utils.neo4j_db.relationships import RelationshipError, relationship_type
+
+class ExtractionSchemaError(ValueError):
+    pass
+
+# Stands for the person talking to the robot in a relationship
+USER = "user"
+
+_STRING_FIELDS = ("reasoning", "name", "attribute", "third_person_name", "third_person_attribute")
+_BOOL_FIELDS = ("check_friend",)
+
+def _as_bool(value: Any, field: str) -> bool:
+    if isinstance(value, bool):
+        return value
+    if value is None:
+        return False
+    if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+        return value.strip().lower() == "true"
+    raise ExtractionSchemaError(f"{field} should be a boolean, got {value!r}")
+
+def _as_str(value: Any, field: str) -> str:
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        raise ExtractionSchemaError(f"{field} should be a string, got {value!r}")
+    return value.strip()
+
+def _relationships(value: Any) -> List[Dict[str, str]]:
+    if value is None:
+        return []
+    if isinstance(value, dict):
+        value = [value]
+    if not isinstance(value, list):
+        raise ExtractionSchemaError(f"relationships should be a list, got {value!r}")
+
+    relationships = []
+    for rel in value:
+        if not isinstance(rel, dict):
+            raise ExtractionSchemaError(f"a relationship should be an object, got {rel!r}")
+        source = _as_str(rel.get("source"), "source").lower()
+        target = _as_str(rel.get("target"), "target").lower()
+        try:
+            rel_type = relationship_type(_as_str(rel.get("type"), "type"))
+        except RelationshipError as e:
+            print(f"Dropping the relationship {rel}: {e}")
+            continue
+        if source and target and source != target:
+            relationships.append({"source": source, "type": rel_type, "target": target})
+    return relationships
+
+def validate_extraction(data: Any) -> Dict[str, Any]:
+    """
+    Checks the output of the extraction call and fills in the fields the model
+    left out, so the consumers can index every key.
+
+    - Wrong types raise ExtractionSchemaError, missing fields get empty values.
+    - A relationship without both people or with a type outside the
+      whitelist is dropped, the rest of the extraction is still used.
+    - Names are lower cased like the names in the graph.
+    """
+    if not isinstance(data, dict):
+        raise ExtractionSchemaError(f"The extraction should be a JSON object, got {type(data).__name__}")
+
+    extraction = {}
+    for field in _STRING_FIELDS:
+        extraction[field] = _as_str(data.get(field), field)
+    for field in _BOOL_FIELDS:
+        extraction[field] = _as_bool(data.get(field), field)
+
+    extraction["relationships"] = _relationships(data.get("relationships"))
+    extraction["name"] = extraction["name"].lower()
+    extraction["third_person_name"] = extraction["third_person_name"].lower()
+
+    extraction["is_relationship"] = bool(extraction["relationships"])
+    if extraction["third_person_name"] or extraction["is_relationship"]:
+        extraction["check_friend"] = True
+    return extraction
@@ -4,6 +4,8 @@ import numpy as np
 from openai import OpenAI
 from neo4j import GraphDatabase
 
+from ..llm_gateway import pooled_http_client, SDK_DEFAULT_TIMEOUT
+
 class _Llama:
     def __init__(self, llama_url="http://127.0.0.2:8080/v1"):
         """
@@ -15,7 +17,9 @@ class _Llama:
         self.client = OpenAI(
             #base_url="http://localhost:8080/v1", 127.0.0.1
             base_url=llama_url,
-            api_key = api_key
+            api_key = api_key,
+            http_client=pooled_http_client(),
+            timeout=SDK_DEFAULT_TIMEOUT
         )
 
     def send_to_model(self, messages: list[dict], stream: bool, img=None):
@@ -0,0 +1,2 @@
+from .gateway import _LLMGateway, pooled_http_client, SDK_DEFAULT_TIMEOUT
+from .circuit_breaker import CircuitBreaker
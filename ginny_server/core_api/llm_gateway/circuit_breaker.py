@@ -0,0 +1,67 @@
+import time
+from threading import Lock
+
+class CircuitBreaker:
+    """
+    Per provider circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and the
+    provider is skipped for `reset_after_s`. Then a single trial request is let
+    through (half open), its success closes the circuit and its failure opens
+    it again for another `reset_after_s`.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_after_s: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_after_s = reset_after_s
+
+        self._lock = Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+
+    def available(self) -> bool:
+        """Whether allow() would let a request through now, without claiming the half open trial."""
+        with self._lock:
+            if self.state == self.OPEN:
+                return time.time() - self.opened_at >= self.reset_after_s
+            return self.state == self.CLOSED or not self._trial_running
+
+    def allow(self) -> bool:
+        """Whether a request may be sent to the provider now, claims the half open trial."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.time() - self.opened_at >= self.reset_after_s:
+                self.state = self.HALF_OPEN
+                self._trial_running = False
+            if self.state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print(f"Circuit of {self.name} opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.time()
+
+    def release(self):
+        """Give back a half open trial that was cancelled without an outcome."""
+        with self._lock:
+            self._trial_running = False
@@ -0,0 +1,258 @@
+import os
+import time
+import httpx
+import openai
+from queue import Queue, Empty
+from threading import Event, Lock, Thread
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utils import Tracer
+from .circuit_breaker import CircuitBreaker
+
+_http_client = None
+_http_client_lock = Lock()
+
+# The SDKs take the timeout of a custom http_client instead of their own 600s
+# default, so every client built on the pool passes its timeout explicitly.
+# The legacy handlers keep the SDK default, non-streamed JSON calls can be slow
+SDK_DEFAULT_TIMEOUT = httpx.Timeout(600.0, connect=5.0)
+
+def pooled_http_client() -> httpx.Client:
+    """
+    The process wide HTTP/2 connection pool every LLM client is built on, so
+    turns reuse warm TLS connections instead of opening one per SDK client.
+    Its own timeout is only a fallback, pass timeout= to the SDK client.
+    """
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                http2=True,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16,
+                                    keepalive_expiry=120),
+                timeout=httpx.Timeout(30.0, connect=5.0),
+            )
+    return _http_client
+
+class Provider:
+    """An OpenAI compatible endpoint with its own timeouts and circuit breaker."""
+
+    def __init__(self,
+                 name: str,
+                 base_url: Optional[str],
+                 api_key: Optional[str],
+                 connect_timeout: float = 3.0,
+                 read_timeout: float = 15.0,
+                 first_token_timeout: float = 8.0):
+        """
+        :param name: name the provider is referred to in the routes
+        :param base_url: endpoint, None for api.openai.com
+        :param api_key: key of the endpoint
+        :param connect_timeout: seconds to open a connection
+        :param read_timeout: longest gap between two streamed chunks
+        :param first_token_timeout: seconds without a first token after which 
+            the attempt is abandoned and counted as a failure
+        """
+        self.name = name
+        self.first_token_timeout = first_token_timeout
+        self.client = openai.OpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            http_client=pooled_http_client(),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            max_retries=0
+        )
+        self.breaker = CircuitBreaker(name)
+
+class _Attempt:
+    """One streamed completion running on its own thread, chunks go to `events`."""
+
+    def __init__(self, provider: Provider, model: str, params: dict, messages: list, events: Queue):
+        self.provider = provider
+        self.model = model
+        self.started = time.time()
+        self.first_token_at = None
+        self.cancelled = Event()
+        self._response = None
+        self._params = params
+        self._messages = messages
+        self._events = events
+        Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        try:
+            self._response = self.provider.client.chat.completions.create(
+                model=self.model,
+                messages=self._messages,
+                stream=True,
+                **self._params
+            )
+            if self.cancelled.is_set():
+                return
+            for chunk in self._response:
+                if self.cancelled.is_set():
+                    break
+                if not chunk.choices:
+                    continue
+                content = chunk.choices[0].delta.content
+                if content:
+                    self._events.put((self, "token", content))
+            self._events.put((self, "done", None))
+        except Exception as e:
+            # Closing a cancelled attempt breaks its stream, that is no failure
+            if not self.cancelled.is_set():
+                self._events.put((self, "error", e))
+        finally:
+            self._close()
+
+    def _close(self):
+        response = self._response
+        if response is not None:
+            response.close()
+
+    def cancel(self):
+        """Stop the attempt and close its stream, freeing the HTTP/2 stream right away."""
+        self.cancelled.set()
+        self._close()
+
+class _LLMGateway:
+    """
+    Single entry point for chat completions.
+
+    - Every provider shares one pooled HTTP/2 client and has its own timeouts.
+    - A route is an ordered list of (provider, model, params). When the first
+      provider has not produced a token within `hedge_after_ms`, the next one is
+      started as well and whichever streams a token first wins, the other is
+      cancelled.
+    - Providers that keep failing are skipped by their circuit breaker.
+    - Callers always get a plain iterator of text deltas, whatever the provider.
+    """
+
+    GROK_PARAMS = {"temperature": 0.7, "max_tokens": 500, "top_p": 0.9}
+    OPENAI_PARAMS = {"max_tokens": 500}
+
+    def __init__(self, hedge_after_ms: float = 800.0):
+        self.hedge_after = hedge_after_ms / 1000
+        self.providers: Dict[str, Provider] = {
+            "grok": Provider("grok", "https://api.x.ai/v1", os.getenv("GROK_API_KEY")),
+            "openai": Provider("openai", None, os.getenv("OPENAI_API_KEY")),
+        }
+        self.routes: Dict[str, List[Tuple[str, str, dict]]] = {
+            "routing": [
+                ("grok", "grok-2", self.GROK_PARAMS),
+                ("openai", "gpt-4o", self.OPENAI_PARAMS),
+            ],
+            "speaking": [
+                ("grok", "grok-2-1212", self.GROK_PARAMS),
+                ("openai", "gpt-4-turbo", self.OPENAI_PARAMS),
+            ],
+        }
+        self.first_token_latency: Dict[str, float] = {}
+
+    def _candidates(self, route: str) -> List[Tuple[Provider, str, dict]]:
+        candidates = [(self.providers[name], model, params) for name, model, params in self.routes[route]]
+        allowed = [c for c in candidates if c[0].breaker.available()]
+        # Every circuit open, better to try the preferred provider than to fail outright
+        return allowed or candidates[:1]
+
+    def stream(self, messages: list, route: str = "speaking") -> Iterator[str]:
+        """
+            :param messages: chat messages in the OpenAI format
+            :param route: which provider list to use, see self.routes
+            :return: iterator of text deltas of the winning provider
+        """
+        candidates = self._candidates(route)
+        events: Queue = Queue()
+        active: List[_Attempt] = []
+        winner: Optional[_Attempt] = None
+        last_error: Optional[Exception] = None
+
+        def start_next(force=False):
+            # The breaker is asked only when an attempt really starts, a backup
+            # that is never hedged to must not hold the half open trial
+            while candidates:
+                provider, model, params = candidates.pop(0)
+                if provider.breaker.allow() or force:
+                    active.append(_Attempt(provider, model, params, messages, events))
+                    return
+
+        stream_start = time.time()
+        start_next(force=True)
+        hedge_at = stream_start + self.hedge_after
+        try:
+            while True:
+                if winner is None:
+                    now = time.time()
+                    # Abandon attempts that are stuck before their first token
+                    for attempt in list(active):
+                        if now - attempt.started > attempt.provider.first_token_timeout:
+                            print(f"{attempt.provider.name} gave no first token in time")
+                            attempt.cancel()
+                            attempt.provider.breaker.record_failure()
+                            active.remove(attempt)
+                    if candidates and (not active or now >= hedge_at):
+                        if active:
+                            print(f"Hedging {route} with {candidates[0][0].name}")
+                        start_next()
+                        hedge_at = float("inf")
+                    if not active:
+                        raise last_error or RuntimeError(f"No provider answered the {route} route")
+                    wait = min(hedge_at if candidates else float("inf"),
+                               min(a.started + a.provider.first_token_timeout for a in active)) - now
+                    timeout = max(wait, 0.01)
+                else:
+                    timeout = None
+
+                try:
+                    attempt, kind, payload = events.get(timeout=timeout)
+                except Empty:
+                    continue
+                if attempt not in active:
+                    continue
+
+                if kind == "token":
+                    if winner is None:
+                        winner = attempt
+                        winner.first_token_at = time.time()
+                        self.first_token_latency[winner.provider.name] = winner.first_token_at - winner.started
+                        Tracer.record("llm_first_token", stream_start, winner.first_token_at,
+                                      llm_route=route, provider=winner.provider.name)
+                        turn = Tracer.current()
+                        if turn is not None:
+                            Tracer.record("time_to_first_token", turn.start, winner.first_token_at)
+                        for other in active:
+                            if other is not winner:
+                                other.cancel()
+                                other.provider.breaker.release()
+                        active[:] = [winner]
+                    yield payload
+                elif kind == "done":
+                    attempt.provider.breaker.record_success()
+                    Tracer.record("llm_last_token", stream_start, llm_route=route,
+                                  provider=attempt.provider.name)
+                    return
+                else:
+                    attempt.provider.breaker.record_failure()
+                    if attempt is winner:
+                        raise payload
+                    print(f"{attempt.provider.name} failed: {payload}")
+                    last_error = payload
+                    active.remove(attempt)
+        finally:
+            # Attempts without an outcome, e.g. the caller stopped reading
+            for attempt in active:
+                attempt.cancel()
+                attempt.provider.breaker.release()
+
+    def complete(self, messages: list, route: str = "routing") -> str:
+        """The whole completion as a string, hedged on the first token like stream."""
+        return "".join(self.stream(messages, route))
+
+    def stats(self) -> dict:
+        return {
+            name: {
+                "circuit": provider.breaker.state,
+                "first_token_s": self.first_token_latency.get(name),
+            }
+            for name, provider in self.providers.items()
+        }
@@ -1,33 +1,44 @@
-import json
-from queue import Queue
-from threading import Thread
+import os
+from typing import List
 
-from utils import PersonDetails, Neo4j, message_format, name_similarity
-from .prompt import relationship_check_prompt
+from utils import PersonDetails, Neo4j, ExtractionPool, message_format
+from utils import PersonRef, RelationshipMutation, RelationshipError
 
 class _RelationshipChecker:
     def __init__(self) -> None:
-        self.relationship_queue: Queue[PersonDetails] = Queue()
-        self.relationship_prompt = message_format("system", relationship_check_prompt)
-
-        relationship_thread = Thread(
-                target=self.relationship_checker,
-                daemon=True
+        # Turns of one person are checked in order, a backlog of them in one call
+        self.pool = ExtractionPool(
+            "relationship_extraction",
+            self._check_turns,
+            num_workers=int(os.getenv("EXTRACTION_WORKERS", "4")),
+            max_pending=int(os.getenv("EXTRACTION_MAX_PENDING", "256"))
         )
-        relationship_thread.start()
 
     def adding_text2relationship_checker(self, person_details: PersonDetails):
-        self.relationship_queue.put(person_details)
+        self.pool.submit(person_details.get_attribute("face_id"), person_details)
+
+    @staticmethod
+    def coalesce_turns(turns: List[PersonDetails]) -> PersonDetails:
+        """
+            Folds consecutive turns of one person into the latest of them, 
+            with the user messages of all the turns as its latest user message
+        """
+        latest = turns[-1]
+        if len(turns) == 1:
+            return latest
+
+        merged = PersonDetails(latest.person_dict)
+        text = "\n".join(turn.get_latest_user_message().get("content", "") for turn in turns)
+        merged.set_latest_usr_message(message_format("user", text))
+        merged.set_latest_llm_message(latest.get_latest_llm_message())
+        merged.set_relevant_messages(latest.get_relevant_messages())
+        return merged
+
+    def _check_turns(self, face_id, turns: List[PersonDetails]):
+        self.relationship_checker(self.coalesce_turns(turns))
 
     def compare_name2db_names(self, name, threshold=55):
-        db_names = Neo4j.get_db_people_names()
-        highest_ratio = -1
-        closest_name = None
-        for db_name in db_names:
-            ratio = name_similarity(name, db_name)
-            if ratio > highest_ratio:
-                highest_ratio = ratio
-                closest_name = db_name
+        closest_name, highest_ratio = Neo4j.name_index.best_match(name, threshold)
 
         if highest_ratio > threshold:
             print("The clostest name is ", closest_name)
@@ -43,68 +54,54 @@ class _RelationshipChecker:
             new_names.append(closest_name)
         return new_names
         
-    def _develop_query_param(self, person_details: PersonDetails, name_list: list):
-        query_param = {"face_id": person_details.get_attribute("face_id")}
-
-        if name_list == []:
-            raise Exception("The name list in the relation checker is empty")
-
-        new_name_list = self.find_similar_name(name_list)
-
-        for name, new_name in zip(name_list, new_name_list):
-            query_param[name] = new_name
-
-        return query_param
-
-    def relationship_checker(self):
-        from core_api import ChatGPT, AttributeFinder
-        while True:
-            person_details = self.relationship_queue.get()
-            text_message = person_details.get_latest_user_message()
-
-            total_messages = [self.relationship_prompt, text_message]
-
+    def _develop_mutations(self, person_details: PersonDetails, relationships: list):
+        """ 
+            Relationships of the extraction as mutations, the user is matched by 
+            face_id and the names by their closest name in the db
+        """
+        from core_api.knowledge_extractor.schema import USER
+
+        if relationships == []:
+            raise Exception("The relationship list in the relation checker is empty")
+
+        user = PersonRef.by_face_id(person_details.get_attribute("face_id"))
+        names = list(dict.fromkeys(person for rel in relationships
+                                   for person in (rel["source"], rel["target"]) if person != USER))
+        people = {name: PersonRef.by_name(new_name)
+                  for name, new_name in zip(names, self.find_similar_name(names))}
+        people[USER] = user
+
+        mutations = []
+        for rel in relationships:
             try:
-                response = ChatGPT.send_text_get_json(total_messages, stream=False)
-            except Exception:
-                print("Chatgpt failed to get relationships")
-                try:
-                    AttributeFinder.attr_checker(person_details)
-                except Exception:
-                    continue
-                continue
-
-            output = response.choices[0].message.content
-            output_json = json.loads(output)
-
-            if not output_json.get("is_relationship"):
-                try:
-                    AttributeFinder.attr_checker(person_details)
-                except Exception:
-                    continue
-                continue
-
-            name_list = output_json.get("names")
-            query = output_json.get("cypher_query")
-
+                mutations.append(RelationshipMutation.merge(people[rel["source"]], rel["type"], people[rel["target"]]))
+            except RelationshipError as e:
+                print(f"Skipping the relationship {rel}: {e}")
+        return mutations
+
+    def relationship_checker(self, person_details: PersonDetails):
+        from core_api import KnowledgeExtractor, AttributeFinder
+
+        # Relationships, names and attributes all come out of the one call
+        try:
+            extraction = KnowledgeExtractor(person_details)
+        except Exception as e:
+            print(f"Knowledge extraction failed {e}")
+            return
+        if extraction is None:
+            return
+
+        if extraction["is_relationship"]:
             try:
-                query_param = self._develop_query_param(person_details, name_list)
-            except Exception:
-                # No name found
-                try:
-                    AttributeFinder.attr_checker(person_details)
-                except Exception:
-                    continue
-                continue
-
-            print("The relationship query parameter is going to execute ", query_param, query)
+                mutations = self._develop_mutations(person_details, extraction["relationships"])
+                print("The relationships going to be written ", mutations)
 
-            Neo4j.write_query(query, **query_param)
-            Neo4j.update_db_name_list()
-
-            # going into the attribute checker 
-            try:
-                AttributeFinder.attr_checker(person_details)
+                Neo4j.merge_relationships(mutations)
             except Exception as e:
-                print(f"Coming from relationship check into attr {e}" )
-                continue
+                print(f"Could not write the relationship {e}")
+
+        # going into the attribute checker 
+        try:
+            AttributeFinder.apply_extraction(person_details, extraction)
+        except Exception as e:
+            print(f"Coming from relationship check into attr {e}" )
@@ -197,6 +197,25 @@ def linear_assignment(cost_matrix):
         return np.array(list(zip(x, y)))
 
 
+def split_matches(matched_indices, iou_matrix, num_dets, num_trks, iou_threshold):
+    """
+    Splits an assignment into matches, unmatched detections and unmatched trackers.
+    Pairs assigned with an IoU under the threshold count as unmatched, they come
+    after the never assigned indices like in the per element loops this replaces.
+    """
+    matched_indices = np.asarray(matched_indices, dtype=int).reshape(-1, 2)
+    low = iou_matrix[matched_indices[:, 0], matched_indices[:, 1]] < iou_threshold
+
+    assigned_dets = np.zeros(num_dets, dtype=bool)
+    assigned_dets[matched_indices[:, 0]] = True
+    assigned_trks = np.zeros(num_trks, dtype=bool)
+    assigned_trks[matched_indices[:, 1]] = True
+
+    unmatched_detections = np.concatenate([np.where(~assigned_dets)[0], matched_indices[low, 0]])
+    unmatched_trackers = np.concatenate([np.where(~assigned_trks)[0], matched_indices[low, 1]])
+    return matched_indices[~low], unmatched_detections, unmatched_trackers
+
+
 def associate_detections_to_trackers(detections,trackers,iou_threshold = 0.3):
     """
     Assigns detections to tracked object (both represented as bounding boxes)
@@ -216,29 +235,7 @@ def associate_detections_to_trackers(detections,trackers,iou_threshold = 0.3):
     else:
         matched_indices = np.empty(shape=(0,2))
 
-    unmatched_detections = []
-    for d, det in enumerate(detections):
-        if(d not in matched_indices[:,0]):
-            unmatched_detections.append(d)
-    unmatched_trackers = []
-    for t, trk in enumerate(trackers):
-        if(t not in matched_indices[:,1]):
-            unmatched_trackers.append(t)
-
-    #filter out matched with low IOU
-    matches = []
-    for m in matched_indices:
-        if(iou_matrix[m[0], m[1]]<iou_threshold):
-            unmatched_detections.append(m[0])
-            unmatched_trackers.append(m[1])
-        else:
-            matches.append(m.reshape(1,2))
-    if(len(matches)==0):
-        matches = np.empty((0,2),dtype=int)
-    else:
-        matches = np.concatenate(matches,axis=0)
-
-    return matches, np.array(unmatched_detections), np.array(unmatched_trackers)
+    return split_matches(matched_indices, iou_matrix, len(detections), len(trackers), iou_threshold)
 
 
 def associate(detections, trackers, iou_threshold, velocities, previous_obs, vdc_weight):    
@@ -275,29 +272,7 @@ def associate(detections, trackers, iou_threshold, velocities, previous_obs, vdc
     else:
         matched_indices = np.empty(shape=(0,2))
 
-    unmatched_detections = []
-    for d, det in enumerate(detections):
-        if(d not in matched_indices[:,0]):
-            unmatched_detections.append(d)
-    unmatched_trackers = []
-    for t, trk in enumerate(trackers):
-        if(t not in matched_indices[:,1]):
-            unmatched_trackers.append(t)
-
-    # filter out matched with low IOU
-    matches = []
-    for m in matched_indices:
-        if(iou_matrix[m[0], m[1]]<iou_threshold):
-            unmatched_detections.append(m[0])
-            unmatched_trackers.append(m[1])
-        else:
-            matches.append(m.reshape(1,2))
-    if(len(matches)==0):
-        matches = np.empty((0,2),dtype=int)
-    else:
-        matches = np.concatenate(matches,axis=0)
-
-    return matches, np.array(unmatched_detections), np.array(unmatched_trackers)
+    return split_matches(matched_indices, iou_matrix, len(detections), len(trackers), iou_threshold)
 
 
 def associate_kitti(detections, trackers, det_cates, iou_threshold, 
@@ -335,13 +310,7 @@ def associate_kitti(detections, trackers, det_cates, iou_threshold,
     """
         With multiple categories, generate the cost for catgory mismatch
     """
-    num_dets = detections.shape[0]
-    num_trk = trackers.shape[0]
-    cate_matrix = np.zeros((num_dets, num_trk))
-    for i in range(num_dets):
-            for j in range(num_trk):
-                if det_cates[i] != trackers[j, 4]:
-                        cate_matrix[i][j] = -1e6
+    cate_matrix = np.where(np.asarray(det_cates)[:, np.newaxis] != trackers[np.newaxis, :, 4], -1e6, 0.)
     
     cost_matrix = - iou_matrix -angle_diff_cost - cate_matrix
 
@@ -354,26 +323,4 @@ def associate_kitti(detections, trackers, det_cates, iou_threshold,
     else:
         matched_indices = np.empty(shape=(0,2))
 
-    unmatched_detections = []
-    for d, det in enumerate(detections):
-        if(d not in matched_indices[:,0]):
-            unmatched_detections.append(d)
-    unmatched_trackers = []
-    for t, trk in enumerate(trackers):
-        if(t not in matched_indices[:,1]):
-            unmatched_trackers.append(t)
-
-    #filter out matched with low IOU
-    matches = []
-    for m in matched_indices:
-        if(iou_matrix[m[0], m[1]]<iou_threshold):
-            unmatched_detections.append(m[0])
-            unmatched_trackers.append(m[1])
-        else:
-            matches.append(m.reshape(1,2))
-    if(len(matches)==0):
-        matches = np.empty((0,2),dtype=int)
-    else:
-        matches = np.concatenate(matches,axis=0)
-
-    return matches, np.array(unmatched_detections), np.array(unmatched_trackers)
\ No newline at end of file
+    return split_matches(matched_indices, iou_matrix, len(detections), len(trackers), iou_threshold)
\ No newline at end of file
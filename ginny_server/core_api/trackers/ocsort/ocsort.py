@@ -5,17 +5,7 @@ from __future__ import print_function
 
 import numpy as np
 from .association import *
-
-
-def k_previous_obs(observations, cur_age, k):
-    if len(observations) == 0:
-        return [-1, -1, -1, -1, -1]
-    for i in range(k):
-        dt = k - i
-        if cur_age - dt in observations:
-            return observations[cur_age-dt]
-    max_age = max(observations.keys())
-    return observations[max_age]
+from .track_arrays import TrackArrays
 
 
 def convert_bbox_to_z(bbox):
@@ -54,111 +44,6 @@ def speed_direction(bbox1, bbox2):
     return speed / norm
 
 
-class KalmanBoxTracker(object):
-    """
-    This class represents the internal state of individual tracked objects observed as bbox.
-    """
-    count = 0
-
-    def __init__(self, bbox, delta_t=3, orig=False):
-        """
-        Initialises a tracker using initial bounding box.
-
-        """
-        # define constant velocity model
-        if not orig:
-          from .kalmanfilter import KalmanFilterNew as KalmanFilter
-          self.kf = KalmanFilter(dim_x=7, dim_z=4)
-        else:
-          from filterpy.kalman import KalmanFilter
-          self.kf = KalmanFilter(dim_x=7, dim_z=4)
-        self.kf.F = np.array([[1, 0, 0, 0, 1, 0, 0], [0, 1, 0, 0, 0, 1, 0], [0, 0, 1, 0, 0, 0, 1], [
-                            0, 0, 0, 1, 0, 0, 0],  [0, 0, 0, 0, 1, 0, 0], [0, 0, 0, 0, 0, 1, 0], [0, 0, 0, 0, 0, 0, 1]])
-        self.kf.H = np.array([[1, 0, 0, 0, 0, 0, 0], [0, 1, 0, 0, 0, 0, 0],
-                            [0, 0, 1, 0, 0, 0, 0], [0, 0, 0, 1, 0, 0, 0]])
-
-        self.kf.R[2:, 2:] *= 10.
-        self.kf.P[4:, 4:] *= 1000.  # give high uncertainty to the unobservable initial velocities
-        self.kf.P *= 10.
-        self.kf.Q[-1, -1] *= 0.01
-        self.kf.Q[4:, 4:] *= 0.01
-
-        self.kf.x[:4] = convert_bbox_to_z(bbox)
-        self.time_since_update = 0
-        self.id = KalmanBoxTracker.count
-        KalmanBoxTracker.count += 1
-        self.history = []
-        self.hits = 0
-        self.hit_streak = 0
-        self.age = 0
-        """
-        NOTE: [-1,-1,-1,-1,-1] is a compromising placeholder for non-observation status, the same for the return of 
-        function k_previous_obs. It is ugly and I do not like it. But to support generate observation array in a 
-        fast and unified way, which you would see below k_observations = np.array([k_previous_obs(...]]), let's bear it for now.
-        """
-        self.last_observation = np.array([-1, -1, -1, -1, -1])  # placeholder
-        self.observations = dict()
-        self.history_observations = []
-        self.velocity = None
-        self.delta_t = delta_t
-
-    def update(self, bbox):
-        """
-        Updates the state vector with observed bbox.
-        """
-        if bbox is not None:
-            if self.last_observation.sum() >= 0:  # no previous observation
-                previous_box = None
-                for i in range(self.delta_t):
-                    dt = self.delta_t - i
-                    if self.age - dt in self.observations:
-                        previous_box = self.observations[self.age-dt]
-                        break
-                if previous_box is None:
-                    previous_box = self.last_observation
-                """
-                  Estimate the track speed direction with observations \Delta t steps away
-                """
-                self.velocity = speed_direction(previous_box, bbox)
-            
-            """
-              Insert new observations. This is a ugly way to maintain both self.observations
-              and self.history_observations. Bear it for the moment.
-            """
-            self.last_observation = bbox
-            self.observations[self.age] = bbox
-            self.history_observations.append(bbox)
-
-            self.time_since_update = 0
-            self.history = []
-            self.hits += 1
-            self.hit_streak += 1
-            self.kf.update(convert_bbox_to_z(bbox))
-        else:
-            self.kf.update(bbox)
-
-    def predict(self):
-        """
-        Advances the state vector and returns the predicted bounding box estimate.
-        """
-        if((self.kf.x[6]+self.kf.x[2]) <= 0):
-            self.kf.x[6] *= 0.0
-
-        self.kf.predict()
-        self.age += 1
-        if(self.time_since_update > 0):
-            self.hit_streak = 0
-        self.time_since_update += 1
-        self.history.append(convert_x_to_bbox(self.kf.x))
-        return self.history[-1]
-
-    def get_state(self):
-        """
-        Returns the current bounding box estimate.
-        """
-        return convert_x_to_bbox(self.kf.x)
-
-
 """
     We support multiple ways for association cost calculation, by default
     we use IoU. GIoU may have better performance in some situations. We note 
@@ -181,14 +66,33 @@ class OCSort(object):
         self.max_age = max_age
         self.min_hits = min_hits
         self.iou_threshold = iou_threshold
-        self.trackers = []
         self.frame_count = 0
         self.det_thresh = det_thresh
         self.delta_t = delta_t
         self.asso_func = ASSO_FUNCS[asso_func]
         self.inertia = inertia
         self.use_byte = use_byte
-        KalmanBoxTracker.count = 0
+        # One row per track, the ids restart with every OCSort
+        self.tracks = TrackArrays(delta_t=delta_t, history=min_hits)
+
+    def _predict(self):
+        """
+        Predicts every track, drops the ones whose prediction is not a box and returns
+        the predictions of the others with the inputs of the association.
+        """
+        boxes = self.tracks.predict()
+        valid = np.isfinite(boxes).all(axis=1)
+        self.tracks.keep(valid)
+        trks = np.zeros((len(self.tracks), 5))
+        trks[:, :4] = boxes[valid]
+        return trks, self.tracks.velocity.copy(), self.tracks.last_observation.copy(), self.tracks.k_previous_obs()
+
+    def _output_boxes(self, observed):
+        """
+            Box per track, the recent observation where there is one, the kalman filter
+            estimate otherwise. We didn't notice significant difference between the two
+        """
+        return np.where(observed[:, np.newaxis], self.tracks.last_observation[:, :4], self.tracks.get_state())
 
     def update(self, output_results, img_info, img_size):
         """
@@ -222,31 +126,19 @@ class OCSort(object):
         dets = dets[remain_inds]
 
         # get predicted locations from existing trackers.
-        trks = np.zeros((len(self.trackers), 5))
-        to_del = []
-        ret = []
-        for t, trk in enumerate(trks):
-            pos = self.trackers[t].predict()[0]
-            trk[:] = [pos[0], pos[1], pos[2], pos[3], 0]
-            if np.any(np.isnan(pos)):
-                to_del.append(t)
-        trks = np.ma.compress_rows(np.ma.masked_invalid(trks))
-        for t in reversed(to_del):
-            self.trackers.pop(t)
-
-        velocities = np.array(
-            [trk.velocity if trk.velocity is not None else np.array((0, 0)) for trk in self.trackers])
-        last_boxes = np.array([trk.last_observation for trk in self.trackers])
-        k_observations = np.array(
-            [k_previous_obs(trk.observations, trk.age, self.delta_t) for trk in self.trackers])
+        trks, velocities, last_boxes, k_observations = self._predict()
+
+        # Observations of all the rounds go into one batched update at the end
+        obs_trks, obs_dets = [], []
 
         """
             First round of association
         """
         matched, unmatched_dets, unmatched_trks = associate(
             dets, trks, self.iou_threshold, velocities, k_observations, self.inertia)
-        for m in matched:
-            self.trackers[m[1]].update(dets[m[0], :])
+        unmatched_trks = unmatched_trks.astype(int).reshape(-1)
+        obs_trks.append(matched[:, 1])
+        obs_dets.append(dets[matched[:, 0]])
 
         """
             Second round of associaton by OCR
@@ -262,15 +154,12 @@ class OCSort(object):
                     get a higher performance especially on MOT17/MOT20 datasets. But we keep it
                     uniform here for simplicity
                 """
-                matched_indices = linear_assignment(-iou_left)
-                to_remove_trk_indices = []
-                for m in matched_indices:
-                    det_ind, trk_ind = m[0], unmatched_trks[m[1]]
-                    if iou_left[m[0], m[1]] < self.iou_threshold:
-                        continue
-                    self.trackers[trk_ind].update(dets_second[det_ind, :])
-                    to_remove_trk_indices.append(trk_ind)
-                unmatched_trks = np.setdiff1d(unmatched_trks, np.array(to_remove_trk_indices))
+                matched_indices = linear_assignment(-iou_left).reshape(-1, 2)
+                keep = iou_left[matched_indices[:, 0], matched_indices[:, 1]] >= self.iou_threshold
+                matched_indices = matched_indices[keep]
+                obs_trks.append(unmatched_trks[matched_indices[:, 1]])
+                obs_dets.append(dets_second[matched_indices[:, 0]])
+                unmatched_trks = np.setdiff1d(unmatched_trks, unmatched_trks[matched_indices[:, 1]])
 
         if unmatched_dets.shape[0] > 0 and unmatched_trks.shape[0] > 0:
             left_dets = dets[unmatched_dets]
@@ -283,45 +172,32 @@ class OCSort(object):
                     get a higher performance especially on MOT17/MOT20 datasets. But we keep it
                     uniform here for simplicity
                 """
-                rematched_indices = linear_assignment(-iou_left)
-                to_remove_det_indices = []
-                to_remove_trk_indices = []
-                for m in rematched_indices:
-                    det_ind, trk_ind = unmatched_dets[m[0]], unmatched_trks[m[1]]
-                    if iou_left[m[0], m[1]] < self.iou_threshold:
-                        continue
-                    self.trackers[trk_ind].update(dets[det_ind, :])
-                    to_remove_det_indices.append(det_ind)
-                    to_remove_trk_indices.append(trk_ind)
-                unmatched_dets = np.setdiff1d(unmatched_dets, np.array(to_remove_det_indices))
-                unmatched_trks = np.setdiff1d(unmatched_trks, np.array(to_remove_trk_indices))
-
-        for m in unmatched_trks:
-            self.trackers[m].update(None)
+                rematched_indices = linear_assignment(-iou_left).reshape(-1, 2)
+                keep = iou_left[rematched_indices[:, 0], rematched_indices[:, 1]] >= self.iou_threshold
+                det_inds = unmatched_dets[rematched_indices[keep, 0]]
+                trk_inds = unmatched_trks[rematched_indices[keep, 1]]
+                obs_trks.append(trk_inds)
+                obs_dets.append(dets[det_inds])
+                unmatched_dets = np.setdiff1d(unmatched_dets, det_inds)
+                unmatched_trks = np.setdiff1d(unmatched_trks, trk_inds)
+
+        self.tracks.update(np.concatenate(obs_trks), np.concatenate(obs_dets).reshape(-1, 5))
+        self.tracks.miss(unmatched_trks)
 
         # create and initialise new trackers for unmatched detections
-        for i in unmatched_dets:
-            trk = KalmanBoxTracker(dets[i, :], delta_t=self.delta_t)
-            self.trackers.append(trk)
-        i = len(self.trackers)
-        for trk in reversed(self.trackers):
-            if trk.last_observation.sum() < 0:
-                d = trk.get_state()[0]
-            else:
-                """
-                    this is optional to use the recent observation or the kalman filter prediction,
-                    we didn't notice significant difference here
-                """
-                d = trk.last_observation[:4]
-            if (trk.time_since_update < 1) and (trk.hit_streak >= self.min_hits or self.frame_count <= self.min_hits):
-                # +1 as MOT benchmark requires positive
-                ret.append(np.concatenate((d, [trk.id+1])).reshape(1, -1))
-            i -= 1
-            # remove dead tracklet
-            if(trk.time_since_update > self.max_age):
-                self.trackers.pop(i)
+        self.tracks.add(dets[unmatched_dets.astype(int)])
+
+        tracks = self.tracks
+        boxes = self._output_boxes(tracks.last_observation.sum(axis=1) >= 0)
+        shown = (tracks.time_since_update < 1) & \
+            ((tracks.hit_streak >= self.min_hits) | (self.frame_count <= self.min_hits))
+        # +1 as MOT benchmark requires positive, newest track first
+        ret = np.concatenate((boxes, tracks.ids[:, np.newaxis] + 1), axis=1)[shown][::-1]
+
+        # remove dead tracklet
+        tracks.keep(tracks.time_since_update <= self.max_age)
         if(len(ret) > 0):
-            return np.concatenate(ret)
+            return ret
         return np.empty((0, 5))
 
     def update_public(self, dets, cates, scores):
@@ -335,28 +211,13 @@ class OCSort(object):
         cates = cates[remain_inds]
         dets = dets[remain_inds]
 
-        trks = np.zeros((len(self.trackers), 5))
-        to_del = []
-        ret = []
-        for t, trk in enumerate(trks):
-            pos = self.trackers[t].predict()[0]
-            cat = self.trackers[t].cate
-            trk[:] = [pos[0], pos[1], pos[2], pos[3], cat]
-            if np.any(np.isnan(pos)):
-                to_del.append(t)
-        trks = np.ma.compress_rows(np.ma.masked_invalid(trks))
-        for t in reversed(to_del):
-            self.trackers.pop(t)
-
-        velocities = np.array([trk.velocity if trk.velocity is not None else np.array((0,0)) for trk in self.trackers])
-        last_boxes = np.array([trk.last_observation for trk in self.trackers])
-        k_observations = np.array([k_previous_obs(trk.observations, trk.age, self.delta_t) for trk in self.trackers])
+        trks, velocities, last_boxes, k_observations = self._predict()
+        trks[:, 4] = self.tracks.cate
 
         matched, unmatched_dets, unmatched_trks = associate_kitti\
               (dets, trks, cates, self.iou_threshold, velocities, k_observations, self.inertia)
-          
-        for m in matched:
-            self.trackers[m[1]].update(dets[m[0], :])
+        unmatched_trks = unmatched_trks.astype(int).reshape(-1)
+        obs_trks, obs_dets = [matched[:, 1]], [dets[matched[:, 0]]]
           
         if unmatched_dets.shape[0] > 0 and unmatched_trks.shape[0] > 0:
             """
@@ -366,66 +227,47 @@ class OCSort(object):
             """
             left_dets = dets[unmatched_dets]
             left_trks = last_boxes[unmatched_trks]
-            left_dets_c = left_dets.copy()
-            left_trks_c = left_trks.copy()
 
-            iou_left = self.asso_func(left_dets_c, left_trks_c)
+            iou_left = self.asso_func(left_dets, left_trks)
             iou_left = np.array(iou_left)
+            """
+                For some datasets, such as KITTI, there are different categories,
+                we have to avoid associate them together.
+            """
             det_cates_left = cates[unmatched_dets]
             trk_cates_left = trks[unmatched_trks][:,4]
-            num_dets = unmatched_dets.shape[0]
-            num_trks = unmatched_trks.shape[0]
-            cate_matrix = np.zeros((num_dets, num_trks))
-            for i in range(num_dets):
-                for j in range(num_trks):
-                    if det_cates_left[i] != trk_cates_left[j]:
-                            """
-                                For some datasets, such as KITTI, there are different categories,
-                                we have to avoid associate them together.
-                            """
-                            cate_matrix[i][j] = -1e6
-            iou_left = iou_left + cate_matrix
+            iou_left = iou_left + np.where(det_cates_left[:, np.newaxis] != trk_cates_left[np.newaxis, :], -1e6, 0.)
             if iou_left.max() > self.iou_threshold - 0.1:
-                rematched_indices = linear_assignment(-iou_left)
-                to_remove_det_indices = []
-                to_remove_trk_indices = []
-                for m in rematched_indices:
-                    det_ind, trk_ind = unmatched_dets[m[0]], unmatched_trks[m[1]]
-                    if iou_left[m[0], m[1]] < self.iou_threshold - 0.1:
-                          continue
-                    self.trackers[trk_ind].update(dets[det_ind, :])
-                    to_remove_det_indices.append(det_ind)
-                    to_remove_trk_indices.append(trk_ind) 
-                unmatched_dets = np.setdiff1d(unmatched_dets, np.array(to_remove_det_indices))
-                unmatched_trks = np.setdiff1d(unmatched_trks, np.array(to_remove_trk_indices))
-
-        for i in unmatched_dets:
-            trk = KalmanBoxTracker(dets[i,:])
-            trk.cate = cates[i]
-            self.trackers.append(trk)
-        i = len(self.trackers)
-
-        for trk in reversed(self.trackers):
-            if trk.last_observation.sum() > 0:
-                d = trk.last_observation[:4]
-            else:
-                d = trk.get_state()[0]
-            if (trk.time_since_update < 1):
-                if (self.frame_count <= self.min_hits) or (trk.hit_streak >= self.min_hits):
-                    # id+1 as MOT benchmark requires positive
-                    ret.append(np.concatenate((d, [trk.id+1], [trk.cate], [0])).reshape(1,-1)) 
-                if trk.hit_streak == self.min_hits:
-                    # Head Padding (HP): recover the lost steps during initializing the track
-                    for prev_i in range(self.min_hits - 1):
-                        prev_observation = trk.history_observations[-(prev_i+2)]
-                        ret.append((np.concatenate((prev_observation[:4], [trk.id+1], [trk.cate], 
-                            [-(prev_i+1)]))).reshape(1,-1))
-            i -= 1 
-            if (trk.time_since_update > self.max_age):
-                  self.trackers.pop(i)
-        
+                rematched_indices = linear_assignment(-iou_left).reshape(-1, 2)
+                keep = iou_left[rematched_indices[:, 0], rematched_indices[:, 1]] >= self.iou_threshold - 0.1
+                det_inds = unmatched_dets[rematched_indices[keep, 0]]
+                trk_inds = unmatched_trks[rematched_indices[keep, 1]]
+                obs_trks.append(trk_inds)
+                obs_dets.append(dets[det_inds])
+                unmatched_dets = np.setdiff1d(unmatched_dets, det_inds)
+                unmatched_trks = np.setdiff1d(unmatched_trks, trk_inds)
+
+        # Unmatched tracks are not marked as missed here, so there is no re-update
+        self.tracks.update(np.concatenate(obs_trks), np.concatenate(obs_dets).reshape(-1, 5))
+
+        unmatched_dets = unmatched_dets.astype(int)
+        self.tracks.add(dets[unmatched_dets], cates[unmatched_dets])
+
+        tracks = self.tracks
+        boxes = self._output_boxes(tracks.last_observation.sum(axis=1) > 0)
+        ret = []
+        for i in reversed(np.where(tracks.time_since_update < 1)[0]):
+            track_id, cate = tracks.ids[i] + 1, tracks.cate[i]
+            if (self.frame_count <= self.min_hits) or (tracks.hit_streak[i] >= self.min_hits):
+                # id+1 as MOT benchmark requires positive
+                ret.append(np.concatenate((boxes[i], [track_id], [cate], [0])).reshape(1,-1)) 
+            if tracks.hit_streak[i] == self.min_hits:
+                # Head Padding (HP): recover the lost steps during initializing the track
+                for prev_i, prev_observation in enumerate(tracks.previous_observations(i, self.min_hits - 1)):
+                    ret.append((np.concatenate((prev_observation[:4], [track_id], [cate], 
+                        [-(prev_i+1)]))).reshape(1,-1))
+
+        tracks.keep(tracks.time_since_update <= self.max_age)
         if(len(ret)>0):
             return np.concatenate(ret)
         return np.empty((0, 7))
-
-
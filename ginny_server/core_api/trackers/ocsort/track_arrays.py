@@ -0,0 +1,265 @@
+"""
+    Struct-of-arrays state of every OC-SORT track, the Kalman filters of all
+    the tracks are predicted and updated together with batched numpy ops
+    instead of one KalmanFilterNew object per track.
+"""
+import numpy as np
+
+
+# Constant velocity model over [x, y, s, r, vx, vy, vs]
+_F = np.array([[1, 0, 0, 0, 1, 0, 0], [0, 1, 0, 0, 0, 1, 0], [0, 0, 1, 0, 0, 0, 1], [
+               0, 0, 0, 1, 0, 0, 0], [0, 0, 0, 0, 1, 0, 0], [0, 0, 0, 0, 0, 1, 0], [0, 0, 0, 0, 0, 0, 1]], dtype=float)
+_R = np.eye(4)
+_R[2:, 2:] *= 10.
+_P0 = np.eye(7)
+_P0[4:, 4:] *= 1000.  # give high uncertainty to the unobservable initial velocities
+_P0 *= 10.
+_Q = np.eye(7)
+_Q[-1, -1] *= 0.01
+_Q[4:, 4:] *= 0.01
+_I = np.eye(7)
+
+
+def bbox_to_z(bboxes):
+    """ [x1,y1,x2,y2,...] rows to [x,y,s,r] rows, see convert_bbox_to_z """
+    w = bboxes[:, 2] - bboxes[:, 0]
+    h = bboxes[:, 3] - bboxes[:, 1]
+    return np.stack([bboxes[:, 0] + w/2., bboxes[:, 1] + h/2., w * h, w / (h+1e-6)], axis=1)
+
+
+def x_to_bbox(x):
+    """ [x,y,s,r,...] rows to [x1,y1,x2,y2] rows, see convert_x_to_bbox """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        w = np.sqrt(x[:, 2] * x[:, 3])
+        h = x[:, 2] / w
+    return np.stack([x[:, 0]-w/2., x[:, 1]-h/2., x[:, 0]+w/2., x[:, 1]+h/2.], axis=1)
+
+
+def speed_direction_rows(bboxes1, bboxes2):
+    """ speed_direction of every row pair """
+    cx1, cy1 = (bboxes1[:, 0]+bboxes1[:, 2]) / 2.0, (bboxes1[:, 1]+bboxes1[:, 3]) / 2.0
+    cx2, cy2 = (bboxes2[:, 0]+bboxes2[:, 2]) / 2.0, (bboxes2[:, 1]+bboxes2[:, 3]) / 2.0
+    speed = np.stack([cy2-cy1, cx2-cx1], axis=1)
+    norm = np.sqrt((cy2-cy1)**2 + (cx2-cx1)**2) + 1e-6
+    return speed / norm[:, np.newaxis]
+
+
+def kf_predict(x, P):
+    """ Kalman predict of stacked states x (M,7) and covariances P (M,7,7) """
+    return x @ _F.T, _F @ P @ _F.T + _Q
+
+
+def kf_update(x, P, z):
+    """ Kalman update of stacked states with measurements z (M,4), H picks [x,y,s,r] """
+    y = z - x[:, :4]
+    PHT = P[:, :, :4]
+    S = PHT[:, :4, :] + _R
+    K = PHT @ np.linalg.inv(S)
+    x = x + (K @ y[:, :, np.newaxis])[:, :, 0]
+
+    KH = np.zeros_like(P)
+    KH[:, :, :4] = K
+    I_KH = _I - KH
+    # Joseph form, more numerically stable than (I-KH)P
+    P = I_KH @ P @ I_KH.transpose(0, 2, 1) + K @ _R @ K.transpose(0, 2, 1)
+    return x, P
+
+
+class TrackArrays(object):
+    """
+    All the tracks of one OCSort, row i of every array is track i. Rows keep
+    the order the tracks were created in, dead tracks are compacted away.
+
+    Besides the filter it keeps what KalmanBoxTracker kept per track:
+    - the last delta_t+1 observations in a ring indexed by age, enough for
+      k_previous_obs, and the last `history` observations for head padding
+    - the filter state saved on the first missed frame, when the track is
+      found again the filter is re-updated along a straight line between
+      the two observations (the observation-centric re-update of OC-SORT)
+    """
+
+    _FIELDS = ("x", "P", "ids", "age", "time_since_update", "hits", "hit_streak",
+               "last_observation", "velocity", "cate", "obs", "obs_age", "hist",
+               "observed", "saved", "saved_x", "saved_P", "update_count",
+               "last_z", "last_z_index")
+
+    def __init__(self, delta_t=3, history=1, capacity=64):
+        self.delta_t = delta_t
+        self.ring = delta_t + 1
+        self.history = max(history, 1)
+        self.count = 0
+        self.n = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        old = {name: getattr(self, "_" + name) for name in self._FIELDS} if self.n else None
+        self.capacity = capacity
+        self._x = np.zeros((capacity, 7))
+        self._P = np.zeros((capacity, 7, 7))
+        self._ids = np.zeros(capacity, dtype=int)
+        self._age = np.zeros(capacity, dtype=int)
+        self._time_since_update = np.zeros(capacity, dtype=int)
+        self._hits = np.zeros(capacity, dtype=int)
+        self._hit_streak = np.zeros(capacity, dtype=int)
+        self._last_observation = np.full((capacity, 5), -1.)
+        self._velocity = np.zeros((capacity, 2))
+        self._cate = np.zeros(capacity)
+        self._obs = np.full((capacity, self.ring, 5), -1.)
+        self._obs_age = np.full((capacity, self.ring), -1, dtype=int)
+        self._hist = np.full((capacity, self.history, 5), -1.)
+        self._observed = np.zeros(capacity, dtype=bool)
+        self._saved = np.zeros(capacity, dtype=bool)
+        self._saved_x = np.zeros((capacity, 7))
+        self._saved_P = np.zeros((capacity, 7, 7))
+        self._update_count = np.zeros(capacity, dtype=int)
+        self._last_z = np.zeros((capacity, 4))
+        self._last_z_index = np.full(capacity, -1, dtype=int)
+        if old is not None:
+            for name, values in old.items():
+                getattr(self, "_" + name)[:self.n] = values[:self.n]
+
+    def __len__(self):
+        return self.n
+
+    def __getattr__(self, name):
+        # Views over the live rows, tracks.x is self._x[:n]
+        if name in TrackArrays._FIELDS:
+            return self.__dict__["_" + name][:self.n]
+        raise AttributeError(name)
+
+    def add(self, bboxes, cates=None):
+        """ New tracks for the rows of bboxes, in order """
+        m = len(bboxes)
+        if m == 0:
+            return
+        if self.n + m > self.capacity:
+            self._allocate(max(2 * self.capacity, self.n + m))
+
+        new = slice(self.n, self.n + m)
+        self._x[new] = 0.
+        self._x[new, :4] = bbox_to_z(bboxes)
+        self._P[new] = _P0
+        self._ids[new] = np.arange(self.count, self.count + m)
+        self.count += m
+        for name in ("age", "time_since_update", "hits", "hit_streak", "update_count"):
+            getattr(self, "_" + name)[new] = 0
+        self._last_observation[new] = -1.
+        self._velocity[new] = 0.
+        self._cate[new] = 0. if cates is None else cates
+        self._obs[new] = -1.
+        self._obs_age[new] = -1
+        self._hist[new] = -1.
+        self._observed[new] = False
+        self._saved[new] = False
+        self._last_z_index[new] = -1
+        self.n += m
+
+    def keep(self, mask):
+        """ Drops the tracks where mask is False, the others keep their order """
+        kept = int(mask.sum())
+        if kept == self.n:
+            return
+        for name in self._FIELDS:
+            array = getattr(self, "_" + name)
+            array[:kept] = array[:self.n][mask]
+        self.n = kept
+
+    def predict(self):
+        """ Advances every track a frame, returns the predicted boxes (n,4) """
+        x = self.x
+        x[(x[:, 6] + x[:, 2]) <= 0, 6] = 0.
+        self.x[:], self.P[:] = kf_predict(x, self.P)
+        self.age[:] += 1
+        self.hit_streak[self.time_since_update > 0] = 0
+        self.time_since_update[:] += 1
+        return x_to_bbox(self.x)
+
+    def get_state(self):
+        return x_to_bbox(self.x)
+
+    def k_previous_obs(self, rows=None):
+        """
+            Per track the observation delta_t frames back, or the closest one
+            after it, or the last one, [-1,-1,-1,-1,-1] without observations
+        """
+        rows = np.arange(self.n) if rows is None else rows
+        result = self.last_observation[rows].copy()
+        found = np.zeros(len(rows), dtype=bool)
+        for dt in range(self.delta_t, 0, -1):
+            ages = self.age[rows] - dt
+            slots = ages % self.ring
+            hit = ~found & (ages >= 0) & (self.obs_age[rows, slots] == ages)
+            result[hit] = self.obs[rows[hit], slots[hit]]
+            found |= hit
+        return result
+
+    def update(self, rows, bboxes):
+        """ Tracks `rows` observed bboxes (M,5) this frame, each row at most once """
+        rows = np.asarray(rows, dtype=int)
+        if len(rows) == 0:
+            return
+
+        # Speed direction from the observation delta_t frames back
+        moving = self.last_observation[rows].sum(axis=1) >= 0
+        if moving.any():
+            previous = self.k_previous_obs(rows[moving])
+            self.velocity[rows[moving]] = speed_direction_rows(previous, bboxes[moving])
+
+        self.last_observation[rows] = bboxes
+        slots = self.age[rows] % self.ring
+        self.obs[rows, slots] = bboxes
+        self.obs_age[rows, slots] = self.age[rows]
+        self.hist[rows, self.hits[rows] % self.history] = bboxes
+        self.time_since_update[rows] = 0
+        self.hits[rows] += 1
+        self.hit_streak[rows] += 1
+
+        z = bbox_to_z(bboxes)
+        for i in np.where(~self.observed[rows] & self.saved[rows])[0]:
+            self._reupdate(rows[i], z[i])
+
+        self.x[rows], self.P[rows] = kf_update(self.x[rows], self.P[rows], z)
+        self.observed[rows] = True
+        self.last_z[rows] = z
+        self.last_z_index[rows] = self.update_count[rows]
+        self.update_count[rows] += 1
+
+    def _reupdate(self, row, z):
+        """
+            Back to the state of the first missed frame and update along a
+            virtual trajectory, linear between the last observation and z
+        """
+        x, P = self.saved_x[row:row+1], self.saved_P[row:row+1]
+        x1, y1, s1, r1 = self.last_z[row]
+        x2, y2, s2, r2 = z
+        w1, h1 = np.sqrt(s1 * r1), np.sqrt(s1 / r1)
+        w2, h2 = np.sqrt(s2 * r2), np.sqrt(s2 / r2)
+        time_gap = self.update_count[row] - self.last_z_index[row]
+
+        steps = np.arange(1, time_gap + 1)
+        w = w1 + steps * ((w2-w1)/time_gap)
+        h = h1 + steps * ((h2-h1)/time_gap)
+        virtual = np.stack([x1 + steps * ((x2-x1)/time_gap), y1 + steps * ((y2-y1)/time_gap), w * h, w / h], axis=1)
+        for i in range(time_gap):
+            x, P = kf_update(x, P, virtual[i:i+1])
+            if i != time_gap - 1:
+                x, P = kf_predict(x, P)
+        self.x[row], self.P[row] = x[0], P[0]
+
+    def miss(self, rows):
+        """ Tracks `rows` got no observation this frame """
+        rows = np.asarray(rows, dtype=int).reshape(-1)
+        if len(rows) == 0:
+            return
+        # The state on the first missed frame is kept for the re-update
+        freeze = rows[self.observed[rows]]
+        self.saved_x[freeze] = self.x[freeze]
+        self.saved_P[freeze] = self.P[freeze]
+        self.saved[freeze] = True
+        self.observed[rows] = False
+        self.update_count[rows] += 1
+
+    def previous_observations(self, row, k):
+        """ The k observations before the last one of a track, latest first """
+        hits = self.hits[row]
+        return [self.hist[row, (hits - 2 - i) % self.history] for i in range(k)]
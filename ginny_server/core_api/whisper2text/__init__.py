@@ -1 +1,4 @@
 from .whisper import _WhisperSpeech2Text
+from .audio import pcm_to_float32
+from .backends import ASRBackend, load_backend
+from .streaming import StreamingTranscriber
@@ -0,0 +1,72 @@
+import numpy as np
+from math import gcd
+from scipy.signal import resample_poly
+
+WHISPER_SAMPLE_RATE = 16000
+
+# Bytes per sample for the encodings the robot sends in AudioImgRequest
+SAMPLE_WIDTHS = {
+    "PCM_8": 1,
+    "PCM_16": 2,
+    "PCM_24": 3,
+    "PCM_32": 4
+}
+
+def _samples_from_bytes(pcm: bytes, sample_width: int) -> np.ndarray:
+    """Interleaved little endian PCM samples scaled to float32 in [-1, 1)."""
+    if sample_width == 1:
+        # 8 bit WAV PCM is unsigned with 128 as silence
+        raw = np.frombuffer(pcm, dtype=np.uint8)
+        return (raw.astype(np.float32) - 128.0) / 128.0
+    if sample_width == 2:
+        return np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+    if sample_width == 3:
+        raw = np.frombuffer(pcm, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        samples = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        samples = np.where(samples & 0x800000, samples - 0x1000000, samples)
+        return samples.astype(np.float32) / 8388608.0
+    if sample_width == 4:
+        return (np.frombuffer(pcm, dtype="<i4").astype(np.float64) / 2147483648.0).astype(np.float32)
+    raise ValueError(f"Unsupported sample width {sample_width}")
+
+def pcm_to_float32(pcm: bytes,
+                   encoding: str,
+                   num_channels: int,
+                   sample_rate: int,
+                   target_rate: int = WHISPER_SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode raw PCM bytes into the mono float32 waveform Whisper expects, without
+    going through a file or ffmpeg.
+
+    Args:
+        pcm (bytes): Interleaved little endian PCM frames.
+        encoding (str): One of PCM_8, PCM_16, PCM_24, PCM_32.
+        num_channels (int): Channels interleaved in `pcm`, averaged down to mono.
+        sample_rate (int): Sample rate of `pcm`.
+        target_rate (int): Sample rate to resample to.
+
+    Returns:
+        np.ndarray: 1D float32 array sampled at `target_rate`.
+    """
+    sample_width = SAMPLE_WIDTHS.get(encoding)
+    if sample_width is None:
+        raise ValueError(f"Unsupported audio encoding {encoding}")
+    num_channels = max(int(num_channels), 1)
+
+    # A torn last frame would shift every channel after it
+    frame_bytes = sample_width * num_channels
+    pcm = pcm[:len(pcm) - len(pcm) % frame_bytes]
+
+    samples = _samples_from_bytes(pcm, sample_width)
+    if num_channels > 1:
+        samples = samples.reshape(-1, num_channels).mean(axis=1)
+
+    return resample(samples, sample_rate, target_rate)
+
+def resample(samples: np.ndarray, sample_rate: int, target_rate: int = WHISPER_SAMPLE_RATE) -> np.ndarray:
+    """Polyphase resampling of a mono waveform, returned as contiguous float32."""
+    if sample_rate != target_rate and samples.size:
+        divisor = gcd(int(sample_rate), int(target_rate))
+        samples = resample_poly(samples, target_rate // divisor, sample_rate // divisor)
+
+    return np.ascontiguousarray(samples, dtype=np.float32)
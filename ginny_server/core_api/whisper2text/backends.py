@@ -0,0 +1,168 @@
+import os
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+from .audio import WHISPER_SAMPLE_RATE
+from .streaming import Word
+
+# Engine used when ASR_ENGINE is not set
+DEFAULT_ENGINE = "whisper"
+DEFAULT_MODEL = "large-v3"
+
+def resolve_device(device: Optional[str] = None) -> str:
+    """Map "auto" (or nothing) to cuda when a GPU is visible and cpu otherwise."""
+    if device and device != "auto":
+        return device
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+class ASRBackend(ABC):
+    """
+    Common interface of the speech to text engines.
+
+    Every backend takes a 16 kHz mono float32 waveform, `transcribe` returns the
+    text and `transcribe_words` the words with their timings, which is what the
+    StreamingTranscriber needs.
+    """
+    name = "base"
+
+    def __init__(self, model_name: str, device: str):
+        self.model_name = model_name
+        self.device = device
+
+    @abstractmethod
+    def transcribe(self, audio: np.ndarray, prompt: Optional[str] = None) -> str:
+        ...
+
+    @abstractmethod
+    def transcribe_words(self, audio: np.ndarray, prompt: Optional[str] = None) -> List[Word]:
+        ...
+
+    def warm_up(self):
+        """
+        Run one decode on a second of noise so the first real turn does not pay
+        for CUDA context creation, kernel selection and lazy allocations.
+        """
+        rng = np.random.default_rng(0)
+        noise = (rng.standard_normal(WHISPER_SAMPLE_RATE) * 1e-3).astype(np.float32)
+        self.transcribe(noise)
+
+    def __repr__(self):
+        return f"{self.name}:{self.model_name}@{self.device}"
+
+class OpenAIWhisperBackend(ASRBackend):
+    """The reference openai-whisper implementation running in PyTorch."""
+    name = "whisper"
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, device: str = "auto"):
+        import whisper
+        import torch
+
+        super().__init__(model_name, resolve_device(device))
+        self.torch = torch
+        self.model = whisper.load_model(model_name, device=torch.device(self.device))
+        # fp16 is not supported on CPU, whisper would warn on every call
+        self.fp16 = self.device.startswith("cuda")
+
+    def _transcribe(self, audio: np.ndarray, prompt: Optional[str], word_timestamps: bool):
+        return self.model.transcribe(
+            self.torch.from_numpy(audio).float(),
+            language='en',
+            fp16=self.fp16,
+            word_timestamps=word_timestamps,
+            initial_prompt=prompt,
+            condition_on_previous_text=False
+        )
+
+    def transcribe(self, audio: np.ndarray, prompt: Optional[str] = None) -> str:
+        return self._transcribe(audio, prompt, word_timestamps=False)["text"]
+
+    def transcribe_words(self, audio: np.ndarray, prompt: Optional[str] = None) -> List[Word]:
+        result = self._transcribe(audio, prompt, word_timestamps=True)
+        return [
+            (word["word"], word["start"], word["end"])
+            for segment in result["segments"]
+            for word in segment.get("words", [])
+        ]
+
+class FasterWhisperBackend(ASRBackend):
+    """
+    Whisper converted to CTranslate2, with int8 weights it runs several times
+    faster than PyTorch on CPU hosts.
+    """
+    name = "faster-whisper"
+
+    def __init__(self,
+                 model_name: str = DEFAULT_MODEL,
+                 device: str = "auto",
+                 compute_type: Optional[str] = None,
+                 cpu_threads: int = 0):
+        from faster_whisper import WhisperModel
+
+        super().__init__(model_name, resolve_device(device))
+        if compute_type is None:
+            compute_type = "float16" if self.device == "cuda" else "int8"
+        self.compute_type = compute_type
+        self.model = WhisperModel(
+            model_name,
+            device=self.device,
+            compute_type=compute_type,
+            cpu_threads=cpu_threads
+        )
+
+    def _segments(self, audio: np.ndarray, prompt: Optional[str], word_timestamps: bool):
+        segments, _ = self.model.transcribe(
+            audio,
+            language="en",
+            beam_size=5,
+            word_timestamps=word_timestamps,
+            initial_prompt=prompt,
+            condition_on_previous_text=False
+        )
+        # The segments are a lazy generator, decoding happens while iterating
+        return list(segments)
+
+    def transcribe(self, audio: np.ndarray, prompt: Optional[str] = None) -> str:
+        return "".join(segment.text for segment in self._segments(audio, prompt, False))
+
+    def transcribe_words(self, audio: np.ndarray, prompt: Optional[str] = None) -> List[Word]:
+        return [
+            (word.word, word.start, word.end)
+            for segment in self._segments(audio, prompt, True)
+            for word in (segment.words or [])
+        ]
+
+    def __repr__(self):
+        return f"{self.name}:{self.model_name}@{self.device}/{self.compute_type}"
+
+BACKENDS = {
+    OpenAIWhisperBackend.name: OpenAIWhisperBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+}
+
+def load_backend(engine: Optional[str] = None,
+                 model_name: Optional[str] = None,
+                 device: Optional[str] = None,
+                 compute_type: Optional[str] = None) -> ASRBackend:
+    """
+    Build an ASR backend, every argument left as None is read from the
+    environment: ASR_ENGINE, ASR_MODEL, ASR_DEVICE and ASR_COMPUTE_TYPE.
+
+    Args:
+        engine (str): "whisper" or "faster-whisper".
+        model_name (str): Model size or path, e.g. large-v3, medium.en, small.en.
+        device (str): cpu, cuda or auto.
+        compute_type (str): CTranslate2 quantisation (int8, int8_float16,
+            float16...), only used by faster-whisper.
+    """
+    engine = engine or os.getenv("ASR_ENGINE", DEFAULT_ENGINE)
+    model_name = model_name or os.getenv("ASR_MODEL", DEFAULT_MODEL)
+    device = device or os.getenv("ASR_DEVICE", "auto")
+    compute_type = compute_type or os.getenv("ASR_COMPUTE_TYPE")
+
+    if engine not in BACKENDS:
+        raise ValueError(f"Unknown ASR engine {engine}, expected one of {list(BACKENDS)}")
+    if engine == FasterWhisperBackend.name:
+        return FasterWhisperBackend(model_name, device, compute_type)
+    return OpenAIWhisperBackend(model_name, device)
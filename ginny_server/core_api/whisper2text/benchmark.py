@@ -0,0 +1,104 @@
+"""
+Real-time factor of the ASR backends on a fixed corpus.
+
+The corpus is a directory of .wav files, a .txt file with the same stem is
+used as reference transcript when present and the word error rate is reported
+next to the speed. Run from ginny_server:
+
+    python -m core_api.whisper2text.benchmark --corpus ./asr_corpus \
+        --backends whisper:large-v3 faster-whisper:large-v3:int8 faster-whisper:small.en:int8
+"""
+import re
+import time
+import argparse
+import numpy as np
+import soundfile as sf
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .audio import WHISPER_SAMPLE_RATE, resample
+from .backends import load_backend
+
+def load_corpus(corpus_dir: Path) -> List[Tuple[str, np.ndarray, Optional[str]]]:
+    corpus = []
+    for wav_path in sorted(corpus_dir.glob("*.wav")):
+        samples, sample_rate = sf.read(str(wav_path), dtype="float32", always_2d=True)
+        audio = resample(samples.mean(axis=1), sample_rate)
+        ref_path = wav_path.with_suffix(".txt")
+        reference = ref_path.read_text().strip() if ref_path.exists() else None
+        corpus.append((wav_path.name, audio, reference))
+    return corpus
+
+def _words(text: str) -> List[str]:
+    return re.sub(r"[^a-z0-9' ]", " ", text.lower()).split()
+
+def word_errors(reference: str, hypothesis: str) -> Tuple[int, int]:
+    """Word level edit distance and number of reference words."""
+    ref, hyp = _words(reference), _words(hypothesis)
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (r != h))
+    return row[-1], len(ref)
+
+def benchmark(spec: str, corpus, device: Optional[str], repeats: int):
+    engine, _, rest = spec.partition(":")
+    model_name, _, compute_type = rest.partition(":")
+
+    load_start = time.perf_counter()
+    backend = load_backend(engine, model_name or None, device, compute_type or None)
+    load_time = time.perf_counter() - load_start
+
+    warm_start = time.perf_counter()
+    backend.warm_up()
+    warm_time = time.perf_counter() - warm_start
+
+    audio_seconds = 0.0
+    decode_seconds = 0.0
+    errors, ref_words = 0, 0
+    for name, audio, reference in corpus:
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            text = backend.transcribe(audio)
+            timings.append(time.perf_counter() - start)
+        duration = audio.shape[0] / WHISPER_SAMPLE_RATE
+        decode = float(np.median(timings))
+        audio_seconds += duration
+        decode_seconds += decode
+
+        if reference is not None:
+            e, n = word_errors(reference, text)
+            errors += e
+            ref_words += n
+        print(f"  {name:<30} {duration:6.2f}s audio  RTF {decode / duration:.3f}  {text.strip()[:60]}")
+
+    wer = f"{errors / ref_words:.3f}" if ref_words else "n/a"
+    print(f"{backend}: load {load_time:.1f}s, warm-up {warm_time:.2f}s, "
+          f"RTF {decode_seconds / max(audio_seconds, 1e-9):.3f}, WER {wer}")
+    return backend
+
+def main():
+    parser = argparse.ArgumentParser(description="ASR backend real-time factor benchmark")
+    parser.add_argument("--corpus", type=str, required=True, help="Directory of .wav files (and optional .txt references)")
+    parser.add_argument("--backends", type=str, nargs="+", default=["whisper:large-v3"],
+                        help="engine:model[:compute_type] specs to compare")
+    parser.add_argument("--device", type=str, default=None, help="cpu, cuda or auto")
+    parser.add_argument("--repeats", type=int, default=3, help="Decodes per file, the median is used")
+    args = parser.parse_args()
+
+    corpus = load_corpus(Path(args.corpus))
+    if not corpus:
+        print(f"No .wav files found in {args.corpus}")
+        return
+    total = sum(audio.shape[0] for _, audio, _ in corpus) / WHISPER_SAMPLE_RATE
+    print(f"Corpus of {len(corpus)} files, {total:.1f}s of audio")
+
+    for spec in args.backends:
+        print(f"\n{spec}")
+        backend = benchmark(spec, corpus, args.device, args.repeats)
+        del backend
+
+if __name__ == "__main__":
+    main()
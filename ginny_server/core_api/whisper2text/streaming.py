@@ -0,0 +1,128 @@
+import string
+import numpy as np
+from typing import Callable, List, Optional, Tuple
+
+from .audio import WHISPER_SAMPLE_RATE
+
+# (word, start, end) with the times in seconds from the start of the utterance
+Word = Tuple[str, float, float]
+
+def _normalize(word: str) -> str:
+    return word.strip().lower().strip(string.punctuation)
+
+class StreamingTranscriber:
+    """
+    Incremental transcription of one utterance while it is being captured.
+
+    Audio is decoded again every `step_s` seconds of new audio, and words are
+    committed with the LocalAgreement policy: a word is final once two
+    consecutive hypotheses agree on it. The audio up to the end of the last
+    committed word is dropped and the committed text is passed as prompt, so
+    every decode, and in particular the one at end of speech, only covers the
+    uncommitted tail of the utterance.
+
+    With a `vad` no decode runs until speech started, and the silence in front
+    of it is dropped.
+    """
+
+    def __init__(self,
+                 transcribe_words: Callable[[np.ndarray, Optional[str]], List[Word]],
+                 step_s: float = 1.0,
+                 min_audio_s: float = 0.5,
+                 prompt_words: int = 30,
+                 sample_rate: int = WHISPER_SAMPLE_RATE,
+                 vad=None):
+        """
+        Args:
+            transcribe_words (Callable): Decodes a float32 waveform, given an optional
+                prompt, into (word, start, end) tuples relative to the waveform.
+            step_s (float): Seconds of new audio between two decodes.
+            min_audio_s (float): Audio needed before the first decode.
+            prompt_words (int): Committed words passed back as prompt.
+            sample_rate (int): Sample rate of the fed audio.
+            vad (Optional[VoiceActivityDetector]): Detector gating the decodes.
+        """
+        self.transcribe_words = transcribe_words
+        self.step = int(step_s * sample_rate)
+        self.min_audio = int(min_audio_s * sample_rate)
+        self.prompt_words = prompt_words
+        self.sample_rate = sample_rate
+        self.vad = vad
+
+        self.audio = np.zeros(0, dtype=np.float32)
+        self.offset = 0.0
+        self.since_decode = 0
+        self.committed: List[Word] = []
+        self.hypothesis: List[Word] = []
+        self.decodes = 0
+
+    @staticmethod
+    def _text(words: List[Word]) -> str:
+        return "".join(word for word, _, _ in words).strip()
+
+    @property
+    def partial(self) -> str:
+        """Committed text followed by the current unconfirmed hypothesis."""
+        return self._text(self.committed + self.hypothesis)
+
+    def _prompt(self) -> Optional[str]:
+        if not self.committed:
+            return None
+        return self._text(self.committed[-self.prompt_words:])
+
+    def _decode(self) -> List[Word]:
+        self.decodes += 1
+        words = self.transcribe_words(self.audio, self._prompt())
+        return [(word, start + self.offset, end + self.offset) for word, start, end in words]
+
+    def _trim_to(self, time_s: float):
+        cut = int((time_s - self.offset) * self.sample_rate)
+        cut = min(max(cut, 0), self.audio.shape[0])
+        self.audio = self.audio[cut:]
+        self.offset += cut / self.sample_rate
+
+    def _speech_started(self) -> bool:
+        """Drop the silence ahead of the speech, False while there is no speech."""
+        if self.vad is None or self.committed or self.hypothesis:
+            return True
+        bounds = self.vad.speech_bounds(self.audio)
+        if bounds is None:
+            return False
+        self._trim_to(self.offset + bounds[0] / self.sample_rate)
+        return True
+
+    def feed(self, samples: np.ndarray) -> str:
+        """
+        Add captured audio, decoding again when enough new audio came in.
+
+        Returns:
+            str: The current partial transcript.
+        """
+        self.audio = np.concatenate([self.audio, samples.astype(np.float32, copy=False)])
+        self.since_decode += samples.shape[0]
+        if self.since_decode < self.step or self.audio.shape[0] < self.min_audio:
+            return self.partial
+        self.since_decode = 0
+        if not self._speech_started():
+            return self.partial
+
+        words = self._decode()
+        agreed = 0
+        for new, old in zip(words, self.hypothesis):
+            if _normalize(new[0]) != _normalize(old[0]):
+                break
+            agreed += 1
+
+        if agreed:
+            self.committed.extend(words[:agreed])
+            self._trim_to(words[agreed - 1][2])
+        self.hypothesis = words[agreed:]
+        return self.partial
+
+    def finish(self) -> str:
+        """Decode what is left after end of speech and return the full transcript."""
+        if self.audio.shape[0] and self._speech_started():
+            self.committed.extend(self._decode())
+        self.audio = np.zeros(0, dtype=np.float32)
+        self.hypothesis = []
+        return self._text(self.committed)
@@ -0,0 +1,102 @@
+import numpy as np
+from typing import Optional, Tuple
+
+from .audio import WHISPER_SAMPLE_RATE
+
+class VoiceActivityDetector:
+    """
+    Energy and spectral flatness voice activity detector.
+
+    A 25 ms frame counts as voiced when it is louder than the adaptive noise
+    floor of the clip and its spectrum in the speech band is peaky (voiced
+    speech has harmonics, fans, hiss and room noise are flat). An utterance
+    with less than `min_speech_ms` of voiced frames is rejected, otherwise it is
+    cut down to its first and last voiced frames plus `pad_ms` on each side.
+    """
+
+    def __init__(self,
+                 sample_rate: int = WHISPER_SAMPLE_RATE,
+                 frame_ms: float = 25.0,
+                 hop_ms: float = 10.0,
+                 margin_db: float = 10.0,
+                 abs_floor_db: float = -55.0,
+                 flatness_threshold: float = 0.4,
+                 min_speech_ms: float = 200.0,
+                 pad_ms: float = 200.0,
+                 band_hz: Tuple[float, float] = (100.0, 4000.0)):
+        """
+        Args:
+            sample_rate (int): Sample rate of the audio given to the detector.
+            frame_ms (float): Analysis frame length.
+            hop_ms (float): Step between two frames.
+            margin_db (float): How far above the noise floor a voiced frame must be.
+            abs_floor_db (float): Frames quieter than this are never voiced.
+            flatness_threshold (float): Spectral flatness (0 tonal - 1 white noise)
+                above which a frame is treated as noise.
+            min_speech_ms (float): Voiced audio needed to accept the utterance.
+            pad_ms (float): Audio kept around the voiced region.
+            band_hz (Tuple[float, float]): Frequency band the flatness is measured in.
+        """
+        self.sample_rate = sample_rate
+        self.frame_len = int(sample_rate * frame_ms / 1000)
+        self.hop = int(sample_rate * hop_ms / 1000)
+        self.margin_db = margin_db
+        self.abs_floor_db = abs_floor_db
+        self.flatness_threshold = flatness_threshold
+        self.min_speech_frames = int(min_speech_ms / hop_ms)
+        self.pad = int(sample_rate * pad_ms / 1000)
+
+        freqs = np.fft.rfftfreq(self.frame_len, 1 / sample_rate)
+        self.band = (freqs >= band_hz[0]) & (freqs <= band_hz[1])
+        self.window = np.hanning(self.frame_len).astype(np.float32)
+
+    def _frames(self, audio: np.ndarray) -> np.ndarray:
+        n_frames = 1 + (audio.shape[0] - self.frame_len) // self.hop
+        return np.lib.stride_tricks.as_strided(
+            audio,
+            shape=(n_frames, self.frame_len),
+            strides=(audio.strides[0] * self.hop, audio.strides[0])
+        )
+
+    def voiced_frames(self, audio: np.ndarray) -> np.ndarray:
+        """Boolean mask of the voiced frames, one entry per hop."""
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        if audio.shape[0] < self.frame_len:
+            return np.zeros(0, dtype=bool)
+        frames = self._frames(audio)
+
+        energy_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+        noise_floor = np.percentile(energy_db, 10)
+        # With no pause in the clip the floor is speech itself, bound it by the peak
+        threshold = max(self.abs_floor_db,
+                        min(noise_floor + self.margin_db, energy_db.max() - self.margin_db))
+
+        power = np.abs(np.fft.rfft(frames * self.window, axis=1))[:, self.band] ** 2 + 1e-12
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+
+        return (energy_db > threshold) & (flatness < self.flatness_threshold)
+
+    def speech_bounds(self, audio: np.ndarray) -> Optional[Tuple[int, int]]:
+        """
+        Returns:
+            Optional[Tuple[int, int]]: Start and end sample of the padded speech
+            region, None if the audio holds no speech.
+        """
+        voiced = self.voiced_frames(audio)
+        if voiced.sum() < self.min_speech_frames:
+            return None
+        idx = np.flatnonzero(voiced)
+        start = max(idx[0] * self.hop - self.pad, 0)
+        end = min(idx[-1] * self.hop + self.frame_len + self.pad, audio.shape[0])
+        return start, end
+
+    def has_speech(self, audio: np.ndarray) -> bool:
+        return self.speech_bounds(audio) is not None
+
+    def trim(self, audio: np.ndarray) -> Optional[np.ndarray]:
+        """Cut leading and trailing silence, None if there is no speech at all."""
+        bounds = self.speech_bounds(audio)
+        if bounds is None:
+            return None
+        start, end = bounds
+        return audio[start:end]
@@ -1,57 +1,61 @@
-import os
-import torch
-import wave
-import whisper
-import tempfile
-import atexit
+import numpy as np
+from typing import List, Optional
+
+from .audio import pcm_to_float32
+from .backends import load_backend
+from .streaming import StreamingTranscriber, Word
+from .vad import VoiceActivityDetector
 
 class _WhisperSpeech2Text:
-    def __init__(self, model_name="large-v3"):
+    def __init__(self,
+                 engine: Optional[str] = None,
+                 model_name: Optional[str] = None,
+                 device: Optional[str] = None,
+                 compute_type: Optional[str] = None,
+                 warm_up: bool = True):
         """
-        Initialize the Whisper model for speech-to-text.
+        Initialize the ASR backend for speech-to-text, see load_backend for the
+        arguments and the environment variables they default to.
         """
-        self.model = whisper.load_model(model_name, device=torch.device("cuda:0"))
+        self.vad = VoiceActivityDetector()
+        self.backend = load_backend(engine, model_name, device, compute_type)
+        print(f"ASR backend {self.backend} loaded")
+        if warm_up:
+            self.backend.warm_up()
 
-    def _save2temp(self, audio_data):
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-        temp_file_path = temp_file.name
-        temp_file.close()
-        encoding_map = {
-            "PCM_8": 1,   # 8-bit audio
-            "PCM_16": 2,  # 16-bit audio
-            "PCM_24": 3,  # 24-bit audio
-            "PCM_32": 4   # 32-bit audio
-        }
-        sample_width = encoding_map.get(audio_data["encoding"])
-        try:
-            with wave.open(temp_file.name, 'wb') as wave_file:
-                wave_file.setnchannels(audio_data["num_channels"])
-                wave_file.setsampwidth(sample_width) 
-                wave_file.setframerate(audio_data["sample_rate"])
-                wave_file.writeframes(audio_data["audio_data"])
+    def _decode_audio(self, audio_data):
+        """
+        Turn the PCM bytes of the request into a 16 kHz mono float32 array
+        in memory, no temp file or ffmpeg process is involved.
+        """
+        return pcm_to_float32(
+            audio_data["audio_data"],
+            audio_data["encoding"],
+            audio_data["num_channels"],
+            audio_data["sample_rate"]
+        )
 
+    def transcribe_words(self, audio: np.ndarray, prompt: Optional[str] = None) -> List[Word]:
+        """
+        Transcribe a waveform into words with their start and end time in seconds.
+        """
+        return self.backend.transcribe_words(audio, prompt)
 
-            atexit.register(lambda: os.remove(temp_file_path) if os.path.exists(temp_file_path) else None)
-            return temp_file.name
-        except Exception as e:
-            print(f"Error saving audio to file: {e}")
-            raise
+    def stream(self) -> StreamingTranscriber:
+        """Start the incremental transcription of a new utterance."""
+        return StreamingTranscriber(self.transcribe_words, vad=self.vad)
 
     def __call__(self, audio_img_data):
         """
         Transcribe speech from audio data to text.
         :param audio_data: Data Object
-        :return: Transcribed text.
+        :return: Transcribed text, empty when the audio holds no speech.
         """
-        # Getting temp file to write the audio bytes into the 
-        # wav format
-        temp_recording = self._save2temp(audio_img_data)
-
-        # Convert bytes to a torch audio tensor
-        audio_tensor = torch.tensor(
-            whisper.pad_or_trim(whisper.load_audio(temp_recording))
-        ).float()
-        # Run Whisper to transcribe the audio
-        result = self.model.transcribe(audio_tensor, language='en')
-        return result["text"]
+        audio = self._decode_audio(audio_img_data)
 
+        # Whisper hallucinates on silence, only the voiced part is decoded
+        speech = self.vad.trim(audio)
+        if speech is None:
+            print("No speech detected, skipping transcription")
+            return ""
+        return self.backend.transcribe(speech)
@@ -1,9 +1,9 @@
 import grpc
-from collections import deque
 from concurrent import futures
 from threading import Thread
 
-from media_manager import MediaManager, IMAGE_QUEUE_LEN
+from media_manager import MediaManager
+from utils import Frames, Tracer
 from secondary_channel import SecondaryGRPC
 import grpc_communication.grpc_pb2_grpc as pb2_grpc
 
@@ -13,7 +13,6 @@ def serve():
     """
     Start the gRPC server and processing loop.
     """
-    image_queue = deque(maxlen=IMAGE_QUEUE_LEN)
     img_serve_thread = Thread(
         target=image_serve,
         daemon=True
@@ -23,7 +22,7 @@ def serve():
     # Start the gRPC server
     server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
     pb2_grpc.add_MediaServiceServicer_to_server(
-        MediaManager(image_queue), 
+        MediaManager(Frames), 
         server
     )
     pb2_grpc.add_SecondaryChannelServicer_to_server(
@@ -31,6 +30,7 @@ def serve():
         server
     )
     server.add_insecure_port("[::]:50051")
+    Tracer.start_metrics_server()
     print("gRPC server running on port 50051...")
     try:
         server.start()
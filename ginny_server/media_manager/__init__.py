@@ -1 +1 @@
-from .grpc_handle import MediaManager, IMAGE_QUEUE_LEN
+from .grpc_handle import MediaManager
@@ -9,13 +9,13 @@ import numpy as np
 from google.protobuf.empty_pb2 import Empty
 
 from core_api import FaceRecognition, WhisperSpeech2Text, ClipClassification
-from executor import Executor
-from reasoner import Reasoner
-from grpc_pb2 import AudioImgResponse, TextChunk, FaceBoundingBox, QueueRemoval
+from core_api.whisper2text import pcm_to_float32
+from pipeline import TurnPipeline
+from utils import Tracer
+from grpc_pb2 import AudioImgResponse, TextChunk, FaceBoundingBox, QueueRemoval, \
+    ImageStreamAck
 from grpc_pb2_grpc import MediaServiceServicer
 
-IMAGE_QUEUE_LEN = 50
-
 class MediaManager(MediaServiceServicer):
     def __init__(self, image_queue, audio_save=False):
         super().__init__()
@@ -53,7 +53,8 @@ class MediaManager(MediaServiceServicer):
             # Convert bytes to a 1D NumPy array
             image_array = np.frombuffer(image_bytes, dtype=np.uint8)
             # Decode the image array into a format usable by OpenCV
-            image = cv2.imdecode(image_array, cv2.IMREAD_COLOR)
+            with Tracer.span("image_decode"):
+                image = cv2.imdecode(image_array, cv2.IMREAD_COLOR)
             if image is None:
                 raise ValueError("Failed to decode the image from bytes.")
             return image
@@ -64,41 +65,13 @@ class MediaManager(MediaServiceServicer):
     def _getting_response(self, audio_img_item):
         if audio_img_item is None:
             return None
-        try:
-            transcription = WhisperSpeech2Text(audio_img_item)
-            if len(transcription) < 2:
-                transcription= "You"
-            print(f"Transcription: {transcription}")
-            if len(transcription) < 2:
-                # If the transcription is less than 2 characters 
-                # it will send a word which will automatically be 
-                # categorised as bad input
-                transcription = "You"
-
-            # Get the face information 
-            image = audio_img_item.get("image_data")
-            cv2.imwrite("/workspace/display_imgs/some.jpg", image)
-            face_id = FaceRecognition.get_most_frequent_face_id()
-
-            person_details = Reasoner(transcription, face_id)
-            if person_details.get_attribute("state") == "vision":
-                person_details.set_image(image)
-
-            print("Executor response:")
-            response = Executor(person_details)
-            mode = 'default'
-            for response_chunk in response:
-                mode = response_chunk.mode
-                response_text = response_chunk.textchunk
-                print(response_text, end='', flush=True)
-                yield (response_text, mode)
-
-        except Exception as e:
-            print(f"Error processing audio: {e}")
-            traceback.print_exc()
-            yield ("error", "error")
+        image = audio_img_item.get("image_data")
+        cv2.imwrite("/workspace/display_imgs/some.jpg", image)
+        yield from TurnPipeline(lambda: WhisperSpeech2Text(audio_img_item), image)
 
     def ProcessAudioImg(self, request, context):
+        turn = Tracer.start_turn("audio_img")
+        turn.set_tag("audio_bytes", len(request.audio_data))
         try:
             file_name = f"audio_{int(time.time())}.wav"  # Unique file name using timestamp
             encoding_map = {
@@ -135,6 +108,7 @@ class MediaManager(MediaServiceServicer):
                 "description": request.audio_description,
                 "image_data": image
             }
+            Tracer.record("request_prep", turn.start)
             pipeline_response = self._getting_response(audio_img_item)
             for resp in pipeline_response:
                 response_text = resp[0]
@@ -149,6 +123,60 @@ class MediaManager(MediaServiceServicer):
                 mode="error",
                 text=f"Some error occured {e}"
             )
+        finally:
+            Tracer.finish_turn(turn)
+
+    def ProcessAudioStream(self, request_iterator, context):
+        """
+            Transcribes the audio while the robot is still capturing it, once the
+            end_of_speech chunk arrives only the unconfirmed tail is decoded
+        """
+        turn = Tracer.start_turn("audio_stream")
+        try:
+            transcriber = WhisperSpeech2Text.stream()
+            image = None
+            for chunk in request_iterator:
+                if chunk.audio_data:
+                    samples = pcm_to_float32(
+                        chunk.audio_data,
+                        chunk.audio_encoding,
+                        chunk.num_channels,
+                        chunk.sample_rate
+                    )
+                    with Tracer.span("asr_incremental"):
+                        partial = transcriber.feed(samples)
+                    print(f"Partial transcription: {partial}")
+                if chunk.end_of_speech:
+                    Tracer.record("grpc_receive", turn.start)
+                    image = self._decode_image_from_bytes(chunk.image_data)
+                    break
+
+            if image is None:
+                yield TextChunk(
+                    mode="error",
+                    text="The image came out as None"
+                )
+                return
+            cv2.imwrite("/workspace/display_imgs/some.jpg", image)
+
+            def finish():
+                end_of_speech = time.time()
+                transcription = transcriber.finish()
+                print(f"Final transcription after {time.time() - end_of_speech:.3f}s "
+                      f"and {transcriber.decodes} decodes")
+                return transcription
+
+            for response_text, mode in TurnPipeline(finish, image):
+                yield TextChunk(text=response_text, is_final=False, mode=mode)
+
+        except Exception as e:
+            traceback.print_exc()
+            yield TextChunk(
+                mode="error",
+                text=f"Some error occured {e}"
+            )
+        finally:
+            Tracer.finish_turn(turn)
 
     def StreamImages(self, request_iterator, context):
         """
@@ -158,21 +186,51 @@ class MediaManager(MediaServiceServicer):
             for request in request_iterator:
                 image = self._decode_image_from_bytes(request.image_data)
                 if image is not None:
-                    # Add image to the Face and Clip queues
-                    # self.image_queue.append(image)
-                    FaceRecognition.add2face_img_queue(image)
-                    # ClipClassification.add2clip_img_queue(image)
+                    # The face, clip and bbox readers all read from the frame ring
+                    self.image_queue.put(image)
 
         except Exception as e:
             traceback.print_exc()
         return Empty()
 
+    def ImageSession(self, request_iterator, context):
+        """
+            Long lived image stream, every frame is answered with an ack carrying
+            the credit left for the face recognizer so the client can drop frames
+            at the source instead of sending frames that go stale here
+        """
+        received = 0
+        undecoded = 0
+        stale_at_start = FaceRecognition.frame_reader.dropped
+        try:
+            for request in request_iterator:
+                received += 1
+                image = self._decode_image_from_bytes(request.image_data)
+                if image is None:
+                    undecoded += 1
+                else:
+                    self.image_queue.put(image)
+
+                dropped = undecoded + FaceRecognition.frame_reader.dropped - stale_at_start
+
+                yield ImageStreamAck(
+                    credits=FaceRecognition.face_queue_credits(),
+                    received=received,
+                    dropped=dropped
+                )
+        except Exception as e:
+            traceback.print_exc()
+        print(f"Image session closed, received {received} frames, "
+              f"frame ring {self.image_queue.stats()}, "
+              f"frame gate {FaceRecognition.frame_gate.stats()}")
+
     def GetBbox(self, request, context):
         """
             From the image queue runs a face detector, gets the first bbox and then 
             returns the FaceBoundingBox
         """
-        if not self.image_queue:
+        latest = self.image_queue.latest()
+        if latest is None:
             return FaceBoundingBox(
                 x1=0,
                 y1=0,
@@ -180,14 +238,14 @@ class MediaManager(MediaServiceServicer):
                 y2=0
             )
 
-        if len(self.image_queue) < IMAGE_QUEUE_LEN:
+        if len(self.image_queue) < self.image_queue.capacity:
             return FaceBoundingBox(
                 x1=0,
                 y1=0,
                 x2=0,
                 y2=0
             )
-        earliest_image = self.image_queue[-1]
+        _, earliest_image = latest
 
         bbox = FaceRecognition.get_face_box(earliest_image)
         if bbox is None:
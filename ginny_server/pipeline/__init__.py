@@ -0,0 +1,5 @@
+from .turn_pipeline import _TurnPipeline
+
+TurnPipeline = _TurnPipeline()
+
+__all__ = ["TurnPipeline"]
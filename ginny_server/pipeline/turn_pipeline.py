@@ -0,0 +1,105 @@
+import time
+import traceback
+from typing import Callable, Iterator, Tuple
+from concurrent.futures import ThreadPoolExecutor
+
+from core_api import FaceRecognition
+from executor import Executor
+from reasoner import Reasoner
+from reasoner.intent_router import normalize_label
+from utils import Neo4j, PersonDetails, Tracer, message_format
+
+class _TurnPipeline:
+    """
+    Runs one conversational turn with the independent steps overlapped:
+
+        transcription ─┬─> route (LLM) ─────────────────────────────┐
+                       └─> face vote ─> person ─> context ───────────┴─> Executor
+
+    The face vote can enroll a new face, so it only starts once the
+    transcription holds speech. The context the speaking api needs (messages
+    and relationships, one Neo4j query) is fetched while the routing LLM call
+    is in flight and handed over as a prefetched future.
+    """
+
+    def __init__(self, max_workers: int = 8):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="turn")
+
+    def _submit(self, stage: str, fn, *args):
+        """Run fn on the pool as a traced stage of the current turn."""
+        def traced():
+            with Tracer.span(stage):
+                return fn(*args)
+        return self.pool.submit(Tracer.bind(traced))
+
+    def _bad_input(self) -> Iterator[Tuple[str, str]]:
+        turn = Tracer.current()
+        if turn is not None:
+            turn.set_tag("route", "bad input")
+        for response_chunk in Executor(PersonDetails({"state": "bad input"})):
+            yield (response_chunk.textchunk, response_chunk.mode)
+
+    def __call__(self, transcribe: Callable[[], str], image) -> Iterator[Tuple[str, str]]:
+        """
+            :param transcribe: callable returning the transcription
+            :param image: last camera frame of the turn
+            :return: iterator of (text chunk, mode) from the executed api
+        """
+        start = time.time()
+        transcription_future = self._submit("asr", transcribe)
+
+        try:
+            transcription = transcription_future.result()
+        except Exception as e:
+            print(f"Error processing audio: {e}")
+            traceback.print_exc()
+            yield ("error", "error")
+            return
+
+        if not transcription.strip():
+            # The VAD found no speech, nothing for the reasoner to route
+            print("Empty transcription, answering as bad input")
+            yield from self._bad_input()
+            return
+
+        if len(transcription) < 2:
+            # If the transcription is less than 2 characters 
+            # it will send a word which will automatically be 
+            # categorised as bad input
+            transcription = "You"
+        print(f"Transcription: {transcription}")
+
+        try:
+            route_future = self._submit("reasoner", Reasoner.route, transcription)
+            face_future = self._submit("face_vote", FaceRecognition.get_most_frequent_face_id)
+            face_id = face_future.result()
+            if face_id is None:
+                yield from self._bad_input()
+                return
+
+            # Overlaps with the routing call
+            with Tracer.span("neo4j_person"):
+                person_details = Reasoner.load_person(face_id)
+            user_msg = message_format("user", transcription)
+            context_future = self._submit("neo4j_context", Neo4j.get_turn_context, user_msg, face_id)
+
+            person_details = Reasoner.apply_route(route_future.result(), person_details, transcription)
+            person_details.set_prefetched("context", context_future)
+            if person_details.get_attribute("state") == "vision":
+                person_details.set_image(image)
+            state = str(person_details.get_attribute("state"))
+            turn = Tracer.current()
+            if turn is not None:
+                # The state is free form LLM output, the metric label has to stay one of ROUTE_LABELS
+                turn.set_tag("route", normalize_label(state))
+            print(f"Turn routed to {state} in {time.time() - start:.3f}s")
+
+            print("Executor response:")
+            for response_chunk in Executor(person_details):
+                print(response_chunk.textchunk, end='', flush=True)
+                yield (response_chunk.textchunk, response_chunk.mode)
+
+        except Exception as e:
+            print(f"Error processing audio: {e}")
+            traceback.print_exc()
+            yield ("error", "error")
@@ -0,0 +1,178 @@
+import json
+import time
+import joblib
+import numpy as np
+from pathlib import Path
+from difflib import SequenceMatcher
+from threading import Lock, Thread
+from typing import List, Optional, Tuple
+
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from .prompt import reasoner_prompt
+
+# Labels the routing prompt can answer with
+ROUTE_LABELS = [
+    "speak",
+    "silent",
+    "vision",
+    "custom movement",
+    "standard movement",
+    "bad input",
+    "no change"
+]
+
+def normalize_label(label: str) -> str:
+    """Map a free form LLM answer ("Speak.", "custom  movement") onto ROUTE_LABELS."""
+    label = " ".join(label.strip().lower().strip(".").split())
+    if label in ROUTE_LABELS:
+        return label
+    return max(ROUTE_LABELS, key=lambda known: SequenceMatcher(None, label, known).ratio())
+
+def prompt_examples() -> List[Tuple[str, str]]:
+    """The input/response pairs of the routing prompt, used to seed the classifier."""
+    pairs = []
+    text = None
+    for line in reasoner_prompt.splitlines():
+        key, _, value = line.partition(":")
+        key = key.strip().lower()
+        if key == "input":
+            text = value.strip()
+        elif key in ("response", "respone", "reponse") and text is not None:
+            pairs.append((text, normalize_label(value)))
+            text = None
+        elif text is not None and line.strip():
+            # Inputs that wrap onto the next line
+            text = f"{text} {line.strip()}"
+    return pairs
+
+class IntentRouter:
+    """
+    Local classifier that picks the route of a transcription in a few ms.
+
+    Character n-grams are hashed into a sparse vector and fed to a logistic
+    regression trained on the examples of the routing prompt plus every
+    (transcription, label) pair the LLM router answered, which are appended to
+    a JSONL log. Predictions under `threshold` confidence are left to the LLM.
+    The model is retrained in the background every `retrain_every` new pairs.
+    """
+
+    def __init__(self,
+                 router_dir: str = "/workspace/database/router",
+                 threshold: float = 0.85,
+                 min_examples: int = 50,
+                 retrain_every: int = 100):
+        """
+        Args:
+            router_dir (str): Directory holding routing_log.jsonl and the model.
+            threshold (float): Confidence needed to skip the LLM.
+            min_examples (int): Logged pairs needed before the classifier is used.
+            retrain_every (int): New logged pairs that trigger a retrain.
+        """
+        self.router_dir = Path(router_dir)
+        self.router_dir.mkdir(parents=True, exist_ok=True)
+        self.log_path = self.router_dir / "routing_log.jsonl"
+        self.model_path = self.router_dir / "intent_router.joblib"
+        self.threshold = threshold
+        self.min_examples = min_examples
+        self.retrain_every = retrain_every
+
+        self.vectorizer = HashingVectorizer(
+            analyzer="char_wb",
+            ngram_range=(2, 4),
+            n_features=2 ** 18,
+            alternate_sign=False,
+            lowercase=True
+        )
+        self.model: Optional[LogisticRegression] = None
+        self._lock = Lock()
+        self._training = False
+        self._logged_since_train = 0
+
+        if self.model_path.exists():
+            self.model = joblib.load(self.model_path)
+        else:
+            self._start_training()
+
+    def predict(self, transcription: str) -> Tuple[Optional[str], float]:
+        """
+        Returns:
+            Tuple[Optional[str], float]: The predicted label and its probability,
+            (None, 0.0) while no model is trained.
+        """
+        model = self.model
+        if model is None:
+            return None, 0.0
+        probs = model.predict_proba(self.vectorizer.transform([transcription]))[0]
+        best = int(np.argmax(probs))
+        return model.classes_[best], float(probs[best])
+
+    def route(self, transcription: str) -> Optional[str]:
+        """The predicted label if the router is confident enough, None otherwise."""
+        label, confidence = self.predict(transcription)
+        if label is None or confidence < self.threshold:
+            return None
+        print(f"Local router picked {label} ({confidence:.2f})")
+        return label
+
+    def log(self, transcription: str, label: str):
+        """Record an LLM routing decision as a training pair."""
+        record = {"text": transcription, "label": normalize_label(label), "time": time.time()}
+        with self._lock:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+            self._logged_since_train += 1
+            retrain = self._logged_since_train >= self.retrain_every
+        if retrain:
+            self._start_training()
+
+    def _logged_pairs(self) -> List[Tuple[str, str]]:
+        if not self.log_path.exists():
+            return []
+        pairs = []
+        with open(self.log_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                pairs.append((record["text"], record["label"]))
+        return pairs
+
+    def _start_training(self):
+        with self._lock:
+            if self._training:
+                return
+            self._training = True
+            self._logged_since_train = 0
+        Thread(target=self.train, daemon=True).start()
+
+    def train(self) -> bool:
+        """
+        Fit the classifier on the prompt examples and the logged pairs, the
+        latest label wins when a transcription was logged more than once.
+
+        Returns:
+            bool: True if a new model was trained.
+        """
+        try:
+            logged = self._logged_pairs()
+            if len(logged) < self.min_examples:
+                return False
+
+            latest = {}
+            for text, label in prompt_examples() + logged:
+                latest[text.strip().lower()] = label
+            texts, labels = list(latest.keys()), list(latest.values())
+            if len(set(labels)) < 2:
+                return False
+
+            model = LogisticRegression(max_iter=1000, C=10.0, class_weight="balanced")
+            model.fit(self.vectorizer.transform(texts), labels)
+            joblib.dump(model, self.model_path)
+            self.model = model
+            print(f"Intent router trained on {len(texts)} examples")
+            return True
+        finally:
+            self._training = False
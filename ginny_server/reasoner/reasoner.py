@@ -1,9 +1,12 @@
+import os
 import traceback
 from typing import Optional
 
 from utils import Neo4j, PersonDetails, message_format
-from core_api import Llama, ChatGPT, Grok, ClipClassification
+from core_api import Llama, ChatGPT, Grok, ClipClassification, LLMGateway
 from .prompt import reasoner_prompt
+from .intent_router import IntentRouter, normalize_label
+from .route_cache import RouteCache
 
 class _Reasoner:
     def __init__(self):
@@ -11,7 +14,19 @@ class _Reasoner:
             Initializing the reasoner
             :param llama_url: Endpoint for the llama.cpp
         """
-        pass
+        self.intent_router = IntentRouter()
+        # Near duplicate transcriptions reuse a cached route only when opted in
+        # with ROUTE_CACHE_NN_THRESHOLD and the local router predicts the same label
+        nn_threshold = os.getenv("ROUTE_CACHE_NN_THRESHOLD")
+        self.route_cache = RouteCache(
+            vectorizer=self.intent_router.vectorizer,
+            nn_threshold=float(nn_threshold) if nn_threshold else None,
+            confirm=self._same_route
+        )
+
+    def _same_route(self, transcription: str, label: str) -> bool:
+        predicted, _ = self.intent_router.predict(transcription)
+        return predicted is not None and predicted == normalize_label(label)
 
     def to_lowercase(self, input_string):
         """
@@ -47,6 +62,68 @@ class _Reasoner:
                 return "bad input"
         return response_text
 
+    def route(self, transcription: str) -> str:
+        """
+            Picks the api that should handle the transcription from the route 
+            cache, then the local intent router when it is confident and the 
+            routing LLM otherwise. It only needs the text so it can run while 
+            the person is fetched
+            :param transcription: what the user said
+            :return: the route label
+        """
+        cached_label = self.route_cache.get(transcription)
+        if cached_label is not None:
+            print(f"Route cache hit {cached_label}, {self.route_cache.stats()}")
+            return cached_label
+
+        local_label = self.intent_router.route(transcription)
+        if local_label is not None:
+            return local_label
+
+        system_prompt = self._developing_reasoning_prompt()
+        user_prompt = self._developing_user_prompt(transcription)
+        total_prompt = system_prompt + user_prompt
+
+        # Grok first, hedged with ChatGPT if it is slow to answer
+        response_text = LLMGateway.complete(total_prompt, route="routing")
+        print("The response is ", response_text)
+
+        # Every LLM decision becomes a training pair for the local router
+        self.intent_router.log(transcription, response_text)
+        self.route_cache.put(transcription, response_text)
+        return response_text
+
+    def load_person(self, face_id: str) -> PersonDetails:
+        """
+            Gets the person of the face_id from the database, creating them 
+            on their first turn
+        """
+        person_details = Neo4j.get_person_details(face_id)
+        if not person_details:
+            Neo4j.create_or_update_person(face_id=face_id)
+            person_details = Neo4j.get_person_details(face_id)
+        return person_details
+
+    def apply_route(self, response_text: str, person_details: PersonDetails, 
+                    transcription: str) -> PersonDetails:
+        """
+            Sets the state decided by the router on the person, "bad input" 
+            and "no change" keep the state the person is already in
+        """
+        user_prompt = self._developing_user_prompt(transcription)
+        if response_text == "bad input":
+            response_text = person_details.get_attribute("state")
+
+        if response_text == "no change":
+            response_text = person_details.get_attribute("state")
+
+        if response_text not in ("no change", "no change."):
+            person_details.set_attribute("state", response_text)
+            print("Person State:", person_details.get_attribute("state"))
+
+        person_details.set_latest_usr_message(user_prompt[0])
+        return person_details
+
     def __call__(self, transcription, face_id: Optional[str], img=None) -> PersonDetails:
         """
             Running the reasoner and deciding on what APIs need to be run 
@@ -60,34 +137,9 @@ class _Reasoner:
                 "state": "bad input" 
             })
         try:
-            system_prompt = self._developing_reasoning_prompt()
-            person_details = Neo4j.get_person_details(face_id)
-            if not person_details:
-                Neo4j.create_or_update_person(face_id=face_id)
-                person_details = Neo4j.get_person_details(face_id)
-            user_prompt = self._developing_user_prompt(transcription)
-            total_prompt = system_prompt + user_prompt
-
-            try:
-                response = Grok.send_text(total_prompt, stream=False)
-                print("The response is ", response)
-            except Exception as e:
-                print("grok failed ", e)
-                response = ChatGPT.send_text(total_prompt, stream=False)
-            response_text = response.choices[0].message.content
-
-            if response_text == "bad input":
-                response_text = person_details.get_attribute("state")
-
-            if response_text == "no change":
-                response_text = person_details.get_attribute("state")
-
-            if response_text not in ("no change", "no change."):
-                person_details.set_attribute("state", response_text)
-                print("Person State:", person_details.get_attribute("state"))
-
-            person_details.set_latest_usr_message(user_prompt[0])
-            return person_details
+            person_details = self.load_person(face_id)
+            response_text = self.route(transcription)
+            return self.apply_route(response_text, person_details, transcription)
 
         except Exception as e:
             print(f"Error in reasoning section: {e}")
@@ -0,0 +1,201 @@
+import os
+import json
+import time
+import string
+import hashlib
+from pathlib import Path
+from threading import Event, Lock, Thread
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from .prompt import reasoner_prompt
+
+_PUNCTUATION = str.maketrans("", "", string.punctuation)
+
+def normalize_transcription(text: str) -> str:
+    """Fold case, punctuation and whitespace so "Hello!" and "hello" share a key."""
+    return " ".join(text.lower().translate(_PUNCTUATION).split())
+
+def prompt_hash() -> str:
+    return hashlib.sha256(reasoner_prompt.encode("utf-8")).hexdigest()
+
+class RouteCache:
+    """
+    LRU + TTL cache of routing decisions keyed on the normalised transcription.
+
+    - Opt-in, with a `vectorizer` (the intent router's character n-gram
+      hasher) and an `nn_threshold` a miss falls back to the nearest cached
+      transcription. Character n-grams score "dance for me" and "not dance
+      for me" as nearly the same, so the label is only served when `confirm`
+      agrees with it for the new transcription.
+    - The cache is persisted as JSON together with the hash of the routing
+      prompt, editing reasoner/prompt.py invalidates every entry. A
+      background thread writes it at most every `save_interval_s`, never on
+      the routing path.
+    """
+
+    def __init__(self,
+                 cache_path: str = "/workspace/database/router/route_cache.json",
+                 max_entries: int = 2048,
+                 ttl_s: float = 7 * 24 * 3600,
+                 vectorizer=None,
+                 nn_threshold: Optional[float] = None,
+                 confirm: Optional[Callable[[str, str], bool]] = None,
+                 save_interval_s: float = 5.0):
+        """
+        Args:
+            cache_path (str): JSON file the cache is persisted to.
+            max_entries (int): Entries kept before the least recently used is evicted.
+            ttl_s (float): Age after which an entry is not served anymore.
+            vectorizer: Optional sklearn vectorizer with l2 normalised output,
+                enables the nearest neighbour match.
+            nn_threshold (Optional[float]): Cosine similarity needed for a nearest
+                neighbour hit, None disables the nearest neighbour match.
+            confirm (Optional[Callable[[str, str], bool]]): Called with the
+                transcription and the label of its nearest neighbour, the label
+                is served only when it returns True. Without it there are no
+                nearest neighbour hits.
+            save_interval_s (float): Seconds between writes of the JSON file.
+        """
+        self.cache_path = Path(cache_path)
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.vectorizer = vectorizer
+        self.nn_threshold = nn_threshold
+        self.confirm = confirm
+        self.save_interval_s = save_interval_s
+        self.prompt_hash = prompt_hash()
+
+        self._lock = Lock()
+        # key -> (label, stored at)
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._matrix = None
+        self._matrix_keys = []
+
+        self.hits = 0
+        self.nn_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.nn_rejected = 0
+
+        self._dirty = Event()
+        self._load()
+        Thread(target=self._saver, name="route-cache-saver", daemon=True).start()
+
+    def _load(self):
+        if not self.cache_path.exists():
+            return
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Route cache could not be read, starting empty: {e}")
+            return
+        if data.get("prompt_hash") != self.prompt_hash:
+            print("Routing prompt changed, route cache invalidated")
+            return
+        now = time.time()
+        for key, label, stored_at in data.get("entries", []):
+            if now - stored_at < self.ttl_s:
+                self.entries[key] = (label, stored_at)
+
+    def _save(self):
+        with self._lock:
+            entries = [[key, label, stored_at] for key, (label, stored_at) in self.entries.items()]
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"prompt_hash": self.prompt_hash, "entries": entries}, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def _saver(self):
+        while True:
+            self._dirty.wait()
+            time.sleep(self.save_interval_s)
+            self.flush()
+
+    def flush(self):
+        """Writes the cache now if it changed since the last write."""
+        if not self._dirty.is_set():
+            return
+        self._dirty.clear()
+        try:
+            self._save()
+        except OSError as e:
+            print(f"Route cache could not be saved: {e}")
+
+    def _fresh(self, key: str) -> Optional[str]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        label, stored_at = entry
+        if time.time() - stored_at >= self.ttl_s:
+            del self.entries[key]
+            self._matrix = None
+            self.expired += 1
+            return None
+        self.entries.move_to_end(key)
+        return label
+
+    def _nearest(self, key: str) -> Optional[str]:
+        if self.vectorizer is None or self.nn_threshold is None or self.confirm is None or not self.entries:
+            return None
+        if self._matrix is None:
+            self._matrix_keys = list(self.entries.keys())
+            self._matrix = self.vectorizer.transform(self._matrix_keys)
+        scores = (self._matrix @ self.vectorizer.transform([key]).T).toarray().ravel()
+        best = int(scores.argmax())
+        if scores[best] < self.nn_threshold:
+            return None
+        label = self._fresh(self._matrix_keys[best])
+        if label is not None and not self.confirm(key, label):
+            self.nn_rejected += 1
+            return None
+        return label
+
+    def get(self, transcription: str) -> Optional[str]:
+        key = normalize_transcription(transcription)
+        with self._lock:
+            label = self._fresh(key)
+            if label is not None:
+                self.hits += 1
+                return label
+            label = self._nearest(key)
+            if label is not None:
+                self.nn_hits += 1
+                return label
+            self.misses += 1
+            return None
+
+    def put(self, transcription: str, label: str):
+        key = normalize_transcription(transcription)
+        if not key:
+            return
+        with self._lock:
+            self.entries[key] = (label, time.time())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+            self._matrix = None
+        self._dirty.set()
+
+    def invalidate(self):
+        with self._lock:
+            self.entries.clear()
+            self._matrix = None
+        self._dirty.set()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.nn_hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "nn_hits": self.nn_hits,
+            "nn_rejected": self.nn_rejected,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits + self.nn_hits) / lookups if lookups else 0.0,
+        }
@@ -2,10 +2,18 @@ from fuzzywuzzy import fuzz
 
 from .api_object import ApiObject
 from .person_details import PersonDetails
-from .neo4j_db import _Neo4j
+from .neo4j_db import _Neo4j, PersonRef, RelationshipMutation, RelationshipError
 from .secondary_details import SecondaryDetails
+from .frame_ring import FrameRing
+from .tracing import _Tracer
+from .persistence import _PersistenceQueue
+from .extraction_pool import ExtractionPool
+from .name_index import NameIndex
 
 Neo4j = _Neo4j()
+Frames = FrameRing(capacity=50)
+Tracer = _Tracer()
+PersistenceQueue = _PersistenceQueue(Neo4j)
 
 def message_format(role: str, content: str):
     return {"role": role, "content": content}
@@ -17,4 +25,4 @@ def name_similarity(name_1, name_2):
     return fuzz.ratio(name_1, name_2)
 
 
-__all__ = ["Neo4j", "PersonDetails", "message_format", "SecondaryDetails", "ApiObject"]
+__all__ = ["Neo4j", "Frames", "FrameRing", "ExtractionPool", "PersonRef", "RelationshipMutation", "RelationshipError", "NameIndex", "Tracer", "PersistenceQueue", "PersonDetails", "message_format", "SecondaryDetails", "ApiObject"]
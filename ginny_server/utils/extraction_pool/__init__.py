@@ -0,0 +1 @@
+from .extraction_pool import ExtractionPool
@@ -0,0 +1,171 @@
+import time
+import zlib
+import traceback
+from collections import OrderedDict
+from threading import Condition, Thread
+from typing import Callable, Dict, List, Optional
+
+try:
+    from prometheus_client import Counter, Gauge
+except ImportError:
+    Counter = Gauge = None
+
+_METRICS = Gauge is not None
+if _METRICS:
+    _QUEUE_DEPTH = Gauge("ginny_extraction_queue_depth", "Turns waiting for extraction", ["pool"])
+    _SHED = Counter("ginny_extraction_shed_total", "Turns dropped because the queue was full", ["pool"])
+    _COALESCED = Counter("ginny_extraction_coalesced_total", "Turns merged into an earlier pending job", ["pool"])
+
+class _Shard:
+    """Pending turns of the face_ids hashed to one worker, in the order they get a turn."""
+
+    def __init__(self):
+        self.pending: "OrderedDict[str, List[tuple]]" = OrderedDict()
+
+    def depth(self) -> int:
+        return sum(len(turns) for turns in self.pending.values())
+
+    def oldest(self) -> Optional[float]:
+        times = [turns[0][0] for turns in self.pending.values() if turns]
+        return min(times) if times else None
+
+class ExtractionPool:
+    """
+    Runs knowledge extraction for finished turns on a pool of worker threads.
+
+    - Turns are sharded by face_id and a worker owns a shard, so the turns of
+      one person are handled one after the other in the order they were spoken.
+      The people of a shard take turns, one batch each.
+    - Turns of a person that pile up while the worker is busy are coalesced,
+      the handler gets all of them at once and can make a single LLM call.
+    - At most `max_pending` turns wait, when a new one arrives on a full pool
+      the oldest waiting turn is shed, a stale extraction is worth less than
+      a fresh one.
+    - Queue depth, shed and coalesced turns are exported to Prometheus when
+      prometheus_client is installed, `stats()` returns them either way.
+    """
+
+    def __init__(self,
+                 name: str,
+                 handler: Callable[[str, list], None],
+                 num_workers: int = 4,
+                 max_pending: int = 256,
+                 max_coalesce: int = 8):
+        """
+        Args:
+            name (str): Label of the pool in logs and metrics.
+            handler (Callable[[str, list], None]): Called with a face_id and
+                the list of its pending items, oldest first.
+            num_workers (int): Worker threads, one shard each.
+            max_pending (int): Items waiting across all shards before shedding.
+            max_coalesce (int): Items handed to the handler in one call at most.
+        """
+        self.name = name
+        self.handler = handler
+        self.max_pending = max_pending
+        self.max_coalesce = max_coalesce
+
+        self._cond = Condition()
+        self._shards = [_Shard() for _ in range(num_workers)]
+        self._depth = 0
+        self.submitted = 0
+        self.processed = 0
+        self.shed = 0
+        self.coalesced = 0
+        self.failed = 0
+        self.last_lag = 0.0
+
+        for i, shard in enumerate(self._shards):
+            Thread(target=self._worker, args=(shard,), name=f"{name}-{i}", daemon=True).start()
+
+    def _shard(self, face_id) -> _Shard:
+        return self._shards[zlib.crc32(str(face_id).encode("utf-8")) % len(self._shards)]
+
+    def submit(self, face_id, item):
+        with self._cond:
+            if self._depth >= self.max_pending:
+                self._shed_oldest()
+
+            shard = self._shard(face_id)
+            turns = shard.pending.setdefault(face_id, [])
+            if turns:
+                self.coalesced += 1
+                if _METRICS:
+                    _COALESCED.labels(pool=self.name).inc()
+            turns.append((time.time(), item))
+            self._depth += 1
+            self.submitted += 1
+            self._export_depth()
+            self._cond.notify_all()
+
+    def _shed_oldest(self):
+        """Caller holds the lock."""
+        candidates = [(shard.oldest(), shard) for shard in self._shards if shard.oldest() is not None]
+        if not candidates:
+            return
+        _, shard = min(candidates, key=lambda candidate: candidate[0])
+        face_id = min((face for face, turns in shard.pending.items() if turns),
+                      key=lambda face: shard.pending[face][0][0])
+        shard.pending[face_id].pop(0)
+        if not shard.pending[face_id]:
+            del shard.pending[face_id]
+        self._depth -= 1
+        self.shed += 1
+        if _METRICS:
+            _SHED.labels(pool=self.name).inc()
+        print(f"{self.name} queue is full, shed the oldest turn of {face_id}")
+
+    def _export_depth(self):
+        if _METRICS:
+            _QUEUE_DEPTH.labels(pool=self.name).set(self._depth)
+
+    def _take(self, shard: _Shard):
+        """Blocks until the shard has a person to process, returns (face_id, items)."""
+        with self._cond:
+            while True:
+                if shard.pending:
+                    face_id, turns = next(iter(shard.pending.items()))
+                    batch = turns[:self.max_coalesce]
+                    del turns[:self.max_coalesce]
+                    if turns:
+                        # Back of the line, the other people of the shard go first
+                        shard.pending.move_to_end(face_id)
+                    else:
+                        del shard.pending[face_id]
+                    self._depth -= len(batch)
+                    self._export_depth()
+                    return face_id, batch
+                self._cond.wait()
+
+    def _worker(self, shard: _Shard):
+        from utils import Tracer
+
+        while True:
+            face_id, batch = self._take(shard)
+            try:
+                self.handler(face_id, [item for _, item in batch])
+            except Exception:
+                self.failed += 1
+                print(f"{self.name} failed on the turns of {face_id}")
+                traceback.print_exc()
+            finally:
+                with self._cond:
+                    self.processed += len(batch)
+                    self.last_lag = time.time() - batch[0][0]
+                Tracer.record(f"{self.name}_lag", batch[0][0])
+
+    def depth(self) -> int:
+        return self._depth
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            return {
+                "depth": self._depth,
+                "per_worker": [shard.depth() for shard in self._shards],
+                "submitted": self.submitted,
+                "processed": self.processed,
+                "coalesced": self.coalesced,
+                "shed": self.shed,
+                "failed": self.failed,
+                "last_lag_s": round(self.last_lag, 3),
+            }
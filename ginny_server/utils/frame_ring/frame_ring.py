@@ -0,0 +1,117 @@
+from queue import Empty
+from threading import Condition
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+class FrameReader:
+    """
+    Cursor of one consumer over a FrameRing.
+
+    A reader never holds the writer back, if it falls more than `max_lag` frames
+    behind the oldest frames are skipped and counted as dropped, so a slow
+    consumer only ever sees stale frames, it never stalls the RPC that writes.
+    """
+
+    def __init__(self, ring: "FrameRing", name: str, max_lag: int):
+        self.ring = ring
+        self.name = name
+        self.max_lag = max_lag
+        self.cursor = ring.written
+        self.read = 0
+        self.dropped = 0
+
+    def pending(self) -> int:
+        """Frames written that this reader has not consumed yet, capped at max_lag."""
+        return min(self.ring.written - self.cursor, self.max_lag)
+
+    def credits(self) -> int:
+        """Frames that can still be written before this reader starts dropping."""
+        return self.max_lag - self.pending()
+
+    def _skip_stale(self):
+        behind = self.ring.written - self.cursor
+        if behind > self.max_lag:
+            self.dropped += behind - self.max_lag
+            self.cursor = self.ring.written - self.max_lag
+
+    def get(self, timeout: Optional[float] = None) -> np.ndarray:
+        """
+        Next unread frame, blocking until one is written.
+
+        Raises:
+            queue.Empty: If no frame arrived within `timeout` seconds.
+        """
+        with self.ring.cond:
+            if not self.ring.cond.wait_for(lambda: self.ring.written > self.cursor, timeout):
+                raise Empty
+            self._skip_stale()
+            frame = self.ring.slots[self.cursor % self.ring.capacity]
+            self.cursor += 1
+            self.read += 1
+            return frame
+
+    def get_nowait(self) -> np.ndarray:
+        return self.get(timeout=0)
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending(),
+            "read": self.read,
+            "dropped": self.dropped,
+        }
+
+class FrameRing:
+    """
+    Fixed size ring of camera frames shared by every image consumer.
+
+    - `put` never blocks and never fails, the oldest frame is overwritten.
+    - `latest` returns the newest frame without taking the lock.
+    - Each consumer reads through its own FrameReader cursor, so face
+      recognition, CLIP and GetBbox do not compete for frames.
+    """
+
+    def __init__(self, capacity: int = 50):
+        self.capacity = capacity
+        self.slots = [None] * capacity
+        self.written = 0
+        self.cond = Condition()
+        self.readers: Dict[str, FrameReader] = {}
+
+    def __len__(self) -> int:
+        return min(self.written, self.capacity)
+
+    def put(self, frame: np.ndarray):
+        with self.cond:
+            self.slots[self.written % self.capacity] = frame
+            self.written += 1
+            self.cond.notify_all()
+
+    def latest(self) -> Optional[Tuple[int, np.ndarray]]:
+        """(sequence number, frame) of the newest frame, None before the first one."""
+        written = self.written
+        if written == 0:
+            return None
+        return written - 1, self.slots[(written - 1) % self.capacity]
+
+    def reader(self, name: str, max_lag: Optional[int] = None) -> FrameReader:
+        """
+        Register a consumer that starts at the next written frame.
+
+        Args:
+            name (str): Name the reader is reported under in stats.
+            max_lag (Optional[int]): Frames the reader may fall behind before the
+                oldest are dropped, at most (and by default) the ring capacity.
+        """
+        max_lag = self.capacity if max_lag is None else min(max_lag, self.capacity)
+        with self.cond:
+            reader = FrameReader(self, name, max_lag)
+            self.readers[name] = reader
+        return reader
+
+    def stats(self) -> dict:
+        return {
+            "written": self.written,
+            "occupancy": len(self),
+            "readers": {name: reader.stats() for name, reader in self.readers.items()},
+        }
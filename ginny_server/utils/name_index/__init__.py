@@ -0,0 +1 @@
+from .name_index import NameIndex, soundex
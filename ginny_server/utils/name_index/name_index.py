@@ -0,0 +1,168 @@
+from collections import defaultdict
+from threading import RLock
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from fuzzywuzzy import fuzz
+
+_SOUNDEX_CODES = {}
+for _letters, _code in (("bfpv", "1"), ("cgjkqsxz", "2"), ("dt", "3"),
+                        ("l", "4"), ("mn", "5"), ("r", "6")):
+    for _letter in _letters:
+        _SOUNDEX_CODES[_letter] = _code
+
+def soundex(name: str) -> str:
+    """ American soundex of the first word of a name, "" when it has no letters """
+    letters = [c for c in name.lower().split()[0] if c.isalpha()] if name.strip() else []
+    if not letters:
+        return ""
+
+    code = letters[0].upper()
+    previous = _SOUNDEX_CODES.get(letters[0], "")
+    for letter in letters[1:]:
+        digit = _SOUNDEX_CODES.get(letter, "")
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        # h and w do not separate two letters with the same code, vowels do
+        if letter not in "hw":
+            previous = digit
+    return code.ljust(4, "0")
+
+def _normalise(name: str) -> str:
+    return " ".join(name.lower().split())
+
+def _trigrams(key: str) -> Set[str]:
+    padded = f"^^{key}$$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class NameIndex:
+    """
+    Inverted index over the names of the people in the graph, for the fuzzy
+    lookups of the knowledge extraction.
+
+    - Every name is posted under its character trigrams and its soundex code.
+      A query only scores the names it shares trigrams or a soundex code
+      with, the best `max_candidates` of them by shared trigrams, instead of
+      every name in the graph.
+    - Names whose length alone keeps them under the threshold are skipped,
+      fuzz.ratio can never reach it.
+    - Scores are fuzz.ratio like before, ties go to the name indexed first.
+    - Writes add names as they happen, `rebuild` replaces the whole set.
+    """
+
+    def __init__(self, max_candidates: int = 64):
+        self.max_candidates = max_candidates
+        self._lock = RLock()
+        self._names: Dict[str, int] = {}
+        self._by_key: Dict[str, Set[str]] = defaultdict(set)
+        self._grams: Dict[str, Set[str]] = defaultdict(set)
+        self._sounds: Dict[str, Set[str]] = defaultdict(set)
+        self._next_id = 0
+        self.queries = 0
+        self.scored = 0
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._names
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self._names)
+
+    def add(self, name: Optional[str]):
+        if not name or not name.strip():
+            return
+        with self._lock:
+            if name in self._names:
+                return
+            self._names[name] = self._next_id
+            self._next_id += 1
+
+            key = _normalise(name)
+            self._by_key[key].add(name)
+            for gram in _trigrams(key):
+                self._grams[gram].add(key)
+            self._sounds[soundex(key)].add(key)
+
+    def add_many(self, names: Iterable[str]):
+        with self._lock:
+            for name in names:
+                self.add(name)
+
+    def remove(self, name: str):
+        with self._lock:
+            if self._names.pop(name, None) is None:
+                return
+            key = _normalise(name)
+            self._by_key[key].discard(name)
+            if self._by_key[key]:
+                return
+            del self._by_key[key]
+            for gram in _trigrams(key):
+                self._grams[gram].discard(key)
+                if not self._grams[gram]:
+                    del self._grams[gram]
+            sound = soundex(key)
+            self._sounds[sound].discard(key)
+            if not self._sounds[sound]:
+                del self._sounds[sound]
+
+    def rebuild(self, names: Iterable[str]):
+        with self._lock:
+            self._names.clear()
+            self._by_key.clear()
+            self._grams.clear()
+            self._sounds.clear()
+            self._next_id = 0
+            self.add_many(names)
+
+    def _candidates(self, key: str) -> List[str]:
+        """ Keys sharing the most trigrams with the query, plus its soundex bucket """
+        overlap: Dict[str, int] = defaultdict(int)
+        for gram in _trigrams(key):
+            for candidate in self._grams.get(gram, ()):
+                overlap[candidate] += 1
+
+        candidates = sorted(overlap, key=overlap.get, reverse=True)[:self.max_candidates]
+        sounds_like = [candidate for candidate in self._sounds.get(soundex(key), ())
+                       if candidate not in overlap]
+        return candidates + sounds_like[:self.max_candidates]
+
+    def best_match(self, name: str, threshold: float = 0) -> Tuple[Optional[str], int]:
+        """
+            :return: the indexed name closest to `name` and its fuzz.ratio,
+                (None, -1) when nothing can score above the threshold
+        """
+        if not name or not name.strip():
+            return None, -1
+
+        with self._lock:
+            self.queries += 1
+            if name in self._names:
+                return name, 100
+
+            best_name, best_ratio, best_id = None, -1, None
+            for key in self._candidates(_normalise(name)):
+                for db_name in self._by_key[key]:
+                    # fuzz.ratio is at most 200 * shorter / (sum of lengths)
+                    total = len(name) + len(db_name)
+                    if 200 * min(len(name), len(db_name)) / total <= threshold:
+                        continue
+                    self.scored += 1
+                    ratio = fuzz.ratio(name, db_name)
+                    name_id = self._names[db_name]
+                    if ratio > best_ratio or (ratio == best_ratio and name_id < best_id):
+                        best_name, best_ratio, best_id = db_name, ratio, name_id
+            return best_name, best_ratio
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "names": len(self._names),
+                "grams": len(self._grams),
+                "queries": self.queries,
+                "scored_per_query": round(self.scored / self.queries, 2) if self.queries else 0,
+            }
@@ -1 +1,4 @@
 from .database import _Neo4j
+from .relationships import (
+    RELATIONSHIP_TYPES, PersonRef, RelationshipMutation, RelationshipError, relationship_type
+)
@@ -0,0 +1,265 @@
+import copy
+from threading import RLock
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+class PersonContext:
+    """Cached slice of one person: the node, the recent message history with embeddings and the relationship text."""
+
+    def __init__(self, face_id: str):
+        self.face_id = face_id
+        self.person: Optional[dict] = None
+        self.relationships: Optional[str] = None
+        # Names of the other people the relationship text describes
+        self.mentions: Set[str] = set()
+        self.history_loaded = False
+        self.numbers: List[int] = []
+        self.ids: List[Optional[str]] = []
+        self.roles: List[str] = []
+        self.texts: List[str] = []
+        self.embeddings: Optional[np.ndarray] = None
+
+    def complete(self) -> bool:
+        return self.person is not None and self.relationships is not None and self.history_loaded
+
+class PersonContextCache:
+    """
+    Process local cache of what a turn reads about a person, keyed by face_id.
+
+    This server is the only writer of the graph, so instead of expiring
+    entries the writes update them in place:
+    - a committed message is appended to the person's history,
+    - a name or attribute update patches the cached person node and drops
+      the relationship texts that mention the person,
+    - a relationship write drops the relationship texts of the people it
+      connects,
+    - any other write drops the person nodes and relationship texts of every
+      entry.
+    The message histories are left alone as only the message writes touch
+    them, so a partial miss reloads the person and relationships only.
+
+    Memory is bounded by keeping at most `max_persons` people (LRU) and the last
+    `max_messages` messages of each, the similarity search of a cached turn only
+    looks at those messages.
+    """
+
+    def __init__(self, max_persons: int = 32, max_messages: int = 500):
+        """
+        Args:
+            max_persons (int): People kept before the least recently used is evicted, 0 disables the cache.
+            max_messages (int): Most recent messages kept per person.
+        """
+        self.max_persons = max_persons
+        self.max_messages = max_messages
+        self._lock = RLock()
+        self._entries: "OrderedDict[str, PersonContext]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_persons > 0
+
+    def _entry(self, face_id: str, create: bool = False) -> Optional[PersonContext]:
+        """Caller holds the lock."""
+        entry = self._entries.get(face_id)
+        if entry is not None:
+            self._entries.move_to_end(face_id)
+        elif create and self.enabled:
+            entry = PersonContext(face_id)
+            self._entries[face_id] = entry
+            while len(self._entries) > self.max_persons:
+                self._entries.popitem(last=False)
+        return entry
+
+    ############################################################################
+    #                              Person node                                 #
+    ############################################################################
+    def get_person(self, face_id: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entry(face_id)
+            if entry is None or entry.person is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return copy.deepcopy(entry.person)
+
+    def put_person(self, face_id: str, person: dict):
+        with self._lock:
+            entry = self._entry(face_id, create=True)
+            if entry is not None:
+                entry.person = copy.deepcopy(person)
+
+    def update_person(self, face_id: str, **fields):
+        """Patch the cached node, fields that are None are left as they are."""
+        with self._lock:
+            entry = self._entry(face_id)
+            if entry is None or entry.person is None:
+                return
+            for key, value in fields.items():
+                if value is not None:
+                    entry.person[key] = value
+
+    ############################################################################
+    #                              Relationships                               #
+    ############################################################################
+    def get_relationships(self, face_id: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entry(face_id)
+            return None if entry is None else entry.relationships
+
+    def put_relationships(self, face_id: str, relationships: str, mentions: Iterable[str] = ()):
+        with self._lock:
+            entry = self._entry(face_id, create=True)
+            if entry is not None:
+                entry.relationships = relationships
+                entry.mentions = set(mentions)
+
+    ############################################################################
+    #                              Messages                                    #
+    ############################################################################
+    def put_history(self, face_id: str, rows: List[dict]):
+        """
+        Replace the history of face_id with rows holding message_id, role,
+        text, message_number and embedding.
+        """
+        rows = sorted(rows, key=lambda row: row["message_number"])[-self.max_messages:]
+        dim = next((len(row["embedding"]) for row in rows if row.get("embedding")), None)
+        with self._lock:
+            entry = self._entry(face_id, create=True)
+            if entry is None:
+                return
+            entry.numbers = [row["message_number"] for row in rows]
+            entry.ids = [row.get("message_id") for row in rows]
+            entry.roles = [row["role"] for row in rows]
+            entry.texts = [row["text"] for row in rows]
+            entry.embeddings = None if dim is None else np.vstack([
+                self._vector(row.get("embedding"), dim) for row in rows
+            ])
+            entry.history_loaded = True
+
+    def append_messages(self, face_id: str, messages: List[Tuple[str, str, str, Optional[list]]]):
+        """
+        Append committed (message_id, role, text, embedding) messages after the last cached one,
+        a person whose history is not cached is left alone.
+        """
+        with self._lock:
+            entry = self._entry(face_id)
+            if entry is None or not entry.history_loaded:
+                return
+            next_number = entry.numbers[-1] + 1 if entry.numbers else 0
+            for message_id, role, text, embedding in messages:
+                if message_id in entry.ids:
+                    # A retried write whose first attempt got through
+                    continue
+                if entry.embeddings is None and embedding is not None:
+                    entry.embeddings = np.zeros((len(entry.numbers), len(embedding)), dtype=np.float32)
+                entry.numbers.append(next_number)
+                entry.ids.append(message_id)
+                entry.roles.append(role)
+                entry.texts.append(text)
+                if entry.embeddings is not None:
+                    row = self._vector(embedding, entry.embeddings.shape[1])
+                    entry.embeddings = np.vstack([entry.embeddings, row[None]])
+                next_number += 1
+
+            extra = len(entry.numbers) - self.max_messages
+            if extra > 0:
+                del entry.numbers[:extra], entry.ids[:extra], entry.roles[:extra], entry.texts[:extra]
+                if entry.embeddings is not None:
+                    entry.embeddings = entry.embeddings[extra:]
+
+    @staticmethod
+    def _vector(embedding, dim: int) -> np.ndarray:
+        if embedding is None:
+            return np.zeros(dim, dtype=np.float32)
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def context(self, face_id: str, query_embedding, last_k: int, top_k: int) -> Optional[dict]:
+        """
+        Same shape as the context query: the last_k messages plus the top_k
+        most similar ones with their neighbours, ascending, and the ids of
+        those messages. None on a miss.
+        """
+        with self._lock:
+            entry = self._entry(face_id)
+            if entry is None or not entry.complete():
+                self.misses += 1
+                return None
+            self.hits += 1
+
+            n = len(entry.numbers)
+            keep = set(range(max(n - last_k, 0), n))
+            if entry.embeddings is not None and n:
+                scores = entry.embeddings @ self._vector(query_embedding, entry.embeddings.shape[1])
+                k = min(top_k, n)
+                for i in np.argpartition(-scores, k - 1)[:k]:
+                    keep.update(j for j in (i - 1, i, i + 1) if 0 <= j < n)
+
+            return {
+                "name": entry.person.get("name"),
+                "attributes": entry.person.get("attributes"),
+                "messages": [{"role": entry.roles[i], "content": entry.texts[i]} for i in sorted(keep)],
+                "message_ids": {entry.ids[i] for i in keep},
+                "relationships": entry.relationships
+            }
+
+    def has_history(self, face_id: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(face_id)
+            return entry is not None and entry.history_loaded
+
+    def recent(self, face_id: str, last_k: int) -> Optional[List[dict]]:
+        with self._lock:
+            entry = self._entry(face_id)
+            if entry is None or not entry.history_loaded:
+                return None
+            return [{"role": role, "content": text}
+                    for role, text in zip(entry.roles[-last_k:], entry.texts[-last_k:])]
+
+    ############################################################################
+    #                              Invalidation                                #
+    ############################################################################
+    def invalidate(self, face_id: str):
+        with self._lock:
+            self._entries.pop(face_id, None)
+
+    def invalidate_relationships(self, face_ids: Optional[Iterable[str]] = None,
+                                 names: Iterable[str] = ()):
+        """
+        Drop the relationship texts of the people with these face_ids or names
+        and of the people whose text mentions one of the names, or of every
+        entry when no face_ids are given. An entry whose person is not cached
+        has an unknown name and is dropped whenever names are given.
+        """
+        names = set(names)
+        with self._lock:
+            for entry in self._entries.values():
+                if face_ids is None and not names:
+                    entry.relationships = None
+                elif entry.face_id in (face_ids or ()) or (names and (
+                        entry.person is None or entry.person.get("name") in names or entry.mentions & names)):
+                    entry.relationships = None
+
+    def invalidate_named(self, names: Iterable[str]):
+        """After a write addressing people by name: their nodes and the texts mentioning them."""
+        names = set(names)
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.person is not None and entry.person.get("name") in names:
+                    entry.person = None
+        self.invalidate_relationships(face_ids=(), names=names)
+
+    def invalidate_derived(self):
+        """After a write the cache cannot follow, the message histories stay."""
+        with self._lock:
+            for entry in self._entries.values():
+                entry.person = None
+                entry.relationships = None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"persons": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -3,34 +3,155 @@ import json
 import uuid
 import traceback
 from queue import Queue
+from threading import Thread
+from typing import Callable, List
 from neo4j import GraphDatabase
 
 from utils import PersonDetails
+from utils.name_index import NameIndex
+from .context_cache import PersonContextCache
+from .relationships import RelationshipMutation, group_mutations, mutation_names
+
+# Threads that can hold a connection at the same time: the gRPC handlers
+# (main.py), the turn pipeline pool, the persistence writers and the
+# workers of the relationship extraction pool
+WORKER_THREADS = 10 + 8 + 4 + int(os.getenv("EXTRACTION_WORKERS", "4"))
 
 class _Neo4j:
-    def __init__(self, neo4j_url="bolt://172.27.72.27:7687"):
+    def __init__(self, neo4j_url="bolt://172.27.72.27:7687", max_pool_size=None):
         neo4j_passwd = os.environ["NEO4J_PASSWORD"]
         neo4j_user = "neo4j"
-        self.driver = GraphDatabase.driver(neo4j_url, auth=(neo4j_user, neo4j_passwd))
-        print("Connected to the database")
+        # One connection per worker thread plus headroom for the background checks,
+        # a thread waits at most connection_acquisition_timeout for a free one
+        pool_size = max_pool_size or int(os.getenv("NEO4J_POOL_SIZE", WORKER_THREADS + 8))
+        self.driver = GraphDatabase.driver(
+            neo4j_url,
+            auth=(neo4j_user, neo4j_passwd),
+            max_connection_pool_size=pool_size,
+            connection_acquisition_timeout=10.0,
+            max_transaction_retry_time=15.0
+        )
+        print(f"Connected to the database, pool of {pool_size} connections")
 
         self.relationship_queue = Queue()
+        # Set CONTEXT_CACHE_PERSONS=0 to read everything from the database
+        self.context_cache = PersonContextCache(max_persons=int(os.getenv("CONTEXT_CACHE_PERSONS", "32")))
+        # Compare every cached turn context against the database, for debugging
+        self.check_context_cache = os.getenv("CONTEXT_CACHE_CHECK") == "1"
+        # Names for the fuzzy lookups, loaded once and kept up to date by the writes
+        self.name_index = NameIndex()
+        self.ensure_indexes()
         self.update_db_name_list()
 
+    def ensure_indexes(self):
+        """ 
+            The last k messages of a person are read as a range over the first
+            index, the message writes check for an existing message_id
+        """
+        with self.driver.session() as session:
+            session.run("""
+                CREATE INDEX message_face_number IF NOT EXISTS
+                FOR (m:Message) ON (m.face_id, m.message_number)
+            """).consume()
+            session.run("""
+                CREATE INDEX message_id IF NOT EXISTS
+                FOR (m:Message) ON (m.message_id)
+            """).consume()
+
     def close(self):
         self.driver.close()
 
+    ############################################################################
+    #                          Managed transactions                            #
+    ############################################################################
+    # Every query runs in a managed transaction, the driver retries it on
+    # transient errors and lost leaders for up to max_transaction_retry_time.
+    # Units of work can therefore run more than once and have to be idempotent.
+
+    @staticmethod
+    def _data(tx, query, params):
+        return tx.run(query, **params).data()
+
+    @staticmethod
+    def _consume(tx, query, params):
+        return tx.run(query, **params).consume().counters
+
     def read_query(self, query, **params):
         with self.driver.session() as session:
-            return session.run(query, **params).data()
+            return session.execute_read(self._data, query, params)
+
+    def _write(self, query, **params):
+        """ Returns the counters of the write """
+        with self.driver.session() as session:
+            return session.execute_write(self._consume, query, params)
+
+    def _write_data(self, query, **params):
+        with self.driver.session() as session:
+            return session.execute_write(self._data, query, params)
 
     def write_query(self, query, **params):
+        """ Arbitrary write, the cache cannot tell what it touched """
+        self._write(query, **params)
+        self.context_cache.invalidate_derived()
+
+    def read_transaction(self, work: Callable, *args):
+        """ Runs work(tx, *args) as one managed read transaction """
         with self.driver.session() as session:
-            session.run(query, **params)
+            return session.execute_read(work, *args)
+
+    def _write_transaction(self, work: Callable, *args):
+        with self.driver.session() as session:
+            return session.execute_write(work, *args)
+
+    def write_transaction(self, work: Callable, *args):
+        """ Runs work(tx, *args) as one managed write transaction, a single commit """
+        result = self._write_transaction(work, *args)
+        self.context_cache.invalidate_derived()
+        return result
+
+    @staticmethod
+    def unwind(tx, query, rows: List[dict], batch_size=1000, **params):
+        """ 
+            Runs a query consuming `UNWIND $rows AS row` over rows in chunks of 
+            batch_size, inside the transaction tx 
+        """
+        for start in range(0, len(rows), batch_size):
+            tx.run(query, rows=rows[start:start + batch_size], **params).consume()
+
+    def write_batch(self, query, rows: List[dict], batch_size=1000, **params):
+        """ Bulk write of rows through an UNWIND query, all chunks commit together """
+        if not rows:
+            return
+        self.write_transaction(lambda tx: self.unwind(tx, query, rows, batch_size, **params))
+
+    def merge_relationships(self, mutations: List[RelationshipMutation], batch_size=1000):
+        """ 
+            Writes relationship mutations in one transaction. They run as one 
+            UNWIND per type and person keys, so the query texts repeat and 
+            Neo4j reuses their plans
+        """
+        grouped = group_mutations(mutations)
+        if not grouped:
+            return
+
+        def work(tx):
+            for query, rows in grouped.items():
+                self.unwind(tx, query, rows, batch_size)
+
+        self._write_transaction(work)
+        # Only the relationship texts of the people the edges connect change
+        people = [person for mutation in mutations for person in (mutation.source, mutation.target)]
+        self.context_cache.invalidate_relationships(
+            face_ids=[person.value for person in people if person.key == "face_id"],
+            names=[person.value for person in people if person.key == "name"]
+        )
+        self.add_people_names(mutation_names(mutations))
 
     def update_name_or_attribute(self, face_id=None, name=None, attributes=None, pid=None):
         if face_id:
             query = """
+                OPTIONAL MATCH (old:Person {face_id: $face_id})
+                WITH old.name AS old_name
                 MERGE (p:Person {face_id: $face_id})
                 ON MATCH SET 
                     p.name = CASE 
@@ -38,8 +159,19 @@ class _Neo4j:
                                 ELSE $name 
                             END,
                     p.attributes = COALESCE($attributes, p.attributes)
+                RETURN old_name, p.name AS name
                 """
-            self.write_query(query, face_id=face_id, name=name, attributes=attributes)
+            result = self._write_data(query, face_id=face_id, name=name, attributes=attributes)
+            has_name = name is not None and name.strip() != ""
+            self.context_cache.update_person(face_id, name=name if has_name else None, attributes=attributes)
+            if has_name:
+                self.name_index.add(name)
+            # Relationship texts of other people mention this one by name, its own text starts with its name
+            old_name, new_name = (result[0]["old_name"], result[0]["name"]) if result else (None, None)
+            self.context_cache.invalidate_relationships(
+                face_ids=[face_id] if old_name != new_name else [],
+                names={old_name, new_name} - {None}
+            )
         else:
             if name:
                 query = """ 
@@ -48,7 +180,8 @@ class _Neo4j:
                     SET p.attributes = COALESCE($attributes, p.attributes) 
                 """
 
-                self.write_query(query, name=name, attributes=attributes, pid=pid)
+                self._write(query, name=name, attributes=attributes, pid=pid)
+                self.context_cache.invalidate_named([name])
 
 
     def create_or_update_person(self, face_id=None, name=None, state='speak'):
@@ -77,13 +210,14 @@ class _Neo4j:
         assistant_embedding = ChatGPT.get_openai_embedding(assistant_text)
         assistant_message_id = str(uuid.uuid4())
 
-        with self.driver.session() as session:
-            session.run(
-                query, face_id=face_id, name=name, state=state,
-                assistant_text=assistant_text, assistant_embedding=assistant_embedding,
-                assistant_message_id=assistant_message_id
-            )
-        self.update_db_name_list()
+        self._write(
+            query, face_id=face_id, name=name, state=state,
+            assistant_text=assistant_text, assistant_embedding=assistant_embedding,
+            assistant_message_id=assistant_message_id
+        )
+        self.context_cache.invalidate(face_id)
+        self.context_cache.invalidate_relationships()
+        self.name_index.add(name)
         print("Created a new person")
 
     def get_person_details(self, face_id) -> PersonDetails:
@@ -92,27 +226,63 @@ class _Neo4j:
         :param face_id: Unique identifier for the person.
         :return: PersonDetails Object
         """
-        with self.driver.session() as session:
-            result = session.run(
-                """
-                MATCH (p:Person {face_id: $face_id})
-                RETURN p.face_id AS face_id, p.name AS name, p.messages AS messages, p.state AS state, p.attributes as attributes
-                """,
-                face_id=face_id
-            )
-            record = result.single()
-            if record:
-                return PersonDetails({
-                    "face_id": record.get("face_id"),
-                    "name": record.get("name"),
-                    "messages": json.loads(record["messages"]) if record.get("messages") else [],
-                    "state": record.get("state"),
-                    "attributes": record.get("attributes")
-                })
-            else:
-                return PersonDetails() 
+        from utils import PersistenceQueue
+
+        # p.state is set by the queued message write, the latest queued turn wins until it lands
+        pending_state = PersistenceQueue.pending_state(face_id)
+        cached = self.context_cache.get_person(face_id)
+        if cached is not None:
+            if pending_state is not None:
+                cached["state"] = pending_state
+            return PersonDetails(cached)
+
+        result = self.read_query(
+            """
+            MATCH (p:Person {face_id: $face_id})
+            RETURN p.face_id AS face_id, p.name AS name, p.messages AS messages, p.state AS state, p.attributes as attributes
+            """,
+            face_id=face_id
+        )
+        if result:
+            person = self._person_fields(result[0])
+            self.context_cache.put_person(face_id, person)
+            person = dict(person)
+            if pending_state is not None:
+                person["state"] = pending_state
+            return PersonDetails(person)
+        else:
+            return PersonDetails() 
+
+    @staticmethod
+    def _person_fields(record) -> dict:
+        return {
+            "face_id": record.get("face_id"),
+            "name": record.get("name"),
+            "messages": json.loads(record["messages"]) if record.get("messages") else [],
+            "state": record.get("state"),
+            "attributes": record.get("attributes")
+        }
 
     def describe_relationships_by_face_id(self, face_id):
+        cached = self.context_cache.get_relationships(face_id)
+        if cached is not None:
+            return cached
+
+        result = self._query_relations(face_id)
+        if result is None:
+            return "No person found with that face_id."
+        relationships = self._describe_relations(*result)
+        self.context_cache.put_relationships(face_id, relationships, self._mentioned_names(result[1]))
+        return relationships
+
+    def _query_relationships(self, face_id):
+        result = self._query_relations(face_id)
+        if result is None:
+            return "No person found with that face_id."
+        return self._describe_relations(*result)
+
+    def _query_relations(self, face_id):
+        """ (name, relations) of the person, None when there is no such person """
         query = """
         MATCH (p:Person {face_id: $face_id})
         OPTIONAL MATCH (p)-[r]->(other:Person)
@@ -130,10 +300,15 @@ class _Neo4j:
 
         result = self.read_query(query, face_id=face_id)
         if not result:
-            return "No person found with that face_id."
+            return None
+        return result[0]["selfName"], result[0]["relations"]
 
-        self_name = result[0]["selfName"] or "This person"
-        relations = result[0]["relations"]
+    @staticmethod
+    def _mentioned_names(relations):
+        return {rel.get("target") or rel.get("source") for rel in relations} - {None}
+
+    def _describe_relations(self, self_name, relations):
+        self_name = self_name or "This person"
         sentences = []
 
         for rel in relations:
@@ -178,7 +353,8 @@ class _Neo4j:
 
     def update_db_name_list(self):
         """ 
-            Gets the latest names in the db and stores in the database name variable
+            Reloads every name in the db into the name index, the writes keep 
+            it up to date afterwards through add_people_names
         """
         query = """
             MATCH (p:Person)
@@ -186,7 +362,11 @@ class _Neo4j:
             RETURN p.name AS name
         """
         name_result = self.read_query(query)
-        self.people_names = [result["name"] for result in name_result]
+        self.name_index.rebuild(result["name"] for result in name_result)
+
+    def add_people_names(self, names):
+        """ Adds the names a write has just merged into the graph """
+        self.name_index.add_many(names)
 
     def get_people_without_face_id(self, name):
         query = """ 
@@ -205,7 +385,7 @@ class _Neo4j:
             raise ValueError(f"The person {name} does not exist in the database")
         
     def get_db_people_names(self):
-        return self.people_names
+        return self.name_index.names()
 
     def get_cos_msgs(self, text, face_id, top_k=20):
         """ 
@@ -233,8 +413,8 @@ class _Neo4j:
 
         from utils import message_format
         # Getting query embedding 
-        from core_api import ChatGPT
-        query_embedding = ChatGPT.get_openai_embedding(text)
+        from core_api import EmbeddingService
+        query_embedding = EmbeddingService.embed(text, allow_local=True)
 
 
         results = self.read_query(cosine_query, query_embedding=query_embedding, 
@@ -258,64 +438,232 @@ class _Neo4j:
             Getting last k messages of the face_id
         """
         last_k_query = """ 
-            MATCH (p:Person {face_id: $face_id})
-            WITH p
-            MATCH (p)-[:MESSAGE]->(m:Message)
-            WITH m
-            MATCH window = (m0:Message)-[NEXT*0..20]->(m)
-            RETURN nodes(window) as chain
+            MATCH (p:Person {face_id: $face_id})-[:MESSAGE]->(latest:Message)
+            MATCH (m:Message {face_id: $face_id})
+            WHERE m.message_number > latest.message_number - $k
+            RETURN m.role AS role, m.text AS text, m.message_number AS message_number
+            ORDER BY message_number
         """
         from utils import message_format
 
-        messages = []
-        message_set = set()
-        message_num_list = []
         results = self.read_query(last_k_query, face_id=face_id, k=k)
-        for idx, result in enumerate(results):
-            row = result["chain"]
-            for msg in row:
-                if msg['message_number'] not in message_set:
-                    llm_dict = message_format(msg['role'], msg['text'])
-                    message_set.add(msg['message_number'])
-                    message_num_list.append(msg['message_number'])
-                    messages.append(llm_dict)
-        
+        messages = [message_format(msg['role'], msg['text']) for msg in results]
+        message_num_list = [msg['message_number'] for msg in results]
         return messages, message_num_list 
 
-    def get_person_messages(self, latest_message: dict, face_id: str):
+    def get_turn_context(self, latest_message: dict, face_id: str, last_k=20, top_k=20):
         """ 
-            Takes the query, does the cosine distance on the messages of the person 
-            and then returns them in ascending order, also reduces the returns the 
-            past 20 messages along with the latest message at the end
+            Everything a speaking turn reads: the last_k messages of the person, 
+            the messages around the top_k most similar ones, and the person's 
+            relationships. Served from the context cache when the person is 
+            in it, otherwise loaded with a single query.
+            Returns a dict with "name", "attributes", "messages" (ascending, 
+            latest_message at the end) and "relationships" (as text)
         """
-        # Message is in format {"<user>": "<message>"}
-        latest_text = latest_message["content"]
-
-        cos_msgs, cos_msg_num_list = self.get_cos_msgs(latest_text, face_id)
-
-        # Getting last 5 messages
-        last_20_msgs, last_20_msg_num_list = self.get_last_k_msgs(face_id)
+        from core_api import EmbeddingService
+        from utils import PersistenceQueue
+
+        # Only ranks the search, never stored, so the local fallback is fine
+        query_embedding = EmbeddingService.embed(latest_message["content"], allow_local=True)
+        context = self.context_cache.context(face_id, query_embedding, last_k, top_k)
+        if context is None and self.context_cache.enabled:
+            self._load_person_context(face_id)
+            context = self.context_cache.context(face_id, query_embedding, last_k, top_k)
+        elif context is not None and self.check_context_cache:
+            Thread(target=self._check_cached_context, args=(face_id, last_k), daemon=True).start()
+        if context is None:
+            context = self._fetch_turn_context(face_id, query_embedding, last_k, top_k)
+
+        # Turns still queued for writing, one that landed meanwhile is already in the last k
+        messages = context["messages"]
+        committed_ids = context.pop("message_ids")
+        for message_id, pending in PersistenceQueue.pending_messages(face_id):
+            if message_id not in committed_ids:
+                messages.append(pending)
+        messages.append(latest_message)
+        return context
+
+    def _load_person_context(self, face_id: str):
+        """ 
+            Fills the context cache for face_id with one query. A history that
+            is already cached is kept, only the person node and relationships
+            are read again after a write dropped them
+        """
+        with_history = not self.context_cache.has_history(face_id)
+        history_query = """
+            OPTIONAL MATCH (p)-[:MESSAGE]->(latest:Message)
+            CALL {
+                WITH latest
+                OPTIONAL MATCH (m:Message {face_id: $face_id})
+                WHERE m.message_number > latest.message_number - $max_messages
+                RETURN collect(m {.message_id, .role, .text, .message_number, .embedding}) AS history
+            }
+        """ if with_history else ""
+        load_query = """ 
+            MATCH (p:Person {face_id: $face_id})
+        """ + history_query + """
+            CALL {
+                WITH p
+                OPTIONAL MATCH (p)-[r]->(other:Person)
+                RETURN collect({
+                    type: type(r), direction: 'out', 
+                    target: other.name, attributes: other.attributes
+                }) AS outgoing
+            }
+            CALL {
+                WITH p
+                OPTIONAL MATCH (other2:Person)-[r2]->(p)
+                RETURN collect({
+                    type: type(r2), direction: 'in', 
+                    source: other2.name, attributes: other2.attributes
+                }) AS incoming
+            }
+            RETURN p.face_id AS face_id, p.name AS name, p.messages AS messages, 
+                   p.state AS state, p.attributes AS attributes, 
+                   """ + ("history, " if with_history else "") + """outgoing + incoming AS relations
+        """
+        result = self.read_query(load_query, face_id=face_id, 
+                                 max_messages=self.context_cache.max_messages)
+        if not result:
+            return
+        row = result[0]
+        self.context_cache.put_person(face_id, self._person_fields(row))
+        if with_history:
+            self.context_cache.put_history(face_id, row["history"])
+        self.context_cache.put_relationships(face_id, self._describe_relations(row["name"], row["relations"]),
+                                             self._mentioned_names(row["relations"]))
+
+    def _check_cached_context(self, face_id: str, last_k: int):
+        """ Consistency check mode, drops the entry when it disagrees with the database """
+        try:
+            cached_person = self.context_cache.get_person(face_id)
+            cached_recent = self.context_cache.recent(face_id, last_k)
+            cached_relationships = self.context_cache.get_relationships(face_id)
 
-        # Merge message_num_list and remove duplicates while maintaining order
-        merged_message_num_list = sorted(set(cos_msg_num_list) | set(last_20_msg_num_list))
+            person = self.read_query(
+                "MATCH (p:Person {face_id: $face_id}) RETURN p.name AS name, p.attributes AS attributes",
+                face_id=face_id
+            )
+            recent, _ = self.get_last_k_msgs(face_id, k=last_k)
+            relationships = self._query_relationships(face_id)
+
+            mismatches = []
+            if cached_person is not None and person and (
+                    cached_person.get("name"), cached_person.get("attributes")) != (
+                    person[0]["name"], person[0]["attributes"]):
+                mismatches.append("person")
+            if cached_recent is not None and cached_recent != recent:
+                mismatches.append("messages")
+            if cached_relationships is not None and cached_relationships != relationships:
+                mismatches.append("relationships")
+            if mismatches:
+                print(f"Context cache of {face_id} is stale ({', '.join(mismatches)}), dropping it")
+                self.context_cache.invalidate(face_id)
+        except Exception as e:
+            print(f"Context cache check of {face_id} failed: {e}")
 
-        # Create a mapping of message numbers to messages
-        message_mapping = {num: msg for num, msg in zip(cos_msg_num_list, cos_msgs)}
-        message_mapping.update({num: msg for num, msg in zip(last_20_msg_num_list, last_20_msgs)})  # Update with latest
+    def _fetch_turn_context(self, face_id: str, query_embedding, last_k=20, top_k=20):
+        """ The turn context straight from the database, in one round trip """
+        context_query = """ 
+            MATCH (p:Person {face_id: $face_id})
+            OPTIONAL MATCH (p)-[:MESSAGE]->(latest:Message)
+            CALL {
+                WITH latest
+                OPTIONAL MATCH (m:Message {face_id: $face_id})
+                WHERE m.message_number > latest.message_number - $last_k
+                RETURN collect(m {.message_id, .role, .text, .message_number}) AS recent
+            }
+            CALL {
+                CALL db.index.vector.queryNodes('message_embeddings', $top_k, $query_embedding)
+                YIELD node AS message, score
+                WHERE message.face_id = $face_id
+                OPTIONAL MATCH (prev:Message)-[:NEXT]->(message)
+                OPTIONAL MATCH (message)-[:NEXT]->(next:Message)
+                RETURN collect(message {.message_id, .role, .text, .message_number}) +
+                       collect(prev {.message_id, .role, .text, .message_number}) +
+                       collect(next {.message_id, .role, .text, .message_number}) AS similar
+            }
+            CALL {
+                WITH p
+                OPTIONAL MATCH (p)-[r]->(other:Person)
+                RETURN collect({
+                    type: type(r), direction: 'out', 
+                    target: other.name, attributes: other.attributes
+                }) AS outgoing
+            }
+            CALL {
+                WITH p
+                OPTIONAL MATCH (other2:Person)-[r2]->(p)
+                RETURN collect({
+                    type: type(r2), direction: 'in', 
+                    source: other2.name, attributes: other2.attributes
+                }) AS incoming
+            }
+            RETURN p.name AS name, p.attributes AS attributes, 
+                   recent, similar, outgoing + incoming AS relations
+        """
+        from utils import message_format
 
-        # Reconstruct merged messages list based on sorted message numbers
-        merged_messages = [message_mapping[num] for num in merged_message_num_list]
+        result = self.read_query(context_query, face_id=face_id, last_k=last_k,
+                                 top_k=top_k, query_embedding=query_embedding)
+        if not result:
+            return {
+                "name": None,
+                "attributes": None,
+                "messages": [],
+                "message_ids": set(),
+                "relationships": "No person found with that face_id."
+            }
+        row = result[0]
+
+        # Similar windows and the recent chain overlap, message numbers are unique per person
+        by_number = {msg["message_number"]: msg for msg in row["similar"] + row["recent"]}
+        return {
+            "name": row["name"],
+            "attributes": row["attributes"],
+            "messages": [message_format(by_number[num]["role"], by_number[num]["text"]) 
+                         for num in sorted(by_number)],
+            "message_ids": {msg.get("message_id") for msg in by_number.values()},
+            "relationships": self._describe_relations(row["name"], row["relations"])
+        }
 
-        # Adding the latest_message to list 
-        merged_messages.append(latest_message)
+    def get_person_messages(self, latest_message: dict, face_id: str):
+        """ 
+            Takes the query, does the cosine distance on the messages of the person 
+            and then returns them in ascending order, also reduces the returns the 
+            past 20 messages along with the latest message at the end
+        """
+        return self.get_turn_context(latest_message, face_id)["messages"]
 
-        return merged_messages
+    def message_record(self, person_details: PersonDetails) -> dict:
+        """
+            Snapshot of the latest exchange of a turn, everything
+            write_message_record needs once the turn itself is gone
+        """
+        usr_dict = person_details.get_latest_user_message()
+        llm_dict = person_details.get_latest_llm_message()
+        return {
+            "face_id": person_details.get_attribute("face_id"),
+            "state": person_details.get_attribute("state"),
+            "user_text": usr_dict["content"],
+            "llm_text": llm_dict.get("content"),
+            "user_message_id": str(uuid.uuid4()),
+            "llm_message_id": str(uuid.uuid4())
+        }
 
-    def add_message_to_person(self, person_details: PersonDetails):
-        from core_api import ChatGPT
+    def write_message_record(self, record: dict):
+        """
+            Embeds the messages of a message_record and appends them to the
+            person's message chain, raises if the write fails. Embeddings are
+            kept on the record so a retry does not ask for them again.
+        """
+        from core_api import EmbeddingService
+        from utils import Tracer
 
         add_llm_msg_query = """ 
             MATCH (p:Person {face_id:$face_id})-[:MESSAGE]->(latestMessage:Message)
+            // Already appended by an attempt whose acknowledgement got lost
+            WHERE NOT EXISTS { MATCH (:Message {message_id: $user_message_id}) }
             WITH p, latestMessage
             CREATE (userMessage:Message {
                 message_id: $user_message_id,
@@ -344,6 +692,7 @@ class _Neo4j:
 
         add_only_usr_msg = """ 
             MATCH (p:Person {face_id:$face_id})-[:MESSAGE]->(latestMessage:Message)
+            WHERE NOT EXISTS { MATCH (:Message {message_id: $user_message_id}) }
             WITH p, latestMessage
             CREATE (userMessage:Message {
                 message_id: $user_message_id,
@@ -355,46 +704,55 @@ class _Neo4j:
             })
             MERGE (latestMessage)-[:NEXT]->(userMessage)
             MERGE (p)-[:MESSAGE]->(userMessage)
-            WITH p, userMessage
+            WITH p, latestMessage
             MATCH (p)-[oldRel:MESSAGE]->(latestMessage)
             SET p.state = COALESCE($state, p.state)
             DELETE oldRel
         """
 
-        face_id = person_details.get_attribute("face_id")
-        state = person_details.get_attribute("state")
-        print("The State inside Neo4j Add message function is ", state)
-
-        usr_dict = person_details.get_latest_user_message()
-        usr_txt = usr_dict["content"]
-        usr_embedding = ChatGPT.get_openai_embedding(usr_txt)
-        usr_message_id = str(uuid.uuid4())
+        print("The State inside Neo4j Add message function is ", record["state"])
 
-        llm_dict = person_details.get_latest_llm_message()
-        llm_txt = llm_dict.get("content")
-
-        if llm_txt is not None:
-            llm_embedding = ChatGPT.get_openai_embedding(llm_txt)
-        else:
-            llm_embedding = None
-        llm_message_id = str(uuid.uuid4())
+        if record.get("user_embedding") is None:
+            # Both messages go out in one embedding request
+            texts = [record["user_text"]] if record["llm_text"] is None \
+                else [record["user_text"], record["llm_text"]]
+            embeddings = EmbeddingService.embed_many(texts)
+            record["user_embedding"] = embeddings[0]
+            record["llm_embedding"] = embeddings[1] if len(embeddings) > 1 else None
 
         query_params = {
-            "face_id": face_id,
-            "state": state,
-            "user_text": usr_txt,
-            "llm_text": llm_txt,
-            "user_embedding": usr_embedding,
-            "llm_embedding": llm_embedding,
-            "user_message_id": usr_message_id,
-            "llm_message_id": llm_message_id
+            "face_id": record["face_id"],
+            "state": record["state"],
+            "user_text": record["user_text"],
+            "llm_text": record["llm_text"],
+            "user_embedding": record["user_embedding"],
+            "llm_embedding": record.get("llm_embedding"),
+            "user_message_id": record["user_message_id"],
+            "llm_message_id": record["llm_message_id"]
         }
 
-        try:
-            if llm_dict == {}:
-                self.write_query(add_only_usr_msg, **query_params)
+        with Tracer.span("neo4j_write"):
+            if record["llm_text"] is None:
+                counters = self._write(add_only_usr_msg, **query_params)
             else:
-                self.write_query(add_llm_msg_query, **query_params)
+                counters = self._write(add_llm_msg_query, **query_params)
+
+        if counters.nodes_created == 0 and not self.read_query(
+                "MATCH (m:Message {message_id: $message_id}) RETURN 1 AS found LIMIT 1",
+                message_id=record["user_message_id"]):
+            # Not a duplicate either, the person or its latest message pointer is missing
+            raise RuntimeError(f"Message write of {record['face_id']} created nothing")
+
+        committed = [(record["user_message_id"], "user", record["user_text"], record["user_embedding"])]
+        if record["llm_text"] is not None:
+            committed.append((record["llm_message_id"], "assistant", record["llm_text"], record["llm_embedding"]))
+        self.context_cache.append_messages(record["face_id"], committed)
+        self.context_cache.update_person(record["face_id"], state=record["state"])
+
+    def add_message_to_person(self, person_details: PersonDetails):
+        """ Synchronous write, the apis go through PersistenceQueue instead """
+        try:
+            self.write_message_record(self.message_record(person_details))
         except Exception as e:
             print(f"Error in add_message_to_person: {e}")
             traceback.print_exc()
@@ -0,0 +1,120 @@
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple
+
+# The relationship types the extraction may write, "A -[:TYPE]-> B" reads
+# as "A is the TYPE of B"
+RELATIONSHIP_TYPES = frozenset({
+    "FATHER", "MOTHER", "PARENT", "SON", "DAUGHTER", "CHILD",
+    "BROTHER", "SISTER", "SIBLING", "HUSBAND", "WIFE", "PARTNER",
+    "BOYFRIEND", "GIRLFRIEND", "GRANDFATHER", "GRANDMOTHER", "GRANDCHILD",
+    "UNCLE", "AUNT", "COUSIN", "NEPHEW", "NIECE",
+    "FRIEND", "COLLEAGUE", "SUPERVISOR", "MANAGER", "STUDENT", "TEACHER",
+    "MENTOR", "CLASSMATE", "ROOMMATE", "NEIGHBOUR", "KNOWS",
+})
+
+_ALIASES = {
+    "DAD": "FATHER", "MOM": "MOTHER", "MUM": "MOTHER", "BEST_FRIEND": "FRIEND",
+    "GRANDPA": "GRANDFATHER", "GRANDMA": "GRANDMOTHER", "SPOUSE": "PARTNER",
+    "COWORKER": "COLLEAGUE", "CO_WORKER": "COLLEAGUE", "BOSS": "SUPERVISOR",
+    "ADVISOR": "SUPERVISOR", "PUPIL": "STUDENT", "MENTEE": "STUDENT",
+    "NEIGHBOR": "NEIGHBOUR",
+}
+
+# Properties a person can be looked up by, they end up in the query text
+_PERSON_KEYS = ("face_id", "name")
+
+class RelationshipError(ValueError):
+    pass
+
+def relationship_type(name: str) -> str:
+    """ The whitelisted type for a relationship name, raises RelationshipError otherwise """
+    rel_type = "_".join(str(name).upper().replace("-", " ").split())
+    rel_type = _ALIASES.get(rel_type, rel_type)
+    if rel_type not in RELATIONSHIP_TYPES:
+        raise RelationshipError(f"{name!r} is not an allowed relationship type")
+    return rel_type
+
+class PersonRef(NamedTuple):
+    """ A person matched by face_id or merged by name """
+    key: str
+    value: str
+
+    @classmethod
+    def by_face_id(cls, face_id: str) -> "PersonRef":
+        return cls("face_id", face_id)
+
+    @classmethod
+    def by_name(cls, name: str) -> "PersonRef":
+        return cls("name", name)
+
+class RelationshipMutation(NamedTuple):
+    """ Merge a `rel_type` edge from source to target, the source is the rel_type of the target """
+    source: PersonRef
+    rel_type: str
+    target: PersonRef
+
+    @classmethod
+    def merge(cls, source: PersonRef, rel_type: str, target: PersonRef) -> "RelationshipMutation":
+        for person in (source, target):
+            if person.key not in _PERSON_KEYS or not person.value:
+                raise RelationshipError(f"Cannot write a relationship for {person}")
+        if source == target:
+            raise RelationshipError(f"{source} cannot be in a relationship with themselves")
+        return cls(source, relationship_type(rel_type), target)
+
+@lru_cache(maxsize=None)
+def merge_query(rel_type: str, source_key: str, target_key: str) -> str:
+    """
+        The query for one (type, source key, target key) combination, there are
+        a fixed number of them so Neo4j plans each once and reuses the plan
+    """
+    if rel_type not in RELATIONSHIP_TYPES or source_key not in _PERSON_KEYS or target_key not in _PERSON_KEYS:
+        raise RelationshipError(f"No relationship query for {rel_type} {source_key} {target_key}")
+
+    # Known faces already exist, the people only talked about are merged.
+    # The MATCHes go first, cypher does not allow a MATCH right after a MERGE
+    people = sorted([("source", source_key), ("target", target_key)], key=lambda p: p[1] != "face_id")
+    clauses = [f"{'MATCH' if key == 'face_id' else 'MERGE'} ({var}:Person {{{key}: row.{var}}})"
+               for var, key in people]
+
+    return "\n".join([
+        "UNWIND $rows AS row",
+        *clauses,
+        f"MERGE (source)-[:{rel_type}]->(target)"
+    ])
+
+def group_mutations(mutations: Iterable[RelationshipMutation]) -> Dict[str, List[dict]]:
+    """ UNWIND rows per query, duplicates dropped """
+    grouped: Dict[str, List[dict]] = {}
+    seen = set()
+    for mutation in mutations:
+        if mutation in seen:
+            continue
+        seen.add(mutation)
+        query = merge_query(mutation.rel_type, mutation.source.key, mutation.target.key)
+        grouped.setdefault(query, []).append(
+            {"source": mutation.source.value, "target": mutation.target.value}
+        )
+    return grouped
+
+def mutation_names(mutations: Iterable[RelationshipMutation]) -> List[str]:
+    return [person.value for mutation in mutations
+            for person in (mutation.source, mutation.target) if person.key == "name"]
+
+@lru_cache(maxsize=None)
+def move_query(rel_type: str, outgoing: bool) -> str:
+    """
+        Query moving the relationships of one type and direction onto another
+        person when two nodes are merged. The graph can hold types from before
+        the whitelist, so the type is escaped instead of checked
+    """
+    escaped = rel_type.replace("`", "``")
+    pattern = f"(p1)-[newR:`{escaped}`]->(n)" if outgoing else f"(n)-[newR:`{escaped}`]->(p1)"
+    return f"""
+        MATCH (p1:Person {{face_id:$face_id}})
+        UNWIND $rows AS row
+        MATCH (n)
+        WHERE elementId(n) = row.nid
+        CREATE {pattern}
+        SET newR = row.props
+    """
@@ -0,0 +1 @@
+from .persistence_queue import _PersistenceQueue
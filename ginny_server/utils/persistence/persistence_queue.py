@@ -0,0 +1,249 @@
+import os
+import json
+import time
+import zlib
+import traceback
+from pathlib import Path
+from queue import Queue
+from threading import Lock, Thread
+from typing import Dict, List, Optional, Tuple
+
+import openai
+from neo4j.exceptions import ServiceUnavailable, SessionExpired, TransientError
+
+# Errors that say nothing about the record itself, retried for as long as they
+# last. The write embeds the messages first, so embedding API outages count too
+_TRANSIENT_ERRORS = (ServiceUnavailable, SessionExpired, TransientError, ConnectionError, TimeoutError,
+                     openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+
+class _PersistenceQueue:
+    """
+    Write-behind queue for the messages of finished turns.
+
+    - `enqueue(person_details)` snapshots the latest exchange, appends it to a
+      local JSONL journal and returns, the embeddings and the Cypher write
+      happen on a worker thread after the response stream is closed.
+    - Records are sharded by face_id over the workers, so the messages of one
+      person are committed in the order they were spoken.
+    - A failed write is retried with backoff, forever while Neo4j or the
+      embedding API is unreachable and up to `max_attempts` times otherwise, after which the
+      record is moved to `failed.jsonl` so it cannot hold its shard up.
+    - Records that were not committed when the server stopped are replayed
+      from the journal on start, the write skips ones that already landed.
+      The journal is rewritten with only the uncommitted records every
+      `compact_after` settled records. Only the queued records are fsynced,
+      a lost "done" marker just replays a record the write then skips.
+    - `pending_messages(face_id)` and `pending_state(face_id)` expose the
+      uncommitted messages and state so the next turn still sees them.
+    """
+
+    def __init__(self,
+                 neo4j,
+                 journal_dir: Optional[str] = None,
+                 num_workers: int = 4,
+                 max_attempts: int = 5,
+                 backoff_s: float = 0.5,
+                 max_backoff_s: float = 30.0,
+                 compact_after: int = 256):
+        """
+        Args:
+            neo4j (_Neo4j): Database the records are written to.
+            journal_dir (Optional[str]): Directory of the journal, env
+                PERSIST_JOURNAL_DIR or /workspace/database/journal by default.
+            num_workers (int): Writer threads, each owns a shard of face_ids.
+            max_attempts (int): Attempts for a record failing on a non transient error.
+            backoff_s (float): First wait between two attempts, doubled each time.
+            max_backoff_s (float): Cap on the wait between two attempts.
+            compact_after (int): Settled records after which the journal is rewritten.
+        """
+        self.neo4j = neo4j
+        self.journal_dir = Path(journal_dir or os.getenv("PERSIST_JOURNAL_DIR", "/workspace/database/journal"))
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        self.journal_path = self.journal_dir / "pending.jsonl"
+        self.failed_path = self.journal_dir / "failed.jsonl"
+        self.max_attempts = max_attempts
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.compact_after = compact_after
+
+        self._lock = Lock()
+        self._seq = 0
+        self._pending: Dict[str, List[dict]] = {}
+        self._journaled: Dict[int, dict] = {}
+        self._settled_since_compaction = 0
+        self._in_flight = 0
+        self.committed = 0
+        self.failed = 0
+        self.retries = 0
+
+        self.queues = [Queue() for _ in range(num_workers)]
+        replayed = self._replay_journal()
+        for i, queue in enumerate(self.queues):
+            Thread(target=self._worker, args=(queue,), name=f"persist-{i}", daemon=True).start()
+        if replayed:
+            print(f"Replaying {replayed} uncommitted turns from {self.journal_path}")
+
+    ############################################################################
+    #                              Journal                                     #
+    ############################################################################
+    def _append_journal(self, path: Path, entry: dict, sync: bool = True):
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            if sync:
+                os.fsync(f.fileno())
+
+    def _replay_journal(self) -> int:
+        if not self.journal_path.exists():
+            return 0
+
+        records = {}
+        last_seq = 0
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn last line, the turn never got acknowledged
+                    continue
+                if "done" in entry:
+                    records.pop(entry["done"], None)
+                else:
+                    records[entry["seq"]] = entry["record"]
+                    last_seq = max(last_seq, entry["seq"])
+
+        with self._lock:
+            self._seq = last_seq
+            for seq in sorted(records):
+                self._queue_record(seq, records[seq])
+        return len(records)
+
+    def _compact_journal(self):
+        """
+        Rewrite the journal with only the unsettled records every `compact_after`
+        settles, caller holds the lock. The new journal replaces the old one atomically.
+        """
+        if self._settled_since_compaction < self.compact_after:
+            return
+        tmp_path = self.journal_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for seq in sorted(self._journaled):
+                f.write(json.dumps({"seq": seq, "record": self._strip(self._journaled[seq])}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.journal_path)
+        self._settled_since_compaction = 0
+
+    ############################################################################
+    #                              Queueing                                    #
+    ############################################################################
+    def _shard(self, face_id) -> Queue:
+        return self.queues[zlib.crc32(str(face_id).encode("utf-8")) % len(self.queues)]
+
+    def _queue_record(self, seq: int, record: dict):
+        """Caller holds the lock."""
+        self._in_flight += 1
+        self._journaled[seq] = record
+        self._pending.setdefault(record["face_id"], []).append(record)
+        self._shard(record["face_id"]).put((seq, record, time.time()))
+
+    def enqueue(self, person_details):
+        """Persist the latest exchange of a finished turn without waiting for it."""
+        record = self.neo4j.message_record(person_details)
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+            # Appended in seq order under the lock, made durable outside of it
+            journal = open(self.journal_path, "a", encoding="utf-8")
+            journal.write(json.dumps({"seq": seq, "record": record}) + "\n")
+            journal.flush()
+            self._queue_record(seq, record)
+        try:
+            os.fsync(journal.fileno())
+        finally:
+            journal.close()
+
+    def pending_messages(self, face_id) -> List[Tuple[str, dict]]:
+        """(message_id, message) of face_id that are queued but not committed yet, oldest first."""
+        with self._lock:
+            records = list(self._pending.get(face_id, []))
+
+        messages = []
+        for record in records:
+            messages.append((record["user_message_id"], {"role": "user", "content": record["user_text"]}))
+            if record["llm_text"] is not None:
+                messages.append((record["llm_message_id"], {"role": "assistant", "content": record["llm_text"]}))
+        return messages
+
+    def pending_state(self, face_id) -> Optional[str]:
+        """State of the latest queued turn of face_id, None when nothing is queued."""
+        with self._lock:
+            records = self._pending.get(face_id)
+            return records[-1]["state"] if records else None
+
+    def _settle(self, seq: int, record: dict):
+        with self._lock:
+            self._append_journal(self.journal_path, {"done": seq}, sync=False)
+            records = [queued for queued in self._pending.get(record["face_id"], []) if queued is not record]
+            if records:
+                self._pending[record["face_id"]] = records
+            else:
+                self._pending.pop(record["face_id"], None)
+            self._journaled.pop(seq, None)
+            self._in_flight -= 1
+            self._settled_since_compaction += 1
+            self._compact_journal()
+
+    ############################################################################
+    #                              Writing                                     #
+    ############################################################################
+    def _worker(self, queue: Queue):
+        from utils import Tracer
+
+        while True:
+            seq, record, enqueued_at = queue.get()
+            attempts = 0
+            backoff = self.backoff_s
+            while True:
+                try:
+                    self.neo4j.write_message_record(record)
+                    self.committed += 1
+                    Tracer.record("persist_lag", enqueued_at)
+                    break
+                except _TRANSIENT_ERRORS as e:
+                    print(f"Neo4j unavailable, retrying turn {seq} in {backoff:.1f}s: {e}")
+                except Exception as e:
+                    attempts += 1
+                    traceback.print_exc()
+                    if attempts >= self.max_attempts:
+                        print(f"Giving up on turn {seq} of {record['face_id']} after {attempts} attempts")
+                        self._append_journal(self.failed_path, {"record": self._strip(record), "error": str(e)})
+                        self.failed += 1
+                        break
+
+                self.retries += 1
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff_s)
+
+            self._settle(seq, record)
+
+    @staticmethod
+    def _strip(record: dict) -> dict:
+        return {key: value for key, value in record.items() if not key.endswith("_embedding")}
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued record is settled, returns False on timeout."""
+        deadline = None if timeout is None else time.time() + timeout
+        while self._in_flight:
+            if deadline is not None and time.time() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self._in_flight,
+            "committed": self.committed,
+            "failed": self.failed,
+            "retries": self.retries,
+        }
@@ -1,3 +1,5 @@
+from concurrent.futures import Future
+
 class PersonDetails:
     def __init__(self, person_dict: dict={}) -> None:
         self.person_dict = person_dict
@@ -6,6 +8,7 @@ class PersonDetails:
         self.latest_llm_msg = {}
 
         self.all_relevant_messages = []
+        self.prefetched = {}
 
     def __bool__(self):
         return bool(self.person_dict)
@@ -56,3 +59,27 @@ class PersonDetails:
 
     def set_image(self, image):
         self.image = image
+
+    def set_prefetched(self, key: str, value):
+        """
+            Stores context fetched ahead of the api call, the value can be a 
+            concurrent Future that is still running
+        """
+        self.prefetched[key] = value
+
+    def get_prefetched(self, key: str, fetch):
+        """
+            Returns the prefetched value for key, waiting for it if it is still 
+            being fetched. Falls back to calling fetch() when nothing was 
+            prefetched or the prefetch failed
+        """
+        value = self.prefetched.get(key)
+        if value is None:
+            return fetch()
+        if isinstance(value, Future):
+            try:
+                return value.result()
+            except Exception as e:
+                print(f"Prefetch of {key} failed, fetching again: {e}")
+                return fetch()
+        return value
@@ -0,0 +1 @@
+from .tracing import _Tracer, Turn
@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import uuid
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+try:
+    from prometheus_client import Counter, Histogram, start_http_server
+except ImportError:
+    Counter = Histogram = start_http_server = None
+
+# Seconds, from a frame decode up to a whole conversational turn
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.5, 5.0, 10.0, 30.0)
+
+class Turn:
+    """Spans of one conversational turn, written out as a JSON trace when finished."""
+
+    def __init__(self, kind: str):
+        self.turn_id = uuid.uuid4().hex
+        self.kind = kind
+        self.start = time.time()
+        self.end = None
+        self.tags = {"route": "unknown"}
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def set_tag(self, key: str, value):
+        self.tags[key] = value
+
+    def add_span(self, name: str, start: float, end: float, **attrs):
+        with self._lock:
+            self.spans.append({
+                "name": name,
+                "start": round(start - self.start, 6),
+                "duration": round(end - start, 6),
+                "thread": threading.current_thread().name,
+                **attrs
+            })
+
+    def to_dict(self) -> dict:
+        return {
+            "turn_id": self.turn_id,
+            "kind": self.kind,
+            "start": self.start,
+            "duration": round((self.end or time.time()) - self.start, 6),
+            "tags": self.tags,
+            "spans": sorted(self.spans, key=lambda span: span["start"]),
+        }
+
+class _Tracer:
+    """
+    Records per stage latency of the turns.
+
+    - `span(name)` times a block and attaches it to the turn of the calling
+      thread, `bind(fn)` carries that turn over to pool threads.
+    - When a turn finishes every span is observed in the Prometheus histogram
+      `ginny_stage_seconds{stage, route}`, the route being the api the turn was
+      routed to, and the turn is written to `<trace_dir>/<date>/<turn_id>.json`.
+    - prometheus_client is optional, without it only the JSON traces are kept.
+    """
+
+    def __init__(self, trace_dir: Optional[str] = None):
+        self.trace_dir = Path(trace_dir or os.getenv("TRACE_DIR", "/workspace/traces"))
+        self._local = threading.local()
+        self._server_started = False
+
+        if Histogram is not None:
+            self.stage_seconds = Histogram(
+                "ginny_stage_seconds", "Latency of one stage of a turn",
+                ["stage", "route"], buckets=_BUCKETS
+            )
+            self.turn_seconds = Histogram(
+                "ginny_turn_seconds", "Latency of a whole turn",
+                ["route"], buckets=_BUCKETS
+            )
+            self.turns_total = Counter("ginny_turns_total", "Finished turns", ["route"])
+        else:
+            self.stage_seconds = self.turn_seconds = self.turns_total = None
+
+    def start_metrics_server(self, port: Optional[int] = None):
+        """Expose /metrics for Prometheus, a no-op without prometheus_client."""
+        if start_http_server is None:
+            print("prometheus_client is not installed, metrics are not exported")
+            return
+        if self._server_started:
+            return
+        port = port or int(os.getenv("METRICS_PORT", "9100"))
+        start_http_server(port)
+        self._server_started = True
+        print(f"Prometheus metrics on port {port}")
+
+    def current(self) -> Optional[Turn]:
+        return getattr(self._local, "turn", None)
+
+    def start_turn(self, kind: str) -> Turn:
+        turn = Turn(kind)
+        self._local.turn = turn
+        return turn
+
+    def bind(self, fn: Callable) -> Callable:
+        """Wrap fn so it records its spans into the caller's turn on any thread."""
+        turn = self.current()
+
+        def bound(*args, **kwargs):
+            previous = self.current()
+            self._local.turn = turn
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._local.turn = previous
+        return bound
+
+    def record(self, name: str, start: float, end: Optional[float] = None,
+               turn: Optional[Turn] = None, **attrs):
+        """Record an already measured span, for stages that do not fit a with block."""
+        end = time.time() if end is None else end
+        turn = turn or self.current()
+        if turn is not None:
+            turn.add_span(name, start, end, **attrs)
+        elif self.stage_seconds is not None:
+            self.stage_seconds.labels(stage=name, route="none").observe(end - start)
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.record(name, start, **attrs)
+
+    def finish_turn(self, turn: Optional[Turn] = None):
+        turn = turn or self.current()
+        if turn is None or turn.end is not None:
+            return
+        turn.end = time.time()
+        if self.current() is turn:
+            self._local.turn = None
+
+        route = str(turn.tags.get("route"))
+        if self.stage_seconds is not None:
+            for span in turn.spans:
+                self.stage_seconds.labels(stage=span["name"], route=route).observe(span["duration"])
+            self.turn_seconds.labels(route=route).observe(turn.end - turn.start)
+            self.turns_total.labels(route=route).inc()
+
+        try:
+            day_dir = self.trace_dir / time.strftime("%Y-%m-%d", time.localtime(turn.start))
+            day_dir.mkdir(parents=True, exist_ok=True)
+            with open(day_dir / f"{turn.turn_id}.json", "w") as f:
+                json.dump(turn.to_dict(), f, indent=2)
+        except OSError as e:
+            print(f"Could not write the trace of turn {turn.turn_id}: {e}")
@@ -20,7 +20,7 @@ DESCRIPTOR = _descriptor.FileDescriptor(
   syntax='proto3',
   serialized_options=None,
   create_key=_descriptor._internal_create_key,
-  serialized_pb=b'\n\ngrpc.proto\x1a\x1bgoogle/protobuf/empty.proto\"\xea\x01\n\x0f\x41udioImgRequest\x12\x12\n\naudio_data\x18\x01 \x01(\x0c\x12\x13\n\x0bsample_rate\x18\x02 \x01(\x05\x12\x14\n\x0cnum_channels\x18\x03 \x01(\x05\x12\x16\n\x0e\x61udio_encoding\x18\x04 \x01(\t\x12\x19\n\x11\x61udio_description\x18\x05 \x01(\t\x12\x12\n\nimage_data\x18\x06 \x01(\x0c\x12\x14\n\x0cimage_format\x18\x07 \x01(\t\x12\x13\n\x0bimage_width\x18\x08 \x01(\x05\x12\x14\n\x0cimage_height\x18\t \x01(\x05\x12\x10\n\x08\x61pi_task\x18\n \x01(\t\"3\n\x10\x41udioImgResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\"9\n\tTextChunk\x12\x0c\n\x04text\x18\x01 \x01(\t\x12\x10\n\x08is_final\x18\x02 \x01(\x08\x12\x0c\n\x04mode\x18\x03 \x01(\t\"\x1f\n\x0cQueueRemoval\x12\x0f\n\x07removed\x18\x01 \x01(\x08\"\x84\x01\n\x12ImageStreamRequest\x12\x12\n\nimage_data\x18\x01 \x01(\x0c\x12\x14\n\x0cimage_format\x18\x02 \x01(\t\x12\x13\n\x0bimage_width\x18\x03 \x01(\x05\x12\x14\n\x0cimage_height\x18\x04 \x01(\x05\x12\x19\n\x11image_description\x18\x05 \x01(\t\"A\n\x0f\x46\x61\x63\x65\x42oundingBox\x12\n\n\x02x1\x18\x01 \x01(\x05\x12\n\n\x02y1\x18\x02 \x01(\x05\x12\n\n\x02x2\x18\x03 \x01(\x05\x12\n\n\x02y2\x18\x04 \x01(\x05\"m\n\rSecondaryData\x12\x10\n\x08\x61pi_task\x18\x01 \x01(\t\x12\x1a\n\x05image\x18\x02 \x01(\x0b\x32\x06.ImageH\x00\x88\x01\x01\x12\x1a\n\x05\x61udio\x18\x03 \x01(\x0b\x32\x06.AudioH\x01\x88\x01\x01\x42\x08\n\x06_imageB\x08\n\x06_audio\"\x1b\n\x05Image\x12\x12\n\nimage_data\x18\x01 \x01(\x0c\"^\n\x05\x41udio\x12\x12\n\naudio_data\x18\x01 \x01(\x0c\x12\x13\n\x0bsample_rate\x18\x02 \x01(\x05\x12\x14\n\x0cnum_channels\x18\x03 \x01(\x05\x12\x16\n\x0e\x61udio_encoding\x18\x04 \x01(\t2I\n\x10SecondaryChannel\x12\x35\n\x17Secondary_media_manager\x12\x0e.SecondaryData\x1a\n.TextChunk2\xea\x01\n\x0cMediaService\x12\x31\n\x0fProcessAudioImg\x12\x10.AudioImgRequest\x1a\n.TextChunk0\x01\x12=\n\x0cStreamImages\x12\x13.ImageStreamRequest\x1a\x16.google.protobuf.Empty(\x01\x12\x33\n\x07GetBbox\x12\x16.google.protobuf.Empty\x1a\x10.FaceBoundingBox\x12\x33\n\nClearQueue\x12\x16.google.protobuf.Empty\x1a\r.QueueRemovalb\x06proto3'
+  serialized_pb=b'\n\ngrpc.proto\x1a\x1bgoogle/protobuf/empty.proto\"\xea\x01\n\x0f\x41udioImgRequest\x12\x12\n\naudio_data\x18\x01 \x01(\x0c\x12\x13\n\x0bsample_rate\x18\x02 \x01(\x05\x12\x14\n\x0cnum_channels\x18\x03 \x01(\x05\x12\x16\n\x0e\x61udio_encoding\x18\x04 \x01(\t\x12\x19\n\x11\x61udio_description\x18\x05 \x01(\t\x12\x12\n\nimage_data\x18\x06 \x01(\x0c\x12\x14\n\x0cimage_format\x18\x07 \x01(\t\x12\x13\n\x0bimage_width\x18\x08 \x01(\x05\x12\x14\n\x0cimage_height\x18\t \x01(\x05\x12\x10\n\x08\x61pi_task\x18\n \x01(\t\"\xd5\x01\n\x10\x41udioStreamChunk\x12\x12\n\naudio_data\x18\x01 \x01(\x0c\x12\x13\n\x0bsample_rate\x18\x02 \x01(\x05\x12\x14\n\x0cnum_channels\x18\x03 \x01(\x05\x12\x16\n\x0e\x61udio_encoding\x18\x04 \x01(\t\x12\x15\n\rend_of_speech\x18\x05 \x01(\x08\x12\x12\n\nimage_data\x18\x06 \x01(\x0c\x12\x14\n\x0cimage_format\x18\x07 \x01(\t\x12\x13\n\x0bimage_width\x18\x08 \x01(\x05\x12\x14\n\x0cimage_height\x18\t \x01(\x05\"3\n\x10\x41udioImgResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\"9\n\tTextChunk\x12\x0c\n\x04text\x18\x01 \x01(\t\x12\x10\n\x08is_final\x18\x02 \x01(\x08\x12\x0c\n\x04mode\x18\x03 \x01(\t\"\x1f\n\x0cQueueRemoval\x12\x0f\n\x07removed\x18\x01 \x01(\x08\"\x84\x01\n\x12ImageStreamRequest\x12\x12\n\nimage_data\x18\x01 \x01(\x0c\x12\x14\n\x0cimage_format\x18\x02 \x01(\t\x12\x13\n\x0bimage_width\x18\x03 \x01(\x05\x12\x14\n\x0cimage_height\x18\x04 \x01(\x05\x12\x19\n\x11image_description\x18\x05 \x01(\t\"D\n\x0eImageStreamAck\x12\x0f\n\x07\x63redits\x18\x01 \x01(\x05\x12\x10\n\x08received\x18\x02 \x01(\x03\x12\x0f\n\x07\x64ropped\x18\x03 \x01(\x03\"A\n\x0f\x46\x61\x63\x65\x42oundingBox\x12\n\n\x02x1\x18\x01 \x01(\x05\x12\n\n\x02y1\x18\x02 \x01(\x05\x12\n\n\x02x2\x18\x03 \x01(\x05\x12\n\n\x02y2\x18\x04 \x01(\x05\"m\n\rSecondaryData\x12\x10\n\x08\x61pi_task\x18\x01 \x01(\t\x12\x1a\n\x05image\x18\x02 \x01(\x0b\x32\x06.ImageH\x00\x88\x01\x01\x12\x1a\n\x05\x61udio\x18\x03 \x01(\x0b\x32\x06.AudioH\x01\x88\x01\x01\x42\x08\n\x06_imageB\x08\n\x06_audio\"\x1b\n\x05Image\x12\x12\n\nimage_data\x18\x01 \x01(\x0c\"^\n\x05\x41udio\x12\x12\n\naudio_data\x18\x01 \x01(\x0c\x12\x13\n\x0bsample_rate\x18\x02 \x01(\x05\x12\x14\n\x0cnum_channels\x18\x03 \x01(\x05\x12\x16\n\x0e\x61udio_encoding\x18\x04 \x01(\t2I\n\x10SecondaryChannel\x12\x35\n\x17Secondary_media_manager\x12\x0e.SecondaryData\x1a\n.TextChunk2\xdd\x02\n\x0cMediaService\x12\x31\n\x0fProcessAudioImg\x12\x10.AudioImgRequest\x1a\n.TextChunk0\x01\x12\x37\n\x12ProcessAudioStream\x12\x11.AudioStreamChunk\x1a\n.TextChunk(\x01\x30\x01\x12=\n\x0cStreamImages\x12\x13.ImageStreamRequest\x1a\x16.google.protobuf.Empty(\x01\x12\x38\n\x0cImageSession\x12\x13.ImageStreamRequest\x1a\x0f.ImageStreamAck(\x01\x30\x01\x12\x33\n\x07GetBbox\x12\x16.google.protobuf.Empty\x1a\x10.FaceBoundingBox\x12\x33\n\nClearQueue\x12\x16.google.protobuf.Empty\x1a\r.QueueRemovalb\x06proto3'
   ,
   dependencies=[google_dot_protobuf_dot_empty__pb2.DESCRIPTOR,])
 
@@ -122,6 +122,94 @@ _AUDIOIMGREQUEST = _descriptor.Descriptor(
 )
 
 
+_AUDIOSTREAMCHUNK = _descriptor.Descriptor(
+  name='AudioStreamChunk',
+  full_name='AudioStreamChunk',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='audio_data', full_name='AudioStreamChunk.audio_data', index=0,
+      number=1, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='sample_rate', full_name='AudioStreamChunk.sample_rate', index=1,
+      number=2, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='num_channels', full_name='AudioStreamChunk.num_channels', index=2,
+      number=3, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='audio_encoding', full_name='AudioStreamChunk.audio_encoding', index=3,
+      number=4, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='end_of_speech', full_name='AudioStreamChunk.end_of_speech', index=4,
+      number=5, type=8, cpp_type=7, label=1,
+      has_default_value=False, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='image_data', full_name='AudioStreamChunk.image_data', index=5,
+      number=6, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='image_format', full_name='AudioStreamChunk.image_format', index=6,
+      number=7, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='image_width', full_name='AudioStreamChunk.image_width', index=7,
+      number=8, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='image_height', full_name='AudioStreamChunk.image_height', index=8,
+      number=9, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=281,
+  serialized_end=494,
+)
+
+
 _AUDIOIMGRESPONSE = _descriptor.Descriptor(
   name='AudioImgResponse',
   full_name='AudioImgResponse',
@@ -156,8 +244,8 @@ _AUDIOIMGRESPONSE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=280,
-  serialized_end=331,
+  serialized_start=496,
+  serialized_end=547,
 )
 
 
@@ -202,8 +290,8 @@ _TEXTCHUNK = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=333,
-  serialized_end=390,
+  serialized_start=549,
+  serialized_end=606,
 )
 
 
@@ -234,8 +322,8 @@ _QUEUEREMOVAL = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=392,
-  serialized_end=423,
+  serialized_start=608,
+  serialized_end=639,
 )
 
 
@@ -294,8 +382,54 @@ _IMAGESTREAMREQUEST = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=426,
-  serialized_end=558,
+  serialized_start=642,
+  serialized_end=774,
+)
+
+
+_IMAGESTREAMACK = _descriptor.Descriptor(
+  name='ImageStreamAck',
+  full_name='ImageStreamAck',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='credits', full_name='ImageStreamAck.credits', index=0,
+      number=1, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='received', full_name='ImageStreamAck.received', index=1,
+      number=2, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='dropped', full_name='ImageStreamAck.dropped', index=2,
+      number=3, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=776,
+  serialized_end=844,
 )
 
 
@@ -347,8 +481,8 @@ _FACEBOUNDINGBOX = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=560,
-  serialized_end=625,
+  serialized_start=846,
+  serialized_end=911,
 )
 
 
@@ -403,8 +537,8 @@ _SECONDARYDATA = _descriptor.Descriptor(
       create_key=_descriptor._internal_create_key,
     fields=[]),
   ],
-  serialized_start=627,
-  serialized_end=736,
+  serialized_start=913,
+  serialized_end=1022,
 )
 
 
@@ -435,8 +569,8 @@ _IMAGE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=738,
-  serialized_end=765,
+  serialized_start=1024,
+  serialized_end=1051,
 )
 
 
@@ -488,8 +622,8 @@ _AUDIO = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=767,
-  serialized_end=861,
+  serialized_start=1053,
+  serialized_end=1147,
 )
 
 _SECONDARYDATA.fields_by_name['image'].message_type = _IMAGE
@@ -501,10 +635,12 @@ _SECONDARYDATA.oneofs_by_name['_audio'].fields.append(
   _SECONDARYDATA.fields_by_name['audio'])
 _SECONDARYDATA.fields_by_name['audio'].containing_oneof = _SECONDARYDATA.oneofs_by_name['_audio']
 DESCRIPTOR.message_types_by_name['AudioImgRequest'] = _AUDIOIMGREQUEST
+DESCRIPTOR.message_types_by_name['AudioStreamChunk'] = _AUDIOSTREAMCHUNK
 DESCRIPTOR.message_types_by_name['AudioImgResponse'] = _AUDIOIMGRESPONSE
 DESCRIPTOR.message_types_by_name['TextChunk'] = _TEXTCHUNK
 DESCRIPTOR.message_types_by_name['QueueRemoval'] = _QUEUEREMOVAL
 DESCRIPTOR.message_types_by_name['ImageStreamRequest'] = _IMAGESTREAMREQUEST
+DESCRIPTOR.message_types_by_name['ImageStreamAck'] = _IMAGESTREAMACK
 DESCRIPTOR.message_types_by_name['FaceBoundingBox'] = _FACEBOUNDINGBOX
 DESCRIPTOR.message_types_by_name['SecondaryData'] = _SECONDARYDATA
 DESCRIPTOR.message_types_by_name['Image'] = _IMAGE
@@ -518,6 +654,13 @@ AudioImgRequest = _reflection.GeneratedProtocolMessageType('AudioImgRequest', (_
   })
 _sym_db.RegisterMessage(AudioImgRequest)
 
+AudioStreamChunk = _reflection.GeneratedProtocolMessageType('AudioStreamChunk', (_message.Message,), {
+  'DESCRIPTOR' : _AUDIOSTREAMCHUNK,
+  '__module__' : 'grpc_pb2'
+  # @@protoc_insertion_point(class_scope:AudioStreamChunk)
+  })
+_sym_db.RegisterMessage(AudioStreamChunk)
+
 AudioImgResponse = _reflection.GeneratedProtocolMessageType('AudioImgResponse', (_message.Message,), {
   'DESCRIPTOR' : _AUDIOIMGRESPONSE,
   '__module__' : 'grpc_pb2'
@@ -546,6 +689,13 @@ ImageStreamRequest = _reflection.GeneratedProtocolMessageType('ImageStreamReques
   })
 _sym_db.RegisterMessage(ImageStreamRequest)
 
+ImageStreamAck = _reflection.GeneratedProtocolMessageType('ImageStreamAck', (_message.Message,), {
+  'DESCRIPTOR' : _IMAGESTREAMACK,
+  '__module__' : 'grpc_pb2'
+  # @@protoc_insertion_point(class_scope:ImageStreamAck)
+  })
+_sym_db.RegisterMessage(ImageStreamAck)
+
 FaceBoundingBox = _reflection.GeneratedProtocolMessageType('FaceBoundingBox', (_message.Message,), {
   'DESCRIPTOR' : _FACEBOUNDINGBOX,
   '__module__' : 'grpc_pb2'
@@ -583,8 +733,8 @@ _SECONDARYCHANNEL = _descriptor.ServiceDescriptor(
   index=0,
   serialized_options=None,
   create_key=_descriptor._internal_create_key,
-  serialized_start=863,
-  serialized_end=936,
+  serialized_start=1149,
+  serialized_end=1222,
   methods=[
   _descriptor.MethodDescriptor(
     name='Secondary_media_manager',
@@ -609,8 +759,8 @@ _MEDIASERVICE = _descriptor.ServiceDescriptor(
   index=1,
   serialized_options=None,
   create_key=_descriptor._internal_create_key,
-  serialized_start=939,
-  serialized_end=1173,
+  serialized_start=1225,
+  serialized_end=1574,
   methods=[
   _descriptor.MethodDescriptor(
     name='ProcessAudioImg',
@@ -622,20 +772,40 @@ _MEDIASERVICE = _descriptor.ServiceDescriptor(
     serialized_options=None,
     create_key=_descriptor._internal_create_key,
   ),
+  _descriptor.MethodDescriptor(
+    name='ProcessAudioStream',
+    full_name='MediaService.ProcessAudioStream',
+    index=1,
+    containing_service=None,
+    input_type=_AUDIOSTREAMCHUNK,
+    output_type=_TEXTCHUNK,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
   _descriptor.MethodDescriptor(
     name='StreamImages',
     full_name='MediaService.StreamImages',
-    index=1,
+    index=2,
     containing_service=None,
     input_type=_IMAGESTREAMREQUEST,
     output_type=google_dot_protobuf_dot_empty__pb2._EMPTY,
     serialized_options=None,
     create_key=_descriptor._internal_create_key,
   ),
+  _descriptor.MethodDescriptor(
+    name='ImageSession',
+    full_name='MediaService.ImageSession',
+    index=3,
+    containing_service=None,
+    input_type=_IMAGESTREAMREQUEST,
+    output_type=_IMAGESTREAMACK,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
   _descriptor.MethodDescriptor(
     name='GetBbox',
     full_name='MediaService.GetBbox',
-    index=2,
+    index=4,
     containing_service=None,
     input_type=google_dot_protobuf_dot_empty__pb2._EMPTY,
     output_type=_FACEBOUNDINGBOX,
@@ -645,7 +815,7 @@ _MEDIASERVICE = _descriptor.ServiceDescriptor(
   _descriptor.MethodDescriptor(
     name='ClearQueue',
     full_name='MediaService.ClearQueue',
-    index=3,
+    index=5,
     containing_service=None,
     input_type=google_dot_protobuf_dot_empty__pb2._EMPTY,
     output_type=_QUEUEREMOVAL,
@@ -82,11 +82,21 @@ class MediaServiceStub(object):
                 request_serializer=grpc__pb2.AudioImgRequest.SerializeToString,
                 response_deserializer=grpc__pb2.TextChunk.FromString,
                 )
+        self.ProcessAudioStream = channel.stream_stream(
+                '/MediaService/ProcessAudioStream',
+                request_serializer=grpc__pb2.AudioStreamChunk.SerializeToString,
+                response_deserializer=grpc__pb2.TextChunk.FromString,
+                )
         self.StreamImages = channel.stream_unary(
                 '/MediaService/StreamImages',
                 request_serializer=grpc__pb2.ImageStreamRequest.SerializeToString,
                 response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
                 )
+        self.ImageSession = channel.stream_stream(
+                '/MediaService/ImageSession',
+                request_serializer=grpc__pb2.ImageStreamRequest.SerializeToString,
+                response_deserializer=grpc__pb2.ImageStreamAck.FromString,
+                )
         self.GetBbox = channel.unary_unary(
                 '/MediaService/GetBbox',
                 request_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
@@ -109,6 +119,14 @@ class MediaServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ProcessAudioStream(self, request_iterator, context):
+        """RPC method streaming audio while it is captured, the last chunk carries the
+        image and closes the utterance
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def StreamImages(self, request_iterator, context):
         """RPC method to handle image streams
         """
@@ -116,6 +134,14 @@ class MediaServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ImageSession(self, request_iterator, context):
+        """RPC method holding one long lived image stream, every frame is acknowledged
+        with the credit the server has left
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def GetBbox(self, request, context):
         """RPC method to get face detections bboxes
         """
@@ -138,11 +164,21 @@ def add_MediaServiceServicer_to_server(servicer, server):
                     request_deserializer=grpc__pb2.AudioImgRequest.FromString,
                     response_serializer=grpc__pb2.TextChunk.SerializeToString,
             ),
+            'ProcessAudioStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.ProcessAudioStream,
+                    request_deserializer=grpc__pb2.AudioStreamChunk.FromString,
+                    response_serializer=grpc__pb2.TextChunk.SerializeToString,
+            ),
             'StreamImages': grpc.stream_unary_rpc_method_handler(
                     servicer.StreamImages,
                     request_deserializer=grpc__pb2.ImageStreamRequest.FromString,
                     response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
             ),
+            'ImageSession': grpc.stream_stream_rpc_method_handler(
+                    servicer.ImageSession,
+                    request_deserializer=grpc__pb2.ImageStreamRequest.FromString,
+                    response_serializer=grpc__pb2.ImageStreamAck.SerializeToString,
+            ),
             'GetBbox': grpc.unary_unary_rpc_method_handler(
                     servicer.GetBbox,
                     request_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
@@ -180,6 +216,23 @@ class MediaService(object):
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
 
+    @staticmethod
+    def ProcessAudioStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(request_iterator, target, '/MediaService/ProcessAudioStream',
+            grpc__pb2.AudioStreamChunk.SerializeToString,
+            grpc__pb2.TextChunk.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
     @staticmethod
     def StreamImages(request_iterator,
             target,
@@ -197,6 +250,23 @@ class MediaService(object):
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
 
+    @staticmethod
+    def ImageSession(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(request_iterator, target, '/MediaService/ImageSession',
+            grpc__pb2.ImageStreamRequest.SerializeToString,
+            grpc__pb2.ImageStreamAck.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
     @staticmethod
     def GetBbox(request,
             target,
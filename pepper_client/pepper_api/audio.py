@@ -6,6 +6,10 @@ import numpy as np
 import time
 import sys
 import soundfile as sf
+try:
+    from Queue import Queue, Empty
+except ImportError:
+    from queue import Queue, Empty
 
 class AudioManager2(object):
     def __init__(self, session, recording_duration=2):
@@ -19,6 +23,8 @@ class AudioManager2(object):
         self.recording_duration = recording_duration  # Target duration in seconds
         self.target_frames = self.sample_rate * self.channels * self.recording_duration
         self.audio_data_buffer = io.BytesIO()
+        self.chunk_queue = None
+        self.isProcessingDone = False
         print("Subscribed to audio service...")
 
     def init_service(self, session):
@@ -33,6 +39,12 @@ class AudioManager2(object):
         rms = np.sqrt(np.mean(audio_array**2))
         return rms
 
+    def _record(self, inputBuffer):
+        """Keep the buffer and hand it to a streaming consumer if there is one."""
+        self.audio_data_buffer.write(inputBuffer)
+        if self.chunk_queue is not None:
+            self.chunk_queue.put(bytes(inputBuffer))
+
     def processRemote(self, nbOfChannels, nbOfSamplesByChannel, timeStamp, inputBuffer):
         """
         Record the audio data only when the frontMicEnergy crosses a threshold,
@@ -42,6 +54,9 @@ class AudioManager2(object):
         max_below_thresh_loops = 15  # Stop recording after 10 loops below threshold
 
 
+        if self.isProcessingDone:
+            return
+
         # Get the front mic energy
         current_energy = self.audio_service.getFrontMicEnergy()
         print("The front mic energy is {}".format(current_energy))
@@ -52,14 +67,14 @@ class AudioManager2(object):
             self.first_high_thresh = True
             
             # Start recording
-            self.audio_data_buffer.write(inputBuffer)
+            self._record(inputBuffer)
 
         else:
             # Increment the below-threshold counter if energy is below the threshold
             if self.first_high_thresh:
                 self.below_threshold_count += 1
                 print("Below threshold count: {}".format(self.below_threshold_count))
-                self.audio_data_buffer.write(inputBuffer)
+                self._record(inputBuffer)
 
                 # Stop recording after 10 consecutive loops below the threshold
                 if self.below_threshold_count >= max_below_thresh_loops:
@@ -90,6 +105,31 @@ class AudioManager2(object):
         audio_data = self.audio_data_buffer.read()
         return audio_data, self.sample_rate
 
+    def streamProcessing(self, poll_interval=0.05):
+        """
+        Subscribe the service and yield the audio chunks as they are recorded,
+        the generator ends once the energy stayed below the threshold.
+        """
+        self.isProcessingDone = False
+        self.audio_data_buffer = io.BytesIO()
+        self.below_threshold_count = 0
+        self.first_high_thresh = False
+        self.chunk_queue = Queue()
+
+        self.audio_service.setClientPreferences(self.module_name,
+                                                self.sample_rate, self.channels, 0)
+        self.audio_service.subscribe(self.module_name)
+        try:
+            while True:
+                try:
+                    yield self.chunk_queue.get(timeout=poll_interval)
+                except Empty:
+                    if self.isProcessingDone and self.chunk_queue.empty():
+                        break
+        finally:
+            self.audio_service.unsubscribe(self.module_name)
+            self.chunk_queue = None
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--ip", type=str, default="192.168.0.52",
@@ -16,11 +16,11 @@ from concurrent import futures
 
 import grpc_communication.pepper_auto_pb2_grpc as pepper_pb2_grpc
 import grpc_communication.pepper_auto_pb2 as pepper_pb2
-from grpc_communication.grpc_pb2 import AudioImgRequest, ImageStreamRequest
+from grpc_communication.grpc_pb2 import AudioImgRequest, ImageStreamRequest, AudioStreamChunk
 from grpc_communication.grpc_pb2_grpc import MediaServiceStub, SecondaryChannelStub
 from pepper_api import CameraManager, AudioManager2, HeadManager, EyeLEDManager, \
     SpeechManager, CustomMovement, StandardMovement
-from utils import SpeechProcessor
+from utils import SpeechProcessor, ImageSession
 from pepper_auto import PepperAutoController
 
 logging.basicConfig(filename="app.log", level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -28,6 +28,10 @@ logger = logging.getLogger(__name__)
 
 
 class Pepper():
+    # Waiting for the last frame of an utterance, a black frame is sent after that
+    FRAME_RETRY_INTERVAL = 0.1
+    FRAME_RETRIES = 10
+
     def __init__(self, pepper_connection_url, stub, secondary_stub):
         self.stub = stub
         self.secondary_stub = secondary_stub
@@ -70,6 +74,44 @@ class Pepper():
         self.eye_led_manager.set_eyes_red()
         return audio_data, samplerate
 
+    def audio_stream_requests(self):
+        """
+        Audio chunks of one utterance as they are captured, followed by the
+        end_of_speech chunk carrying the last camera frame
+        """
+        sample_rate = self.audio_manager.sample_rate
+        self.eye_led_manager.set_eyes_blue()
+        for chunk in self.audio_manager.streamProcessing():
+            yield AudioStreamChunk(
+                audio_data=chunk,
+                sample_rate=sample_rate,
+                num_channels=1,  # Assuming mono audio
+                audio_encoding="PCM_16"
+            )
+        self.eye_led_manager.set_eyes_red()
+
+        last_frame = None
+        for _ in range(self.FRAME_RETRIES):
+            try:
+                last_frame = self.make_img_compatible()
+                break
+            except TypeError:
+                # The camera did not give a frame back, wait for the next one
+                time.sleep(self.FRAME_RETRY_INTERVAL)
+        if last_frame is None:
+            print("Audio stream was not receiving last frame, sending a black one")
+            last_frame = np.zeros((240, 320, 3), dtype=np.uint8)
+
+        height, width, _ = last_frame.shape
+        _, image_data = cv2.imencode(".jpg", last_frame)
+        yield AudioStreamChunk(
+            end_of_speech=True,
+            image_data=image_data.tobytes(),
+            image_format="JPEG",
+            image_width=width,
+            image_height=height
+        )
+
     def make_img_compatible(self):
         raw_image = self.get_image()
 
@@ -94,12 +136,12 @@ class Pepper():
     def center_head(self):
         pass
 
-    def img_stream(self):
+    def make_image_request(self):
         cv2_image = self.make_img_compatible()
         height, width, _ = cv2_image.shape
         _, image_data = cv2.imencode(".jpg", cv2_image)
 
-        request = ImageStreamRequest(
+        return ImageStreamRequest(
             image_data=image_data.tobytes(),
             image_format="JPEG",
             image_width=width,
@@ -107,24 +149,18 @@ class Pepper():
             image_description="Captured pepper image"
         )
 
-        # Send the image stream request
-        try:
-            self.stub.StreamImages(iter([request]))
-        except grpc.RpcError as e:
-            logger.error("Failed to stream image: {}".format(e.details()))
-        time.sleep(0.1)
-
     def capture_and_stream_images(self):
+        image_session = ImageSession(
+            self.stub,
+            self.make_image_request,
+            paused=self.not_send_imgs
+        )
         try:
-            while True:
-                if not self.not_send_imgs.is_set():
-                    self.img_stream()
+            image_session.run()
         except KeyboardInterrupt:
             logger.info("Stopping image streaming...")
+            image_session.stop()
             raise KeyboardInterrupt()
-        except TypeError:
-            print("Running the capture stream again")
-            self.capture_and_stream_images()
 
     def get_vertical_and_horizontal_axis(self, box, img_shape, stop_threshold=0.5, vertical_offset=0.5):
         box_center = np.array([box[2] / 2 + box[0] / 2, box[1] * (1 - vertical_offset) + box[3] * vertical_offset])
@@ -240,6 +276,19 @@ class Pepper():
             traceback.print_exc()
             self.main()
 
+    def main_streaming(self):
+        """
+            Same turn as main, but the audio is streamed while it is recorded so
+            the server transcribes during capture
+        """
+        try:
+            server_response_stream = self.stub.ProcessAudioStream(self.audio_stream_requests())
+            self.do_not_move_head.set()
+            self.process_server_response(server_response_stream)
+            self.do_not_move_head.clear()
+        except grpc.RpcError as e:
+            print("gRPC in streaming audio error: {} - {}".format(e.code(), e.details()))
+
     def close(self):
         # Shut down services and clean up resources
         print("Shutting down Pepper services...")
@@ -277,6 +326,8 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Please enter Pepper's IP address (and optional port number)")
     parser.add_argument("--ip", type=str, nargs='?', default="192.168.0.52")
     parser.add_argument("--port", type=int, nargs='?', default=9559)
+    parser.add_argument("--batch_audio", action="store_true",
+                        help="Send each utterance in one request instead of streaming it")
     args = parser.parse_args()
 
     pepper_connection_url = "tcp://" + args.ip + ":" + str(args.port)
@@ -305,7 +356,10 @@ if __name__ == "__main__":
     try:
         # Main loop: send audio and video and process LLM responses
         while True:
-            p.main()
+            if args.batch_audio:
+                p.main()
+            else:
+                p.main_streaming()
     except KeyboardInterrupt:
         print("Program interrupted by user.")
         p.close()
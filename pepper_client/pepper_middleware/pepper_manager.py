@@ -12,7 +12,7 @@ from google.protobuf.empty_pb2 import Empty
 from server_api import PepperClientAPI as Pepper
 from grpc_communication.grpc_pb2 import AudioImgRequest, ImageStreamRequest
 from grpc_communication.grpc_pb2_grpc import MediaServiceStub
-from utils import SpeechProcessor, is_zero_list, get_vh_axis
+from utils import SpeechProcessor, ImageSession, is_zero_list, get_vh_axis
 
 from movement import CustomMovementManager
 
@@ -25,32 +25,27 @@ class PepperManager():
         self.pepper = Pepper()
         self.stub = grpc_stub
 
+    def make_image_request(self):
+        cv2_image = self.pepper.make_img_compatible()
+        height, width, _ = cv2_image.shape
+        _, image_data = cv2.imencode(".jpg", cv2_image)
+
+        return ImageStreamRequest(
+            image_data=image_data.tobytes(),
+            image_format="JPEG",
+            image_width=width,
+            image_height=height,
+            image_description="Captured pepper image"
+        )
+
     def capture_and_stream_images(self):
+        image_session = ImageSession(self.stub, self.make_image_request)
         try:
-            while True:
-                cv2_image = self.pepper.make_img_compatible()
-                height, width, _ = cv2_image.shape
-                _, image_data = cv2.imencode(".jpg", cv2_image)
-
-                request = ImageStreamRequest(
-                    image_data=image_data.tobytes(),
-                    image_format="JPEG",
-                    image_width=width,
-                    image_height=height,
-                    image_description="Captured pepper image"
-                )
-
-                # Send the image stream request
-                try:
-                    self.stub.StreamImages(iter([request]))
-                except grpc.RpcError as e:
-                    logger.error("Failed to stream image: {}".format(e.details()))
+            image_session.run()
         except KeyboardInterrupt:
             logger.info("Stopping image streaming...")
+            image_session.stop()
             raise KeyboardInterrupt()
-        except TypeError:
-            print("Running the capture stream again")
-            self.capture_and_stream_images()
 
     def head_management(self):
         try:
@@ -1,6 +1,7 @@
 import json
 import numpy as np
 from .speech_processor import SpeechProcessor
+from .image_session import ImageSession
 
 def is_zero_list(box):
     for i in box:
@@ -0,0 +1,115 @@
+import time
+import logging
+import threading
+
+import grpc
+
+logger = logging.getLogger(__name__)
+
+
+class ImageSession(object):
+    """
+        Streams camera frames through a single long lived ImageSession call.
+
+        The server acks every frame with the credit left in its face queue, when
+        the credit runs out frames are not even captured, they are dropped here
+        at the source. If no credit is left and nothing is in flight a single
+        probe frame is sent every probe_interval to learn the new credit.
+    """
+    def __init__(self, stub, make_request, paused=None, frame_interval=0.1,
+                 probe_interval=0.5, retry_interval=1.0):
+        """
+        :param stub: MediaServiceStub connected to the server
+        :param make_request: callable returning an ImageStreamRequest for the
+            current frame
+        :param paused: optional threading.Event, no frames are sent while set
+        :param frame_interval: seconds between two captured frames
+        :param probe_interval: seconds to wait before probing a saturated server
+        :param retry_interval: seconds to wait before reopening a broken session
+        """
+        self.stub = stub
+        self.make_request = make_request
+        self.paused = paused
+        self.frame_interval = frame_interval
+        self.probe_interval = probe_interval
+        self.retry_interval = retry_interval
+
+        self.credit_lock = threading.Lock()
+        self.credits = 1
+        self.in_flight = 0
+        self.last_ack_time = time.time()
+
+        self.sent = 0
+        self.dropped_at_source = 0
+        self.dropped_by_server = 0
+        self.is_running = True
+
+    def _take_credit(self):
+        with self.credit_lock:
+            if self.credits - self.in_flight > 0:
+                self.in_flight += 1
+                return True
+
+            probe_due = time.time() - self.last_ack_time > self.probe_interval
+            if self.in_flight == 0 and probe_due:
+                self.in_flight += 1
+                self.last_ack_time = time.time()
+                return True
+            return False
+
+    def _return_credit(self):
+        with self.credit_lock:
+            self.in_flight = max(self.in_flight - 1, 0)
+
+    def _on_ack(self, ack):
+        with self.credit_lock:
+            self.in_flight = max(self.in_flight - 1, 0)
+            self.credits = ack.credits
+            self.last_ack_time = time.time()
+        self.dropped_by_server = ack.dropped
+
+    def _requests(self):
+        while self.is_running:
+            if self.paused is not None and self.paused.is_set():
+                time.sleep(self.frame_interval)
+                continue
+
+            if not self._take_credit():
+                self.dropped_at_source += 1
+                time.sleep(self.frame_interval)
+                continue
+
+            try:
+                request = self.make_request()
+            except TypeError:
+                # The camera did not give a frame back, try again on the next frame
+                self._return_credit()
+                time.sleep(self.frame_interval)
+                continue
+
+            self.sent += 1
+            yield request
+            time.sleep(self.frame_interval)
+
+    def run(self):
+        """
+            Keeps the session open, reopening it whenever the call breaks
+        """
+        while self.is_running:
+            with self.credit_lock:
+                self.credits = 1
+                self.in_flight = 0
+
+            try:
+                for ack in self.stub.ImageSession(self._requests()):
+                    self._on_ack(ack)
+            except grpc.RpcError as e:
+                logger.error("Image session broke: {}".format(e.details()))
+
+            logger.info("Image session sent {} frames, dropped {} at source and {} "
+                        "on the server".format(self.sent, self.dropped_at_source,
+                                               self.dropped_by_server))
+            time.sleep(self.retry_interval)
+
+    def stop(self):
+        self.is_running = False